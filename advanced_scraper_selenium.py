@@ -1,21 +1,32 @@
-import pandas as pd
+from __future__ import annotations
 import time
 import re
 import os
+import csv
+import json
+import threading
 from io import StringIO
 from typing import Optional, Dict
 import random 
 import argparse 
 import datetime 
 
-from bs4 import BeautifulSoup, Comment
-from selenium import webdriver
-from selenium.webdriver.chrome.service import Service as ChromeService
-from webdriver_manager.chrome import ChromeDriverManager
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
-from selenium.webdriver.common.by import By
-from selenium.common.exceptions import TimeoutException
+from lazy_imports import lazy_import
+# Imported on first use, so --help, --plan and argument errors return without loading them.
+pd = lazy_import("pandas")
+bs4 = lazy_import("bs4")
+selenium_exceptions = lazy_import("selenium.common.exceptions")
+table_extractor = lazy_import("table_extractor")
+
+from scrape_scheduler import HostRateLimiter, run_tasks_with_worker_pool
+from scrape_pipeline import run_tasks_async_pipeline, save_csv, PIPELINE_MODES, DEFAULT_PARSE_WORKERS, DEFAULT_QUEUE_SIZE
+from page_cache import PageCache, save_page_for_stand_in, DEFAULT_CACHE_DIR, DEFAULT_CURRENT_SEASON_TTL_HOURS
+from page_fetchers import SeleniumFetcher, HttpFetcher, AutoFetcher, CachedFetcher, ReplayFetcher, FETCHER_BACKENDS
+from dataset_manifest import append_manifest_record, use_dataset_manifest, HARVEST_MANIFEST_FILENAME, DATASET_MANIFEST_FILENAME
+from scrape_metrics import ScrapeMetrics, phase, count, format_summary, DEFAULT_METRICS_FILENAME
+from header_registry import active_header_registry, use_header_registry, HEADER_REGISTRY_FILENAME
+from delta_store import use_delta_store, DELTA_STORE_FILENAME
+from scrape_journal import ScrapeJournal, journal_task_key, RETRY_BATCH_SECONDS, STATE_DONE, DEFAULT_JOURNAL_FILENAME, DEFAULT_MAX_ATTEMPTS, DEFAULT_BACKOFF_SECONDS
 
 
 INDIVIDUAL_LEAGUES = {
@@ -55,10 +66,30 @@ STAT_CATEGORIES_URL_MAP: Dict[str, str] = {
 PLAYER_STAT_URL_COMPONENTS = STAT_CATEGORIES_URL_MAP
 SQUAD_STAT_URL_COMPONENTS = STAT_CATEGORIES_URL_MAP
 
+FBREF_BASE_URL = "https://fbref.com"
+# Where the chromedriver path resolved by webdriver_manager is kept, so later runs start without the network.
+DRIVER_PATH_CACHE_FILE = os.path.join(DEFAULT_CACHE_DIR, "chromedriver_path.json")
+_driver_path_lock = threading.Lock()
+_resolved_driver_path: Optional[str] = None
+POST_LOAD_DELAY_RANGE = (4, 7)
+
+# Outcomes returned by the scrape functions; the journal retries the failed ones.
+TASK_SAVED, TASK_EMPTY, TASK_SKIPPED = "saved", "empty", "skipped"
+TASK_NO_TABLE, TASK_TIMEOUT, TASK_ERROR = "no_table", "timeout", "error"
+FAILED_TASK_OUTCOMES = {TASK_NO_TABLE, TASK_TIMEOUT, TASK_ERROR}
+
 def clean_dataframe_columns(df: pd.DataFrame) -> pd.DataFrame:
-    if isinstance(df.columns, pd.MultiIndex):
+    """Cleans the column names of a scraped table. Names are computed once per header layout and then
+    looked up in the active header registry."""
+    df.columns = active_header_registry().cleaned_names("table", list(df.columns), clean_column_labels)
+    return df
+
+def clean_column_labels(columns: list) -> list:
+    """Flat, unique names for raw table column labels (tuples for two-level FBRef headers)."""
+    if any(isinstance(col, tuple) for col in columns):
         new_cols = []
-        for i, col_parts in enumerate(df.columns.values):
+        for i, col_parts in enumerate(columns):
+            col_parts = col_parts if isinstance(col_parts, tuple) else (col_parts,)
             str_col_parts = [str(p).strip() for p in col_parts]
             is_player_candidate = (len(str_col_parts) > 0 and str_col_parts[-1].lower() == 'player' and \
                                   (str_col_parts[0].lower().startswith('unnamed') or \
@@ -79,31 +110,30 @@ def clean_dataframe_columns(df: pd.DataFrame) -> pd.DataFrame:
                 if not filtered_parts: filtered_parts = [p for p in str_col_parts if p] 
                 joined_col = '_'.join(s for s in filtered_parts if s).strip().rstrip('_')
             new_cols.append(joined_col if joined_col else f"column_{i}")
-        df.columns = new_cols
+        cols = new_cols
     else:
-        df.columns = [str(col).strip() for col in df.columns]
+        cols = [str(col).strip() for col in columns]
     
-    df.columns = [re.sub(r'_+', '_', col) for col in df.columns]
-    df.columns = [re.sub(r'[^0-9a-zA-Z%#+_\s\-/]+', '', col).strip() for col in df.columns]
-    df.columns = [col.replace(' ', '_') for col in df.columns]
-    df.columns = [re.sub(r'_+', '_', col) for col in df.columns]
-    df.columns = [col if col else f"unnamed_col_{i}" for i, col in enumerate(df.columns)]
+    cols = [re.sub(r'_+', '_', col) for col in cols]
+    cols = [re.sub(r'[^0-9a-zA-Z%#+_\s\-/]+', '', col).strip() for col in cols]
+    cols = [col.replace(' ', '_') for col in cols]
+    cols = [re.sub(r'_+', '_', col) for col in cols]
+    cols = [col if col else f"unnamed_col_{i}" for i, col in enumerate(cols)]
     
-    cols = list(df.columns); counts = {}; new_column_names = []
+    counts = {}; new_column_names = []
     for col_name in cols:
         original_col_name = col_name; current_count = counts.get(original_col_name, 0)
         if current_count > 0: new_column_names.append(f"{original_col_name}_{current_count}")
         else: new_column_names.append(original_col_name)
         counts[original_col_name] = current_count + 1
-    df.columns = new_column_names
-    return df
+    return new_column_names
 
 create_output_dir = lambda dir_name: os.makedirs(dir_name, exist_ok=True)
 
-def find_table_directly_or_in_comment(soup_obj: BeautifulSoup,
+def find_table_directly_or_in_comment(soup_obj: bs4.BeautifulSoup,
                                         direct_table_id_exact: Optional[str] = None,
                                         comment_marker_string: Optional[str] = None,
-                                        context_url: str = "N/A_URL") -> tuple[pd.DataFrame | None, BeautifulSoup | None]:
+                                        context_url: str = "N/A_URL") -> tuple[pd.DataFrame | None, bs4.BeautifulSoup | None]:
     table_element = None; df = None
     if direct_table_id_exact:
         wrapper_div = soup_obj.select_one(f'div[id="div_{direct_table_id_exact}"]')
@@ -121,10 +151,10 @@ def find_table_directly_or_in_comment(soup_obj: BeautifulSoup,
             except Exception as e: print(f"      -- Error parsing direct table (id='{direct_table_id_exact}'): {e}")
 
     if comment_marker_string and not df:
-        comments = soup_obj.find_all(string=lambda text: isinstance(text, Comment) and comment_marker_string in str(text))
+        comments = soup_obj.find_all(string=lambda text: isinstance(text, bs4.Comment) and comment_marker_string in str(text))
         if comments:
             try:
-                comment_soup = BeautifulSoup(str(comments[0]), 'lxml')
+                comment_soup = bs4.BeautifulSoup(str(comments[0]), 'lxml')
                 table_element_in_comment = comment_soup.find('table', id=direct_table_id_exact if direct_table_id_exact else None)
                 if not table_element_in_comment: table_element_in_comment = comment_soup.find('table')
                 if table_element_in_comment:
@@ -150,43 +180,85 @@ def find_table_directly_or_in_comment(soup_obj: BeautifulSoup,
     if df is None: print(f"      !! FAILED to find target table for '{direct_table_id_exact or comment_marker_string}' on {context_url}.")
     return df, table_element
 
-def scrape_competition_aggregate_stats_table(driver, data_url: str, comp_config: Dict, category_key: str, data_type: str, season_year_part: str, output_dir: str):
+def stat_table_id(comp_config: Dict, category_key: str, data_type: str) -> Optional[str]:
+    if data_type == "player": return f"stats_{category_key}"
+    if data_type == "squad":
+        return f"stats_teams_{category_key}_for" if comp_config.get('id_in_url') == "Big5" else f"stats_squads_{category_key}_for"
+    return None
+
+FIXTURES_FETCH_OPTIONS = {"wait_css": "table[id^='sched'], table[id^='results'], table[id='schedule']",
+                          "expect_pattern": r'<table[^>]+id="(sched|results|schedule)'}
+
+def stat_page_fetch_options(table_id: str) -> Dict:
+    return {"wait_css": f"table[id='{table_id}'], div[id='div_{table_id}']", "expect_pattern": f'id="(div_)?{re.escape(table_id)}"'}
+
+def task_fetch_options(task: Dict) -> Dict:
+    """The wait_css / expect_pattern the scrape function of `task` fetches its page with."""
+    if task['data_type'] == "fixtures": return FIXTURES_FETCH_OPTIONS
+    table_id = stat_table_id(task['comp_config'], task['category'], task['data_type'])
+    return stat_page_fetch_options(table_id) if table_id else {}
+
+def stat_output_filename(comp_name_in_url: str, season_year_part: str, category_key: str, data_type: str) -> str:
+    return f"{comp_name_in_url}_{season_year_part}_{category_key}_{data_type}_stats.csv"
+
+def fixtures_output_filename(comp_name_in_url: str, season_year_part: str) -> str:
+    return f"{comp_name_in_url.replace(' ', '_')}_{season_year_part}_scores_fixtures.csv"
+
+def clean_stat_table(df: pd.DataFrame, data_type: str, category: Optional[str] = None) -> pd.DataFrame:
+    """Cleans column names and drops the header rows FBRef repeats inside stat tables. Player tables
+    read by the lxml extractor also get the FBRef player id as 'Player_ID', right after 'Player'.
+    With a `category`, columns keep the names pinned for their FBRef data-stat in earlier tables."""
+    player_ids = df.attrs.get('player_ids'); data_stat = df.attrs.get('data_stat')
+    df_cleaned = clean_dataframe_columns(df.copy())
+    if category and data_stat and len(data_stat) == len(df_cleaned.columns):
+        df_cleaned.columns = active_header_registry().pin_names(f"{data_type}:{category}", data_stat, list(df_cleaned.columns))
+    key_col = 'Player' if data_type == "player" else 'Squad'
+    if data_type == "player" and player_ids and len(player_ids) == len(df_cleaned) and 'Player' in df_cleaned.columns and 'Player_ID' not in df_cleaned.columns:
+        df_cleaned.insert(df_cleaned.columns.get_loc('Player') + 1, 'Player_ID', player_ids)
+    if key_col in df_cleaned.columns:
+        df_cleaned = df_cleaned[df_cleaned[key_col].notna() & (~df_cleaned[key_col].astype(str).str.fullmatch(key_col, case=False, na=False))]
+        if 'Rk' in df_cleaned.columns: df_cleaned = df_cleaned[df_cleaned['Rk'].astype(str).str.fullmatch('Rk', case=False, na=False) == False]
+    return df_cleaned
+
+def clean_fixtures_table(df: pd.DataFrame) -> pd.DataFrame:
+    df_cleaned = clean_dataframe_columns(df.copy())
+    if 'Wk' in df_cleaned.columns: df_cleaned = df_cleaned[df_cleaned['Wk'].astype(str).str.lower() != 'wk']
+    return df_cleaned
+
+def find_table_in_page_tables(page_tables: Dict[str, pd.DataFrame], table_id: str, context_url: str = "N/A_URL") -> pd.DataFrame | None:
+    df = page_tables.get(table_id)
+    if df is not None: print(f"      -> Found {'direct table' if df.attrs.get('source') == 'direct' else 'table in comment'} (id='{table_id}') on {context_url}")
+    return df
+
+def scrape_competition_aggregate_stats_table(fetcher, data_url: str, comp_config: Dict, category_key: str, data_type: str, season_year_part: str, output_dir: str,
+                                             post_load_delay: Optional[tuple] = POST_LOAD_DELAY_RANGE, save_pages_dir: Optional[str] = None):
     print(f"    Scraping {comp_config['display_name']} {data_type} '{category_key}' stats from: {data_url}")
     page_source = ""; table_id_to_find = ""
     try:
-        driver.get(data_url)
-        
-        comp_id_for_patterns = comp_config.get('id_in_url')
-
-        if data_type == "player":
-            table_id_to_find = f"stats_{category_key}" 
-        elif data_type == "squad":
-            if comp_id_for_patterns == "Big5":
-                table_id_to_find = f"stats_teams_{category_key}_for"
-            else: 
-                table_id_to_find = f"stats_squads_{category_key}_for"
-        else: 
-            print(f"        Unknown data_type: {data_type}."); return
+        table_id_to_find = stat_table_id(comp_config, category_key, data_type)
+        if not table_id_to_find:
+            print(f"        Unknown data_type: {data_type}."); return TASK_ERROR
         
-        WebDriverWait(driver, 20).until(EC.presence_of_element_located((By.CSS_SELECTOR, f"table[id='{table_id_to_find}'], div[id='div_{table_id_to_find}']")))
-        time.sleep(random.uniform(4, 7)); page_source = driver.page_source; soup = BeautifulSoup(page_source, 'lxml')
-        df_data, _ = find_table_directly_or_in_comment(soup, direct_table_id_exact=table_id_to_find, comment_marker_string=f'id="{table_id_to_find}"', context_url=data_url)
+        page_source = fetcher.fetch(data_url, **stat_page_fetch_options(table_id_to_find), post_load_delay=post_load_delay)
+        if save_pages_dir: save_page_for_stand_in(save_pages_dir, data_url, page_source)
+        with phase("extract"):
+            page_tables = table_extractor.extract_page_tables(page_source)
+            df_data = find_table_in_page_tables(page_tables, table_id_to_find, context_url=data_url)
         
         if df_data is not None and not df_data.empty:
-            df_cleaned = clean_dataframe_columns(df_data.copy())
-            key_col = 'Player' if data_type == "player" else 'Squad'
-            if key_col in df_cleaned.columns:
-                df_cleaned = df_cleaned[df_cleaned[key_col].notna() & (~df_cleaned[key_col].astype(str).str.fullmatch(key_col, case=False, na=False))]
-                if 'Rk' in df_cleaned.columns: df_cleaned = df_cleaned[df_cleaned['Rk'].astype(str).str.fullmatch('Rk', case=False, na=False) == False]
+            with phase("clean"): df_cleaned = clean_stat_table(df_data, data_type, category_key)
             
             if df_cleaned.empty:
                 print(f"        -- Table for {category_key} ({data_type}) empty after cleaning.")
                 debug_fname_empty = os.path.join(output_dir, f"debug_{comp_config['name_in_url']}_{season_year_part}_{category_key}_{data_type}_EMPTY.html")
                 with open(debug_fname_empty, "w", encoding="utf-8") as f: f.write(page_source or "No page source.")
-                return
-            filename = os.path.join(output_dir, f"{comp_config['name_in_url']}_{season_year_part}_{category_key}_{data_type}_stats.csv")
-            df_cleaned.to_csv(filename, index=False)
+                return TASK_EMPTY
+            filename = os.path.join(output_dir, stat_output_filename(comp_config['name_in_url'], season_year_part, category_key, data_type))
+            save_csv(df_cleaned, filename, {"data_type": data_type, "competition": comp_config['display_name'], "season": season_year_part,
+                                            "category": category_key, "source_url": data_url})
+            count("rows_extracted", len(df_cleaned))
             print(f"        ✅ Saved {data_type} '{category_key}' stats to {filename} ({len(df_cleaned)} rows)")
+            return TASK_SAVED
         else: 
             print(f"        !! Failed to extract {data_type} '{category_key}' table from {data_url}")
             debug_fname_no_table = os.path.join(output_dir, f"debug_{comp_config['name_in_url']}_{season_year_part}_{category_key}_{data_type}_NO_TABLE.html")
@@ -194,12 +266,14 @@ def scrape_competition_aggregate_stats_table(driver, data_url: str, comp_config:
                 with open(debug_fname_no_table, "w", encoding="utf-8") as f: f.write(page_source)
             else: 
                 with open(debug_fname_no_table, "w", encoding="utf-8") as f: f.write("No page source captured.")
+            return TASK_NO_TABLE
 
-    except TimeoutException:
+    except selenium_exceptions.TimeoutException:
         print(f"        !! TimeoutException waiting for table '{table_id_to_find}' for {data_type} '{category_key}' at {data_url}")
         if page_source:
             debug_fname_timeout = os.path.join(output_dir, f"debug_{comp_config['name_in_url']}_{season_year_part}_{category_key}_{data_type}_TIMEOUT.html")
             with open(debug_fname_timeout, "w", encoding="utf-8") as f: f.write(page_source)
+        return TASK_TIMEOUT
     except Exception as e: 
         print(f"        !! Error processing {data_type} '{category_key}' at {data_url}: {type(e).__name__} {e}")
         debug_fname_err = os.path.join(output_dir, f"debug_{comp_config['name_in_url']}_{season_year_part}_{category_key}_{data_type}_ERROR.html")
@@ -207,20 +281,23 @@ def scrape_competition_aggregate_stats_table(driver, data_url: str, comp_config:
             with open(debug_fname_err, "w", encoding="utf-8") as f: f.write(page_source)
         else: 
             with open(debug_fname_err, "w", encoding="utf-8") as f: f.write("No page source captured on error.")
+        return TASK_ERROR
 
 
-def scrape_competition_scores_and_fixtures(driver, fixtures_url: str, 
+def scrape_competition_scores_and_fixtures(fetcher, fixtures_url: str, 
                                         comp_display_name: str, 
                                         comp_id_for_table_pattern: str, 
                                         comp_name_in_url: str, 
                                         season_year_part: str, 
-                                        output_dir: str):
+                                        output_dir: str,
+                                        post_load_delay: Optional[tuple] = POST_LOAD_DELAY_RANGE,
+                                        save_pages_dir: Optional[str] = None):
     print(f"    Scraping Scores & Fixtures for {comp_display_name} ({season_year_part}) from: {fixtures_url}")
     page_source = ""
     try:
-        driver.get(fixtures_url)
-        WebDriverWait(driver, 20).until(EC.presence_of_element_located((By.CSS_SELECTOR, "table[id^='sched'], table[id^='results'], table[id='schedule']")))
-        time.sleep(random.uniform(4,7)); page_source = driver.page_source; soup = BeautifulSoup(page_source, 'lxml')
+        page_source = fetcher.fetch(fixtures_url, **FIXTURES_FETCH_OPTIONS, post_load_delay=post_load_delay)
+        if save_pages_dir: save_page_for_stand_in(save_pages_dir, fixtures_url, page_source)
+        with phase("extract"): page_tables = table_extractor.extract_page_tables(page_source)
         df_schedule = None; table_found_details = ""; table_id_to_try = None
         
         season_formats = [season_year_part, season_year_part.replace('-', '_')]
@@ -229,84 +306,181 @@ def scrape_competition_scores_and_fixtures(driver, fixtures_url: str,
             specific_sched_ids_to_try.append(f"sched_{season_fmt}_{comp_id_for_table_pattern}_1")
 
         for table_id in specific_sched_ids_to_try:
-            df_schedule, _ = find_table_directly_or_in_comment(soup, direct_table_id_exact=table_id, comment_marker_string=f'id="{table_id}"', context_url=fixtures_url)
+            df_schedule = find_table_in_page_tables(page_tables, table_id, context_url=fixtures_url)
             if df_schedule is not None: table_found_details = f"found using id='{table_id}'"; break
         
         if df_schedule is None:
             table_id_to_try = "sched_all"
-            df_schedule, _ = find_table_directly_or_in_comment(soup, direct_table_id_exact=table_id_to_try, comment_marker_string=f'id="{table_id_to_try}"', context_url=fixtures_url)
+            df_schedule = find_table_in_page_tables(page_tables, table_id_to_try, context_url=fixtures_url)
             if df_schedule is not None: table_found_details = f"found using id='{table_id_to_try}'"
 
         if df_schedule is None:
             table_id_to_try = "schedule"
-            df_schedule, _ = find_table_directly_or_in_comment(soup, direct_table_id_exact=table_id_to_try, comment_marker_string=f'id="{table_id_to_try}"', context_url=fixtures_url)
+            df_schedule = find_table_in_page_tables(page_tables, table_id_to_try, context_url=fixtures_url)
             if df_schedule is not None: table_found_details = f"found using id='{table_id_to_try}'"
         
         if df_schedule is None:
             results_table_id = f"results{season_year_part}{comp_id_for_table_pattern}1_overall"
-            df_schedule, _ = find_table_directly_or_in_comment(soup, direct_table_id_exact=results_table_id, comment_marker_string=f'id="{results_table_id}"', context_url=fixtures_url)
+            df_schedule = find_table_in_page_tables(page_tables, results_table_id, context_url=fixtures_url)
             if df_schedule is not None: table_found_details = f"found using id='{results_table_id}' (results table)"
         
         if df_schedule is None: 
             print(f"    -- Specific IDs failed for {comp_display_name}. Trying generic table search on schedule page.")
-            df_schedule, _ = find_table_directly_or_in_comment(soup, context_url=fixtures_url) 
+            with phase("extract"): df_schedule, _ = find_table_directly_or_in_comment(bs4.BeautifulSoup(page_source, 'lxml'), context_url=fixtures_url)
             if df_schedule is not None: table_found_details = "found via generic fallback"
 
         if df_schedule is not None and not df_schedule.empty:
             print(f"        -> Table for {comp_display_name} {table_found_details}.")
-            df_cleaned = clean_dataframe_columns(df_schedule.copy())
-            if 'Wk' in df_cleaned.columns: df_cleaned = df_cleaned[df_cleaned['Wk'].astype(str).str.lower() != 'wk']
+            with phase("clean"): df_cleaned = clean_fixtures_table(df_schedule)
             if df_cleaned.empty:
-                print(f"        -- Schedule table found for {comp_display_name} but was empty after cleaning."); return
-            filename = os.path.join(output_dir, f"{comp_name_in_url.replace(' ', '_')}_{season_year_part}_scores_fixtures.csv")
-            df_cleaned.to_csv(filename, index=False)
+                print(f"        -- Schedule table found for {comp_display_name} but was empty after cleaning."); return TASK_EMPTY
+            filename = os.path.join(output_dir, fixtures_output_filename(comp_name_in_url, season_year_part))
+            save_csv(df_cleaned, filename, {"data_type": "fixtures", "competition": comp_name_in_url, "season": season_year_part,
+                                            "category": "scores_fixtures", "source_url": fixtures_url})
+            count("rows_extracted", len(df_cleaned))
             print(f"        ✅ Saved Scores & Fixtures for {comp_display_name} {season_year_part} to {filename} ({len(df_cleaned)} rows)")
+            return TASK_SAVED
         else:
             print(f"        !! Failed to extract Scores & Fixtures table for {comp_display_name} from {fixtures_url}")
             if page_source : 
                 debug_html_sfail = os.path.join(output_dir, f"debug_{comp_name_in_url.replace(' ','_')}_{season_year_part}_SF_NO_TABLE.html")
                 with open(debug_html_sfail, "w", encoding="utf-8") as f: f.write(page_source)
-    except TimeoutException:
+            return TASK_NO_TABLE
+    except selenium_exceptions.TimeoutException:
         print(f"        !! TimeoutException waiting for schedule table for {comp_display_name} ({fixtures_url})")
         if page_source:
             debug_html_stout = os.path.join(output_dir, f"debug_{comp_name_in_url.replace(' ','_')}_{season_year_part}_SF_TIMEOUT.html")
             with open(debug_html_stout, "w", encoding="utf-8") as f: f.write(page_source)
+        return TASK_TIMEOUT
     except Exception as e:
         print(f"        !! Error scraping Scores & Fixtures for {comp_display_name} ({fixtures_url}): {type(e).__name__} {e}")
         if page_source : 
             debug_html_sferr = os.path.join(output_dir, f"debug_{comp_name_in_url.replace(' ','_')}_{season_year_part}_SF_ERROR.html")
             with open(debug_html_sferr, "w", encoding="utf-8") as f: f.write(page_source)
+        return TASK_ERROR
 
-def main():
-    parser = argparse.ArgumentParser(description="Scrape football statistics from FBRef.")
-    parser.add_argument("--targets", nargs='+', required=True, help=f"List of scraping targets. Available: {' , '.join(ALL_SCRAPING_TARGETS.keys())} or 'ALL'.")
-    parser.add_argument("--seasons", type=int, required=True, help="Number of past seasons to scrape.")
-    parser.add_argument("--latest_year", type=int, default=None, help="End year of the most recent season (e.g., 2024 for 2023-2024). Defaults based on current date.")
-    args = parser.parse_args()
+HARVEST_TABLE_ID_PATTERN = re.compile(r'<table[^>]+id="(stats_[0-9A-Za-z_]+)"')
+HARVEST_TABLE_PATTERNS = [
+    (re.compile(r'^stats_(?:teams|squads)_(?P<category>.+)_(?P<side>for|against)$'), "squad"),
+    (re.compile(r'^stats_(?P<category>.+)$'), "player"),
+]
 
-    tasks_to_run = []
-    if "ALL" in [t.upper() for t in args.targets]: tasks_to_run = list(ALL_SCRAPING_TARGETS.keys())
-    else:
-        for target_key in args.targets:
-            if target_key in ALL_SCRAPING_TARGETS: tasks_to_run.append(target_key)
-            else: print(f"Warning: Unknown target '{target_key}'. Skipping. Available: {', '.join(ALL_SCRAPING_TARGETS.keys())}")
-    if not tasks_to_run: print("No valid targets. Exiting."); return
+def recognise_harvest_table(table_id: str) -> Optional[tuple]:
+    """(data_type, category) for FBRef stat table ids we know how to save, e.g.
+    stats_teams_shooting_against -> ("squad_against", "shooting"); None for anything else."""
+    for pattern, data_type in HARVEST_TABLE_PATTERNS:
+        match = pattern.match(table_id)
+        if not match or match.group('category') not in STAT_CATEGORIES_URL_MAP: continue
+        if data_type == "squad" and match.group('side') == "against": return "squad_against", match.group('category')
+        return data_type, match.group('category')
+    return None
 
-    if args.latest_year: LATEST_COMPLETED_SEASON_END_YEAR = args.latest_year
-    else:
-        current_month = datetime.datetime.now().month; current_year = datetime.datetime.now().year
-        LATEST_COMPLETED_SEASON_END_YEAR = current_year - 1 if current_month <= 7 else current_year
-        print(f"Defaulting latest_year to: {LATEST_COMPLETED_SEASON_END_YEAR}")
-    NUM_SEASONS_TO_SCRAPE = args.seasons
+def harvest_output_dir(comp_config: Dict, data_type: str, season_year_part: str, base_output_directory: str, fallback_dir: str) -> str:
+    wanted_type = "aggregate_player" if data_type == "player" else "aggregate_squad"
+    for target_key, target in ALL_SCRAPING_TARGETS.items():
+        if target['config'] is comp_config and target['type'] == wanted_type:
+            return os.path.join(base_output_directory, target_key.replace(" ", "_"), season_year_part)
+    return fallback_dir
 
+def task_primary_output_path(task: Dict) -> str:
+    comp_config = task['comp_config']
+    if task['data_type'] == "fixtures": return os.path.join(task['output_dir'], fixtures_output_filename(comp_config['name_in_url'], task['season']))
+    return os.path.join(task['output_dir'], stat_output_filename(comp_config['name_in_url'], task['season'], task['category'], task['data_type']))
+
+def page_harvest_outputs(task: Dict, page_source: str, base_output_directory: str) -> set:
+    """Output paths harvest mode will save from the page of `task`, from the ids of its stat tables
+    (commented ones included), read off the raw source without parsing the page."""
+    comp_config = task['comp_config']; season_year_part = task['season']; outputs = set()
+    for table_id in HARVEST_TABLE_ID_PATTERN.findall(page_source):
+        recognised = recognise_harvest_table(table_id)
+        if recognised is None: continue
+        data_type, category_key = recognised
+        output_dir = harvest_output_dir(comp_config, data_type, season_year_part, base_output_directory, task['output_dir'])
+        outputs.add(os.path.join(output_dir, stat_output_filename(comp_config['name_in_url'], season_year_part, category_key, data_type)))
+    return outputs
+
+def harvest_aggregate_stats_page(fetcher, task: Dict, base_output_directory: str, harvested_outputs: set, manifest_path: str,
+                                 post_load_delay: Optional[tuple] = None, save_pages_dir: Optional[str] = None):
+    """Harvest mode: saves every recognised stat table on the task's page (player tables, squad
+    'for' and 'against' tables), not just the one the task asked for. Tasks whose own output was
+    already harvested from another page in this run are skipped without a page load."""
+    comp_config = task['comp_config']; data_url = task['url']; season_year_part = task['season']
+    primary_output_path = task_primary_output_path(task)
+    if primary_output_path in harvested_outputs:
+        print(f"    -- {task['data_type']} '{task['category']}' already harvested from another page; skipping {data_url}"); return TASK_SKIPPED
+    print(f"    Harvesting {comp_config['display_name']} tables from: {data_url}")
+    table_id_to_find = stat_table_id(comp_config, task['category'], task['data_type'])
+    page_source = ""
+    try:
+        page_source = fetcher.fetch(data_url, **stat_page_fetch_options(table_id_to_find), post_load_delay=post_load_delay)
+        if save_pages_dir: save_page_for_stand_in(save_pages_dir, data_url, page_source)
+        with phase("extract"): page_tables = table_extractor.extract_page_tables(page_source)
+        for table_id, df_table in page_tables.items():
+            recognised = recognise_harvest_table(table_id)
+            if recognised is None or df_table.empty: continue
+            data_type, category_key = recognised
+            with phase("clean"): df_cleaned = clean_stat_table(df_table, "player" if data_type == "player" else "squad", category_key)
+            if df_cleaned.empty: continue
+            output_dir = harvest_output_dir(comp_config, data_type, season_year_part, base_output_directory, task['output_dir']); create_output_dir(output_dir)
+            filename = os.path.join(output_dir, stat_output_filename(comp_config['name_in_url'], season_year_part, category_key, data_type))
+            save_csv(df_cleaned, filename, {"data_type": data_type, "competition": comp_config['display_name'], "season": season_year_part,
+                                            "category": category_key, "source_url": data_url})
+            count("rows_extracted", len(df_cleaned)); count("tables_saved")
+            harvested_outputs.add(filename)
+            append_manifest_record(manifest_path, {"url": data_url, "table_id": table_id, "found_in": df_table.attrs.get('source'),
+                                                   "output_path": filename, "rows": len(df_cleaned), "competition": comp_config['display_name'],
+                                                   "season": season_year_part, "category": category_key, "data_type": data_type,
+                                                   "saved_at": datetime.datetime.now().isoformat(timespec='seconds')})
+            print(f"        ✅ Harvested '{table_id}' to {filename} ({len(df_cleaned)} rows)")
+        if primary_output_path not in harvested_outputs:
+            print(f"        !! Failed to extract {task['data_type']} '{task['category']}' table from {data_url}")
+            debug_fname_no_table = os.path.join(task['output_dir'], f"debug_{comp_config['name_in_url']}_{season_year_part}_{task['category']}_{task['data_type']}_NO_TABLE.html")
+            with open(debug_fname_no_table, "w", encoding="utf-8") as f: f.write(page_source or "No page source captured.")
+            return TASK_NO_TABLE
+        return TASK_SAVED
+    except selenium_exceptions.TimeoutException:
+        print(f"        !! TimeoutException waiting for table '{table_id_to_find}' at {data_url}")
+        return TASK_TIMEOUT
+    except Exception as e:
+        print(f"        !! Error harvesting tables at {data_url}: {type(e).__name__} {e}")
+        debug_fname_err = os.path.join(task['output_dir'], f"debug_{comp_config['name_in_url']}_{season_year_part}_{task['category']}_{task['data_type']}_ERROR.html")
+        with open(debug_fname_err, "w", encoding="utf-8") as f: f.write(page_source or "No page source captured on error.")
+        return TASK_ERROR
+
+def resolve_chromedriver_path(cache_path: str = DRIVER_PATH_CACHE_FILE, refresh: bool = False) -> str:
+    """Path of the chromedriver executable: $CHROMEDRIVER when set, else the path an earlier run resolved
+    (while that file still exists), else ChromeDriverManager().install(), which needs the network and is
+    then cached in `cache_path`. Resolved once per process, whatever the number of workers."""
+    global _resolved_driver_path
+    with _driver_path_lock:
+        if os.environ.get("CHROMEDRIVER"): return os.environ["CHROMEDRIVER"]
+        if _resolved_driver_path and not refresh: return _resolved_driver_path
+        if not refresh and os.path.isfile(cache_path):
+            with open(cache_path, encoding="utf-8") as f: cached_path = json.load(f).get("driver_path")
+            if cached_path and os.path.isfile(cached_path):
+                _resolved_driver_path = cached_path; return cached_path
+        from webdriver_manager.chrome import ChromeDriverManager
+        with phase("driver_install"): _resolved_driver_path = ChromeDriverManager().install()
+        create_output_dir(os.path.dirname(cache_path) or ".")
+        with open(cache_path, "w", encoding="utf-8") as f: json.dump({"driver_path": _resolved_driver_path, "resolved_at": time.time()}, f)
+        return _resolved_driver_path
+
+def create_chrome_driver():
+    from selenium import webdriver
+    from selenium.webdriver.chrome.service import Service as ChromeService
     options = webdriver.ChromeOptions()
     options.add_argument('--headless'); options.add_argument('--log-level=3')
     options.add_argument('--disable-gpu'); options.add_argument('--no-sandbox'); options.add_argument('--disable-dev-shm-usage')
     options.add_argument("user-agent=Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/90.0.4430.212 Safari/537.36")
-    service = ChromeService(ChromeDriverManager().install())
-    driver = webdriver.Chrome(service=service, options=options)
+    service = ChromeService(resolve_chromedriver_path())
+    return webdriver.Chrome(service=service, options=options)
+
+def accept_cookie_consent(driver, base_url: str = FBREF_BASE_URL):
+    from selenium.webdriver.support.ui import WebDriverWait
+    from selenium.webdriver.support import expected_conditions as EC
+    from selenium.webdriver.common.by import By
     try: 
-        driver.get("https://fbref.com/en/"); wait = WebDriverWait(driver, 15)
+        driver.get(f"{base_url}/en/"); wait = WebDriverWait(driver, 15)
         possible_texts = ["Accept all cookies", "Accept All", "I Accept"]; xpath_selectors = [f"//button[contains(translate(text(), 'ABCDEFGHIJKLMNOPQRSTUVWXYZ', 'abcdefghijklmnopqrstuvwxyz'), '{text.lower()}')]" for text in possible_texts]; xpath_selectors.append("//button[contains(@class, 'osano-cm-accept-all')]")
         accept_button = None
         for sel in xpath_selectors:
@@ -321,37 +495,235 @@ def main():
         else: print("-> Cookie consent button not found.")
     except Exception as e: print(f"-> Cookie consent not processed: {e}")
 
-    base_output_directory = "output_data"; create_output_dir(base_output_directory)
-
-    for i in range(NUM_SEASONS_TO_SCRAPE):
-        season_end_year = LATEST_COMPLETED_SEASON_END_YEAR - i
+def build_scrape_tasks(tasks_to_run: list, latest_season_end_year: int, num_seasons: int,
+                       base_output_directory: str, base_url: str = FBREF_BASE_URL) -> list:
+    """Expands targets x seasons x stat categories into one task dict per page to fetch."""
+    scrape_tasks = []
+    for i in range(num_seasons):
+        season_end_year = latest_season_end_year - i
         season_start_year = season_end_year - 1; url_season_part = f"{season_start_year}-{season_end_year}"
-        print(f"\n{'='*40}\nProcessing Season: {url_season_part}\n{'='*40}")
 
         for task_key in tasks_to_run:
             task_details = ALL_SCRAPING_TARGETS[task_key]; comp_config = task_details['config']
-            task_type = task_details['type']; task_label = task_details['label']
+            task_type = task_details['type']
             task_folder_name = task_key.replace(" ", "_") 
-            task_season_output_dir = os.path.join(base_output_directory, task_folder_name, url_season_part); create_output_dir(task_season_output_dir)
-            print(f"\n  Scraping: {task_label} for {url_season_part}")
+            task_season_output_dir = os.path.join(base_output_directory, task_folder_name, url_season_part)
+            base_task = {"target_key": task_key, "task_type": task_type, "comp_config": comp_config,
+                         "season": url_season_part, "output_dir": task_season_output_dir}
 
-            if task_type == "aggregate_player":
-                for cat_key_internal, url_seg in STAT_CATEGORIES_URL_MAP.items():
-                    data_url = f"https://fbref.com/en/comps/{comp_config['id_in_url']}/{url_season_part}/{url_seg}/players/{url_season_part}-{comp_config['name_in_url']}-Stats"
-                    scrape_competition_aggregate_stats_table(driver, data_url, comp_config, cat_key_internal, "player", url_season_part, task_season_output_dir)
-                    time.sleep(random.uniform(5, 8))
-            elif task_type == "aggregate_squad":
+            if task_type in ("aggregate_player", "aggregate_squad"):
+                data_type = "player" if task_type == "aggregate_player" else "squad"
+                url_kind = "players" if data_type == "player" else "squads"
                 for cat_key_internal, url_seg in STAT_CATEGORIES_URL_MAP.items():
-                    data_url = f"https://fbref.com/en/comps/{comp_config['id_in_url']}/{url_season_part}/{url_seg}/squads/{url_season_part}-{comp_config['name_in_url']}-Stats"
-                    scrape_competition_aggregate_stats_table(driver, data_url, comp_config, cat_key_internal, "squad", url_season_part, task_season_output_dir)
-                    time.sleep(random.uniform(5, 8))
+                    data_url = f"{base_url}/en/comps/{comp_config['id_in_url']}/{url_season_part}/{url_seg}/{url_kind}/{url_season_part}-{comp_config['name_in_url']}-Stats"
+                    scrape_tasks.append({**base_task, "category": cat_key_internal, "data_type": data_type, "url": data_url})
             elif task_type == "fixtures":
                 comp_id_for_url = comp_config.get('id', comp_config.get('id_in_url'))
-                fixtures_url = f"https://fbref.com/en/comps/{comp_id_for_url}/{url_season_part}/schedule/{url_season_part}-{comp_config['name_in_url']}-Scores-and-Fixtures"
-                scrape_competition_scores_and_fixtures(driver, fixtures_url, comp_config['display_name'], comp_id_for_url, comp_config['name_in_url'], url_season_part, task_season_output_dir)
-                time.sleep(random.uniform(5,8))
-            
-    print("\nScript finished."); driver.quit()
+                fixtures_url = f"{base_url}/en/comps/{comp_id_for_url}/{url_season_part}/schedule/{url_season_part}-{comp_config['name_in_url']}-Scores-and-Fixtures"
+                scrape_tasks.append({**base_task, "category": "scores_fixtures", "data_type": "fixtures", "url": fixtures_url})
+    return scrape_tasks
+
+def export_task_plan(scrape_tasks: list, plan_path: Optional[str] = None) -> int:
+    """Prints every planned task (whether its output file exists, target, season, category, URL) and,
+    with `plan_path`, writes the same with output paths as CSV (JSON lines for a .jsonl path). Nothing
+    is fetched or opened. Returns the number of outputs that already exist."""
+    plan = [{"target": task['target_key'], "season": task['season'], "category": task['category'], "data_type": task['data_type'],
+             "url": task['url'], "output_path": task_primary_output_path(task), "exists": os.path.isfile(task_primary_output_path(task))}
+            for task in scrape_tasks]
+    for row in plan:
+        print(f"  [{'x' if row['exists'] else ' '}] {row['target']:<24} {row['season']}  {row['category']:<16} {row['url']}")
+    if plan_path:
+        create_output_dir(os.path.dirname(plan_path) or ".")
+        with open(plan_path, "w", encoding="utf-8", newline="") as f:
+            if plan_path.endswith(".jsonl"):
+                for row in plan: f.write(json.dumps(row) + "\n")
+            else:
+                writer = csv.DictWriter(f, fieldnames=list(plan[0]) if plan else ["target"]); writer.writeheader(); writer.writerows(plan)
+        print(f"Exported the plan to {plan_path}")
+    return sum(row['exists'] for row in plan)
+
+def run_scrape_task(fetcher, task: Dict, post_load_delay: Optional[tuple] = None, save_pages_dir: Optional[str] = None):
+    comp_config = task['comp_config']
+    create_output_dir(task['output_dir'])
+    if task['data_type'] == "fixtures":
+        comp_id_for_url = comp_config.get('id', comp_config.get('id_in_url'))
+        return scrape_competition_scores_and_fixtures(fetcher, task['url'], comp_config['display_name'], comp_id_for_url, comp_config['name_in_url'], task['season'], task['output_dir'],
+                                               post_load_delay=post_load_delay, save_pages_dir=save_pages_dir)
+    else:
+        return scrape_competition_aggregate_stats_table(fetcher, task['url'], comp_config, task['category'], task['data_type'], task['season'], task['output_dir'],
+                                                 post_load_delay=post_load_delay, save_pages_dir=save_pages_dir)
+
+def main():
+    parser = argparse.ArgumentParser(description="Scrape football statistics from FBRef.")
+    parser.add_argument("--targets", nargs='+', required=True, help=f"List of scraping targets. Available: {' , '.join(ALL_SCRAPING_TARGETS.keys())} or 'ALL'.")
+    parser.add_argument("--seasons", type=int, required=True, help="Number of past seasons to scrape.")
+    parser.add_argument("--latest_year", type=int, default=None, help="End year of the most recent season (e.g., 2024 for 2023-2024). Defaults based on current date.")
+    parser.add_argument("--workers", type=int, default=1, help="Number of workers fetching pages in parallel, each with its own HTTP session / WebDriver (default: 1).")
+    parser.add_argument("--max-rps", dest="max_rps", type=float, default=0.15, help="Shared request budget per host, in pages per second across all workers (default: 0.15, about one page every 6.5 s).")
+    parser.add_argument("--base_url", type=str, default=FBREF_BASE_URL, help=f"Site to scrape (default: {FBREF_BASE_URL}). Point at fbref_stand_in_server.py to replay saved pages locally.")
+    parser.add_argument("--fetcher", choices=FETCHER_BACKENDS, default="auto", help="Page fetch backend: 'http' (pooled keep-alive requests), 'selenium' (headless Chrome) or 'auto' (HTTP, falling back to Chrome when the table is missing; default).")
+    parser.add_argument("--cache_dir", type=str, default=DEFAULT_CACHE_DIR, help=f"Directory of the raw-HTML page cache (default: {DEFAULT_CACHE_DIR}).")
+    parser.add_argument("--no_cache", action="store_true", help="Fetch every page again and do not store pages in the cache.")
+    parser.add_argument("--current_season_ttl_hours", type=float, default=DEFAULT_CURRENT_SEASON_TTL_HOURS, help=f"Hours before a cached page of an unfinished season is refetched (default: {DEFAULT_CURRENT_SEASON_TTL_HOURS:g}). Finished seasons never expire.")
+    parser.add_argument("--replay", action="store_true", help="Re-run parsing, cleaning and saving from cached pages only, without starting a browser.")
+    parser.add_argument("--harvest", action="store_true", help="Save every recognised stat table on each fetched page (e.g. squad 'for' and 'against'), skip pages whose table was already harvested, and log sources to output_data/harvest_manifest.jsonl.")
+    parser.add_argument("--resume", action="store_true", help="Skip tasks the journal (output_data/scrape_journal.sqlite) already records as done; failed tasks stay skipped unless --retry-failed.")
+    parser.add_argument("--retry-failed", dest="retry_failed", action="store_true", help="With --resume, also rerun tasks that used up their attempts in earlier runs.")
+    parser.add_argument("--max_attempts", type=int, default=DEFAULT_MAX_ATTEMPTS, help=f"Attempts per task before it is marked failed (default: {DEFAULT_MAX_ATTEMPTS}).")
+    parser.add_argument("--backoff_seconds", type=float, default=DEFAULT_BACKOFF_SECONDS, help=f"Base retry delay, doubled after every failed attempt (default: {DEFAULT_BACKOFF_SECONDS:g}).")
+    parser.add_argument("--metrics_file", type=str, default=os.path.join("output_data", DEFAULT_METRICS_FILENAME), help="JSON-lines file that gets one record per task attempt (phase timings, bytes, rows, retries, outcome) and a run summary; pass '' to disable.")
+    parser.add_argument("--header_registry", type=str, default=os.path.join("output_data", HEADER_REGISTRY_FILENAME), help="SQLite file remembering cleaned column names per header layout and the names pinned per stat category; pass '' to keep them in memory only.")
+    parser.add_argument("--delta_store", type=str, default=os.path.join("output_data", DELTA_STORE_FILENAME), help="SQLite file keeping every re-scraped current-season table as versioned row deltas (inserted, updated, removed rows by natural key); unchanged tables are not rewritten. Pass '' to disable.")
+    parser.add_argument("--pipeline", choices=PIPELINE_MODES, default="threads", help="'threads': each worker fetches, parses and saves a page before the next (default). 'async': a staged asyncio pipeline where fetching, parsing (in executor threads) and CSV writing overlap, with bounded queues between them.")
+    parser.add_argument("--parse_workers", type=int, default=DEFAULT_PARSE_WORKERS, help=f"Executor threads parsing and cleaning pages with --pipeline async (default: {DEFAULT_PARSE_WORKERS}).")
+    parser.add_argument("--queue_size", type=int, default=DEFAULT_QUEUE_SIZE, help=f"Pages (and parsed tables) allowed to wait between two stages with --pipeline async before the stage in front pauses (default: {DEFAULT_QUEUE_SIZE}).")
+    parser.add_argument("--plan", nargs='?', const="", default=None, metavar="FILE", help="Print the planned tasks (URL, output path, whether the output already exists) and exit without fetching or opening any state; with FILE, also export them as CSV (JSON lines for *.jsonl).")
+    parser.add_argument("--save_pages", type=str, default=None, help="Directory to save every fetched page into, for use with fbref_stand_in_server.py.")
+    args = parser.parse_args()
+
+    tasks_to_run = []
+    if "ALL" in [t.upper() for t in args.targets]: tasks_to_run = list(ALL_SCRAPING_TARGETS.keys())
+    else:
+        for target_key in args.targets:
+            if target_key in ALL_SCRAPING_TARGETS: tasks_to_run.append(target_key)
+            else: print(f"Warning: Unknown target '{target_key}'. Skipping. Available: {', '.join(ALL_SCRAPING_TARGETS.keys())}")
+    if not tasks_to_run: print("No valid targets. Exiting."); return
+    if args.workers < 1 or args.max_rps <= 0: print("--workers must be at least 1 and --max-rps must be positive. Exiting."); return
+
+    if args.latest_year: LATEST_COMPLETED_SEASON_END_YEAR = args.latest_year
+    else:
+        current_month = datetime.datetime.now().month; current_year = datetime.datetime.now().year
+        LATEST_COMPLETED_SEASON_END_YEAR = current_year - 1 if current_month <= 7 else current_year
+        print(f"Defaulting latest_year to: {LATEST_COMPLETED_SEASON_END_YEAR}")
+    NUM_SEASONS_TO_SCRAPE = args.seasons
+    base_url = args.base_url.rstrip('/')
+
+    base_output_directory = "output_data"
+    scrape_tasks = build_scrape_tasks(tasks_to_run, LATEST_COMPLETED_SEASON_END_YEAR, NUM_SEASONS_TO_SCRAPE, base_output_directory, base_url)
+    if args.plan is not None:
+        existing = export_task_plan(scrape_tasks, args.plan or None)
+        print(f"Planned {len(scrape_tasks)} pages across {NUM_SEASONS_TO_SCRAPE} season(s); {existing} output(s) already exist.")
+        return
+    print(f"Planned {len(scrape_tasks)} pages across {NUM_SEASONS_TO_SCRAPE} season(s); {args.workers} worker(s), max {args.max_rps} page(s)/s per host.")
+
+    create_output_dir(base_output_directory)
+    if args.header_registry: create_output_dir(os.path.dirname(args.header_registry) or "."); use_header_registry(args.header_registry)
+    dataset_manifest = use_dataset_manifest(os.path.join(base_output_directory, DATASET_MANIFEST_FILENAME))
+    if args.delta_store: create_output_dir(os.path.dirname(args.delta_store) or ".")
+    delta_store = use_delta_store(args.delta_store or None)
+
+    page_cache = None if args.no_cache else PageCache(args.cache_dir, args.current_season_ttl_hours)
+    if args.replay:
+        if page_cache is None: print("--replay needs the page cache; drop --no_cache. Exiting."); return
+        cached_tasks = [t for t in scrape_tasks if page_cache.get(t['url'], allow_stale=True) is not None]
+        print(f"Replay mode: {len(cached_tasks)} of {len(scrape_tasks)} planned pages are cached; no browser will be started.")
+        scrape_tasks = cached_tasks
+    rate_limiter = HostRateLimiter(args.max_rps)
+    harvested_outputs = set(); manifest_path = os.path.join(base_output_directory, HARVEST_MANIFEST_FILENAME)
+    # Async pipeline, harvest mode: outputs whose table is on an already fetched page, and tasks left without a page for that.
+    claimed_outputs = set(); tasks_without_page = set()
+
+    def start_worker_driver():
+        driver = create_chrome_driver()
+        accept_cookie_consent(driver, base_url)
+        return driver
+
+    def start_worker_fetcher():
+        if args.replay: return ReplayFetcher(page_cache)
+        if args.fetcher == "http": fetcher = HttpFetcher(rate_limiter)
+        elif args.fetcher == "selenium": fetcher = SeleniumFetcher(start_worker_driver, rate_limiter)
+        else: fetcher = AutoFetcher(HttpFetcher(rate_limiter), SeleniumFetcher(start_worker_driver, rate_limiter))
+        return fetcher if page_cache is None else CachedFetcher(fetcher, page_cache)
+
+    journal = None
+    if not args.replay:
+        journal = ScrapeJournal(os.path.join(base_output_directory, DEFAULT_JOURNAL_FILENAME), args.max_attempts, args.backoff_seconds)
+        planned_count = len(scrape_tasks)
+        scrape_tasks = journal.plan(scrape_tasks, resume=args.resume, retry_failed=args.retry_failed)
+        if args.resume: print(f"Resuming: {planned_count - len(scrape_tasks)} of {planned_count} tasks already done (or failed) in the journal; {len(scrape_tasks)} to run.")
+
+    metrics = ScrapeMetrics(args.metrics_file) if args.metrics_file else None
+
+    def scrape_task(fetcher, task):
+        if args.harvest and task['data_type'] != "fixtures":
+            if task['url'] in tasks_without_page:
+                print(f"    -- {task['data_type']} '{task['category']}' comes with another fetched page; skipping {task['url']}"); return TASK_SKIPPED
+            create_output_dir(task['output_dir'])
+            return harvest_aggregate_stats_page(fetcher, task, base_output_directory, harvested_outputs, manifest_path, save_pages_dir=args.save_pages)
+        return run_scrape_task(fetcher, task, save_pages_dir=args.save_pages)
+
+    def announce_and_scrape(fetcher, task):
+        print(f"\n  Scraping: {ALL_SCRAPING_TARGETS[task['target_key']]['label']} for {task['season']} ({task['category']})")
+        return scrape_task(fetcher, task)
+
+    def record_outcome(task, outcome):
+        if journal is None: return
+        state = journal.record_outcome(task, outcome or TASK_ERROR, failed=(outcome or TASK_ERROR) in FAILED_TASK_OUTCOMES)
+        if state != STATE_DONE: print(f"        -> Journal: task marked '{state}' after outcome '{outcome}'.")
+
+    def run_task(fetcher, task):
+        outcome = TASK_ERROR
+        try:
+            if metrics is None: outcome = announce_and_scrape(fetcher, task)
+            else:
+                with metrics.task(task) as record:
+                    outcome = announce_and_scrape(fetcher, task)
+                    record['outcome'] = outcome or TASK_ERROR
+        finally:
+            record_outcome(task, outcome)
+        return outcome
+
+    def record_session_failure(task, error):
+        # The worker's WebDriver did not start: journal and measure the task like a failed scrape, so it is backed off and retried.
+        if metrics is not None:
+            with metrics.task(task) as record: record['outcome'] = TASK_ERROR; record['error'] = f"{type(error).__name__} {error}"
+        record_outcome(task, TASK_ERROR)
+        return TASK_ERROR
+
+    def needs_page(task):
+        # Harvest mode skips tasks whose table already came, or is coming, with another page, so do not fetch theirs.
+        if not args.harvest or task['data_type'] == "fixtures": return True
+        output_path = task_primary_output_path(task)
+        if output_path not in harvested_outputs and output_path not in claimed_outputs: return True
+        tasks_without_page.add(task['url']); return False
+
+    def claim_page_tables(task, page_source):
+        # Pages are parsed (and harvested) behind the fetch stage, so claim their tables as soon as they are fetched.
+        if args.harvest and task['data_type'] != "fixtures":
+            claimed_outputs.update(page_harvest_outputs(task, page_source, base_output_directory) - {task_primary_output_path(task)})
+
+    started_at = time.monotonic()
+    tasks_this_round = scrape_tasks; waiting_tasks = []
+    while tasks_this_round:
+        if args.pipeline == "async":
+            run_tasks_async_pipeline(tasks_this_round, announce_and_scrape, start_worker_fetcher, task_fetch_options, record_outcome, needs_page=needs_page,
+                                     page_fetched=claim_page_tables, metrics=metrics, worker_count=args.workers, parse_workers=args.parse_workers, queue_size=args.queue_size,
+                                     close_session=lambda fetcher: fetcher.close())
+        else:
+            run_tasks_with_worker_pool(tasks_this_round, run_task, start_worker_fetcher, worker_count=args.workers,
+                                       close_session=lambda fetcher: fetcher.close(), session_failed=record_session_failure)
+        if journal is None: break
+        # Only tasks whose backoff is over are rerun; the rest wait for a later round.
+        waiting_tasks = journal.tasks_to_retry(waiting_tasks + tasks_this_round); tasks_this_round = []
+        while waiting_tasks and not tasks_this_round:
+            wait_seconds = journal.seconds_until_due(waiting_tasks)
+            if wait_seconds > 0:
+                print(f"\n{len(waiting_tasks)} failed task(s) waiting to be retried; next one due in {wait_seconds:.1f} s (exponential backoff).")
+                time.sleep(wait_seconds)
+            tasks_this_round = journal.tasks_due(waiting_tasks, RETRY_BATCH_SECONDS)
+        due_keys = {journal_task_key(task) for task in tasks_this_round}
+        waiting_tasks = [task for task in waiting_tasks if journal_task_key(task) not in due_keys]
+        if tasks_this_round: print(f"\nRetrying {len(tasks_this_round)} failed task(s).")
+    if journal is not None:
+        print(f"Journal state: {journal.summary()}"); journal.close()
+    if page_cache is not None: page_cache.close()
+    active_header_registry().close()
+    dataset_manifest.close()
+    if delta_store is not None: delta_store.close()
+    if metrics is not None:
+        print(f"\n{format_summary(metrics.close())}\nPer-task metrics appended to {args.metrics_file}")
+    elapsed_minutes = (time.monotonic() - started_at) / 60
+    print(f"\nScript finished: {len(scrape_tasks)} pages in {elapsed_minutes:.1f} min.")
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
@@ -0,0 +1,382 @@
+import io
+import os
+import sys
+import glob
+import json
+import time
+import sqlite3
+import platform
+import datetime
+import contextlib
+import statistics
+import argparse
+import resource
+import subprocess
+
+PIPELINE_STAGES = ["parse", "clean", "combine_stats", "combine_fixtures", "stream_fixtures"]
+DEFAULT_RESULTS_DIR = os.path.join("output_data", "benchmarks")
+DEFAULT_REGRESSION_THRESHOLD_PCT = 10.0
+SYNTHETIC_COMPETITION_PREFIX = "Synthetic-League"
+
+
+def peak_rss_mb() -> dict:
+    # ru_maxrss is in KB on Linux. For children it is the largest single (waited-for) child, e.g. Chrome.
+    return {"peak_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+            "peak_child_rss_mb": resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss / 1024}
+
+
+def saved_page_urls(pages_dir: str, base_url: str) -> list:
+    # The stand-in server maps a request path to its page file name, and a file name used as a path maps to itself.
+    return [f"{base_url}/{name[:-len('.html')]}" for name in sorted(os.listdir(pages_dir)) if name.endswith(".html")]
+
+
+def run_fetcher_benchmark_child(backend: str, urls: list, repeats: int) -> dict:
+    from page_fetchers import HttpFetcher, SeleniumFetcher, AutoFetcher
+    from advanced_scraper_selenium import create_chrome_driver
+
+    if backend == "http": fetcher = HttpFetcher()
+    elif backend == "selenium": fetcher = SeleniumFetcher(create_chrome_driver)
+    else: fetcher = AutoFetcher(HttpFetcher(), SeleniumFetcher(create_chrome_driver))
+    pages = 0; bytes_fetched = 0
+    started_at = time.perf_counter()
+    try:
+        for _ in range(repeats):
+            for url in urls:
+                bytes_fetched += len(fetcher.fetch(url, expect_pattern=r'<table')); pages += 1
+    finally:
+        fetcher.close()
+    seconds = time.perf_counter() - started_at
+    return {"backend": backend, "pages": pages, "seconds": seconds, "pages_per_minute": pages / seconds * 60 if seconds else 0.0,
+            "mb_fetched": bytes_fetched / 1e6, **peak_rss_mb()}
+
+
+def benchmark_fetchers(pages_dir: str, backends: list, repeats: int) -> list:
+    """Runs each fetch backend in its own process against a local stand-in server, so
+    peak-memory numbers of one backend do not leak into the next."""
+    from fbref_stand_in_server import start_stand_in_server
+
+    server = start_stand_in_server(pages_dir)
+    base_url = f"http://127.0.0.1:{server.server_port}"
+    urls = saved_page_urls(pages_dir, base_url)
+    if not urls: print(f"No saved pages (*.html) in {pages_dir}."); server.shutdown(); return []
+    print(f"Benchmarking fetchers over {len(urls)} saved pages x {repeats} repeat(s) from {base_url}")
+    results = []
+    try:
+        for backend in backends:
+            child = subprocess.run([sys.executable, os.path.abspath(__file__), "fetcher-child", "--backend", backend,
+                                    "--repeats", str(repeats), "--urls", *urls], capture_output=True, text=True)
+            if child.returncode != 0:
+                print(f"  {backend:<9} failed: {child.stderr.strip().splitlines()[-1] if child.stderr.strip() else child.returncode}"); continue
+            result = json.loads(child.stdout.strip().splitlines()[-1]); results.append(result)
+            print(f"  {backend:<9} {result['pages_per_minute']:>9.1f} pages/min  peak RSS {result['peak_rss_mb']:.0f} MB"
+                  f" (largest child {result['peak_child_rss_mb']:.0f} MB)")
+    finally:
+        server.shutdown()
+    return results
+
+
+def benchmark_table_extraction(html_paths: list, repeats: int) -> dict:
+    """Times the BeautifulSoup + read_html lookup path against the single-pass lxml extractor on the
+    same pages and table ids, and checks that both produce the same cleaned frames."""
+    from bs4 import BeautifulSoup
+    from table_extractor import extract_page_tables
+    from advanced_scraper_selenium import find_table_directly_or_in_comment, clean_dataframe_columns
+
+    pages = []
+    for path in html_paths:
+        with open(path, encoding="utf-8") as f: pages.append((path, f.read()))
+    pages = [(path, html) for path, html in pages if '<table' in html]
+    if not pages: print("No HTML pages with tables to benchmark."); return {}
+
+    table_ids_by_page = {path: list(extract_page_tables(html).keys()) for path, html in pages}
+    n_tables = sum(len(ids) for ids in table_ids_by_page.values())
+
+    def soup_path():
+        frames = {}
+        with contextlib.redirect_stdout(io.StringIO()):
+            for path, html in pages:
+                soup = BeautifulSoup(html, 'lxml')
+                for table_id in table_ids_by_page[path]:
+                    frames[(path, table_id)], _ = find_table_directly_or_in_comment(soup, direct_table_id_exact=table_id, comment_marker_string=f'id="{table_id}"')
+        return frames
+
+    def lxml_path():
+        return {(path, table_id): df for path, html in pages for table_id, df in extract_page_tables(html).items()}
+
+    timings = {}
+    for name, extract in (("soup_read_html", soup_path), ("lxml_single_pass", lxml_path)):
+        started_at = time.perf_counter()
+        for _ in range(repeats): frames = extract()
+        timings[name] = (time.perf_counter() - started_at) / repeats
+        if name == "soup_read_html": reference_frames = frames
+    mismatches = [key for key, df in frames.items()
+                  if reference_frames.get(key) is None or not clean_dataframe_columns(df.copy()).astype(str).equals(clean_dataframe_columns(reference_frames[key].copy()).astype(str))]
+
+    print(f"Table extraction over {len(pages)} page(s), {n_tables} table(s), {repeats} repeat(s):")
+    for name, seconds in timings.items(): print(f"  {name:<17} {seconds * 1000:>9.1f} ms/run  {n_tables / seconds if seconds else 0:>8.1f} tables/s")
+    print(f"  speed-up {timings['soup_read_html'] / timings['lxml_single_pass']:.1f}x, {len(mismatches)} table(s) differ after cleaning")
+    for path, table_id in mismatches[:10]: print(f"    differs: {table_id} in {path}")
+    return {"pages": len(pages), "tables": n_tables, "seconds_per_run": timings, "mismatches": len(mismatches)}
+
+
+def season_labels(n_seasons: int, latest_end_year: int) -> list:
+    return [f"{year - 1}-{year}" for year in range(latest_end_year - n_seasons + 1, latest_end_year + 1)]
+
+
+def _latest_templates(rows: list, key_fn) -> dict:
+    # rows are planned in season order, so the last file per key is the one of the latest season.
+    templates = {}
+    for row in rows: templates[key_fn(row)] = row
+    return templates
+
+
+def _shift_dates(dates, years: int):
+    import pandas as pd
+    parsed = pd.to_datetime(dates, errors='coerce')
+    return (parsed + pd.DateOffset(years=years)).dt.strftime('%Y-%m-%d').where(parsed.notna(), dates)
+
+
+def generate_synthetic_data(source_dir: str, output_dir: str, n_seasons: int, n_competitions: int, latest_end_year: int = 2024) -> dict:
+    """Writes an aggregate_stats / Scores_Fixtures tree in the combiner's input layout with `n_seasons`
+    seasons of `n_competitions` competitions, copied from the latest season of each file in `source_dir`.
+
+    Fixture competitions beyond the ones in the source are copies with renamed teams. Stat competitions
+    beyond the ones in the source are appended to the first competition's tables as extra squads (rows
+    grow with the competition count, as if more leagues were covered)."""
+    import pandas as pd
+    from combine_fbref_data import load_dataset_manifest, plan_stats_files, plan_fixture_files
+
+    seasons = season_labels(n_seasons, latest_end_year)
+    counts = {"stats_files": 0, "fixture_files": 0, "rows": 0}
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        manifest = load_dataset_manifest(os.path.abspath(source_dir))
+        stats_templates = {data_type: _latest_templates(plan_stats_files(manifest, data_type), lambda f: (f[2], f[3])) for data_type in ("player", "squad")}
+        fixture_templates = _latest_templates(plan_fixture_files(manifest), lambda f: f[2])
+        manifest.close()
+    for data_type, templates in stats_templates.items():
+        stat_competitions = sorted({comp for comp, _ in templates})[:n_competitions]
+        extra_copies = max(0, n_competitions - len(stat_competitions))
+        for (comp_name, category), (f_path, template_season, _, _) in templates.items():
+            if comp_name not in stat_competitions: continue
+            template = pd.read_csv(f_path, dtype=str, keep_default_na=False)
+            if comp_name == stat_competitions[0] and extra_copies and 'Squad' in template.columns:
+                copies = []
+                for k in range(1, extra_copies + 1):
+                    copy = template.assign(Squad=template['Squad'] + f" {SYNTHETIC_COMPETITION_PREFIX}-{k}")
+                    if 'Comp' in copy.columns: copy['Comp'] = f"{SYNTHETIC_COMPETITION_PREFIX}-{k}"
+                    copies.append(copy)
+                template = pd.concat([template] + copies, ignore_index=True)
+            file_prefix = os.path.basename(f_path).split(f"_{template_season}_")[0]
+            for season in seasons:
+                season_dir = os.path.join(output_dir, "aggregate_stats", season, f"{data_type}_aggregate_stats"); os.makedirs(season_dir, exist_ok=True)
+                template.to_csv(os.path.join(season_dir, f"{file_prefix}_{season}_{category}_{data_type}_stats.csv"), index=False)
+                counts["stats_files"] += 1; counts["rows"] += len(template)
+
+    fixture_competitions = sorted(fixture_templates)
+    for k in range(n_competitions if fixture_competitions else 0):
+        f_path, template_season, comp_name = fixture_templates[fixture_competitions[k % len(fixture_competitions)]]
+        template = pd.read_csv(f_path, dtype=str, keep_default_na=False)
+        comp_dir_name = comp_name
+        if k >= len(fixture_competitions):
+            comp_dir_name = f"{SYNTHETIC_COMPETITION_PREFIX}-{k}"
+            for side in ("Home", "Away"):
+                if side in template.columns: template[side] = template[side].where(template[side] == '', template[side] + f" {k}")
+        template_end_year = int(template_season.split('-')[-1])
+        for season in seasons:
+            season_fixtures = template.copy()
+            if 'Date' in season_fixtures.columns: season_fixtures['Date'] = _shift_dates(season_fixtures['Date'], int(season.split('-')[-1]) - template_end_year)
+            season_dir = os.path.join(output_dir, "Scores_Fixtures", comp_dir_name, season); os.makedirs(season_dir, exist_ok=True)
+            season_fixtures.to_csv(os.path.join(season_dir, f"{comp_dir_name}_{season}_scores_fixtures.csv"), index=False)
+            counts["fixture_files"] += 1; counts["rows"] += len(season_fixtures)
+    print(f"Synthetic data in {output_dir}: {n_seasons} season(s) x {n_competitions} competition(s), "
+          f"{counts['stats_files']} stats file(s), {counts['fixture_files']} fixture file(s), {counts['rows']} rows.")
+    return counts
+
+
+def load_recorded_pages(html_patterns: list, page_cache_dir: str = None) -> list:
+    """(name, html) of every recorded page: files matching `html_patterns` (e.g. a --save_pages directory)
+    plus every page in a page cache directory."""
+    pages = []
+    for path in sorted({p for pattern in html_patterns or [] for p in glob.glob(pattern, recursive=True)}):
+        with open(path, encoding="utf-8") as f: pages.append((path, f.read()))
+    if page_cache_dir and os.path.isfile(os.path.join(page_cache_dir, "index.sqlite")):
+        from page_cache import PageCache
+        with sqlite3.connect(os.path.join(page_cache_dir, "index.sqlite")) as conn:
+            urls = [row[0] for row in conn.execute("SELECT url FROM pages ORDER BY url")]
+        cache = PageCache(page_cache_dir)
+        try:
+            pages += [(url, html) for url in urls for html in [cache.get(url, allow_stale=True)] if html is not None]
+        finally:
+            cache.close()
+    return [(name, html) for name, html in pages if '<table' in html]
+
+
+def clean_kind(table_id: str):
+    """Which cleaner the scraper applies to a table id: 'fixtures', 'squad', 'player' or None."""
+    if table_id.startswith(("sched", "results", "schedule")): return "fixtures"
+    if table_id.startswith(("stats_squads_", "stats_teams_")): return "squad"
+    if table_id.startswith("stats_"): return "player"
+    return None
+
+
+def _timed(run, repeats: int) -> tuple:
+    seconds = []
+    for _ in range(max(1, repeats)):
+        started_at = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()): result = run()
+        seconds.append(time.perf_counter() - started_at)
+    return result, seconds
+
+
+def run_pipeline_stage(stage: str, data_dir: str, html_patterns: list, page_cache_dir: str, repeats: int, jobs: int) -> dict:
+    """Times one stage in this process: `repeats` runs, reporting the fastest and median wall time,
+    throughput of the fastest run and the process's peak RSS."""
+    if stage in ("parse", "clean"):
+        from table_extractor import extract_page_tables
+        from advanced_scraper_selenium import clean_stat_table, clean_fixtures_table
+
+        pages = load_recorded_pages(html_patterns, page_cache_dir)
+        if not pages: return {"stage": stage, "skipped": "no recorded pages with tables"}
+        if stage == "parse":
+            tables, seconds = _timed(lambda: [extract_page_tables(html) for _, html in pages], repeats)
+            units = {"pages": len(pages), "tables": sum(len(t) for t in tables), "mb": sum(len(html.encode("utf-8")) for _, html in pages) / 1e6}
+        else:
+            extracted = [(kind, df) for _, html in pages for table_id, df in extract_page_tables(html).items() for kind in [clean_kind(table_id)] if kind]
+            cleaned, seconds = _timed(lambda: [clean_fixtures_table(df) if kind == "fixtures" else clean_stat_table(df, kind) for kind, df in extracted], repeats)
+            units = {"tables": len(extracted), "rows": sum(len(df) for df in cleaned)}
+    else:
+        from combine_fbref_data import load_dataset_manifest, plan_stats_files, plan_fixture_files, combine_stats_data, combine_match_fixtures, stream_match_fixtures
+
+        with contextlib.redirect_stdout(io.StringIO()):
+            manifest = load_dataset_manifest(os.path.abspath(data_dir))
+            stats_files = {t: plan_stats_files(manifest, t) for t in ("player", "squad")}
+            fixture_files = plan_fixture_files(manifest)
+            manifest.close()
+        if stage == "combine_stats":
+            n_files = sum(len(files) for files in stats_files.values())
+            if not n_files: return {"stage": stage, "skipped": f"no stats files in the dataset manifest of {data_dir}"}
+            masters, seconds = _timed(lambda: [combine_stats_data(stats_files[t], t, jobs=jobs) for t in ("player", "squad")], repeats)
+            units = {"files": n_files, "rows": sum(len(m) for m in masters if m is not None)}
+        else:
+            n_files = len(fixture_files)
+            if not n_files: return {"stage": stage, "skipped": f"no fixture files in the dataset manifest of {data_dir}"}
+            if stage == "combine_fixtures":
+                master, seconds = _timed(lambda: combine_match_fixtures(fixture_files), repeats)
+                units = {"files": n_files, "rows": len(master)}
+            else:
+                master_path = os.path.join(os.path.abspath(data_dir), ".benchmark_fixtures.csv")
+                try:
+                    n_rows, seconds = _timed(lambda: stream_match_fixtures(fixture_files, master_path), repeats)
+                finally:
+                    if os.path.exists(master_path): os.remove(master_path)
+                units = {"files": n_files, "rows": n_rows}
+    best = min(seconds)
+    return {"stage": stage, "repeats": len(seconds), "seconds": best, "median_seconds": statistics.median(seconds), **units,
+            "per_second": {unit: amount / best if best else 0.0 for unit, amount in units.items()}, **peak_rss_mb()}
+
+
+def benchmark_pipeline(stages: list, data_dir: str, html_patterns: list, page_cache_dir: str, repeats: int, jobs: int, results_path: str = None) -> dict:
+    """Runs every stage in its own process (so peak RSS is per stage), prints a table and saves the
+    results as JSON for `compare`."""
+    results = {"created_at": datetime.datetime.now().isoformat(timespec='seconds'), "git_commit": git_commit(),
+               "host": platform.node(), "python": platform.python_version(),
+               "config": {"data_dir": os.path.abspath(data_dir), "html": html_patterns, "page_cache": page_cache_dir, "repeats": repeats, "jobs": jobs},
+               "stages": {}}
+    print(f"Benchmarking {', '.join(stages)} ({repeats} repeat(s), fastest run reported):")
+    for stage in stages:
+        child = subprocess.run([sys.executable, os.path.abspath(__file__), "stage-child", "--stage", stage, "--data_dir", data_dir,
+                                "--repeats", str(repeats), "--jobs", str(jobs), "--html", *(html_patterns or [])]
+                               + (["--page_cache", page_cache_dir] if page_cache_dir else []), capture_output=True, text=True)
+        if child.returncode != 0:
+            print(f"  {stage:<17} failed: {child.stderr.strip().splitlines()[-1] if child.stderr.strip() else child.returncode}"); continue
+        result = json.loads(child.stdout.strip().splitlines()[-1]); results["stages"][stage] = result
+        if result.get("skipped"): print(f"  {stage:<17} skipped: {result['skipped']}"); continue
+        throughput = ", ".join(f"{rate:,.1f} {unit}/s" for unit, rate in result["per_second"].items())
+        print(f"  {stage:<17} {result['seconds']:>8.3f} s (median {result['median_seconds']:.3f} s)  {throughput}  peak RSS {result['peak_rss_mb']:.0f} MB")
+    results_path = results_path or os.path.join(DEFAULT_RESULTS_DIR, f"pipeline_{datetime.datetime.now().strftime('%Y%m%dT%H%M%S')}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(results_path)), exist_ok=True)
+    with open(results_path, "w", encoding="utf-8") as f: json.dump(results, f, indent=1)
+    print(f"Saved results to {results_path}")
+    return results
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=os.path.dirname(os.path.abspath(__file__)),
+                              capture_output=True, text=True).stdout.strip() or None
+    except OSError:
+        return None
+
+
+def compare_results(baseline_path: str, current_path: str, threshold_pct: float = DEFAULT_REGRESSION_THRESHOLD_PCT) -> list:
+    """Prints the wall time and peak RSS change of every stage in both result files and returns the
+    stages that got more than `threshold_pct` slower or bigger."""
+    with open(baseline_path, encoding="utf-8") as f: baseline = json.load(f)
+    with open(current_path, encoding="utf-8") as f: current = json.load(f)
+    if baseline.get("config") != current.get("config"): print("Warning: the two runs used different inputs or settings; compare with care.")
+    print(f"{baseline_path} ({baseline.get('git_commit')}) -> {current_path} ({current.get('git_commit')})")
+    print(f"  {'stage':<17}{'seconds':>18}{'change':>9}{'peak RSS MB':>18}{'change':>9}")
+    regressions = []
+    for stage in [s for s in PIPELINE_STAGES if s in baseline["stages"] and s in current["stages"]]:
+        before, after = baseline["stages"][stage], current["stages"][stage]
+        if before.get("skipped") or after.get("skipped"): continue
+        changes = {metric: (after[metric] - before[metric]) / before[metric] * 100 if before[metric] else 0.0 for metric in ("seconds", "peak_rss_mb")}
+        flagged = [metric for metric, change in changes.items() if change > threshold_pct]
+        if flagged: regressions.append((stage, flagged))
+        print(f"  {stage:<17}{before['seconds']:>8.3f} -> {after['seconds']:<8.3f}{changes['seconds']:>+8.1f}%"
+              f"{before['peak_rss_mb']:>8.0f} -> {after['peak_rss_mb']:<8.0f}{changes['peak_rss_mb']:>+8.1f}%"
+              + (f"  REGRESSION ({', '.join(flagged)})" if flagged else ""))
+    print(f"{len(regressions)} stage(s) regressed by more than {threshold_pct:g}%.")
+    return regressions
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Offline benchmarks for the FBRef scraping pipeline.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    fetchers_parser = subparsers.add_parser("fetchers", help="Pages per minute and peak memory of each fetch backend against a local stand-in server.")
+    fetchers_parser.add_argument("--pages_dir", type=str, required=True, help="Directory of pages saved with the scraper's --save_pages option.")
+    fetchers_parser.add_argument("--backends", nargs='+', default=["http", "selenium"], choices=["http", "selenium", "auto"])
+    fetchers_parser.add_argument("--repeats", type=int, default=3, help="Times to fetch the whole page set per backend (default: 3).")
+
+    extraction_parser = subparsers.add_parser("extraction", help="Soup + read_html table lookup vs the single-pass lxml extractor over saved HTML pages.")
+    extraction_parser.add_argument("--html", nargs='+', default=["output_data/**/debug_*.html", "tests/pages/*.html"], help="Glob patterns of saved HTML pages (default: debug pages under output_data and the test pages).")
+    extraction_parser.add_argument("--repeats", type=int, default=5)
+
+    synth_parser = subparsers.add_parser("synthesize", help="Scale a data directory's aggregate_stats and Scores_Fixtures to N seasons x M competitions.")
+    synth_parser.add_argument("--source", type=str, default="output_data", help="Data directory to take the latest season of every file from (default: output_data).")
+    synth_parser.add_argument("--output", type=str, required=True, help="Directory to write the synthetic data into.")
+    synth_parser.add_argument("--seasons", type=int, default=10); synth_parser.add_argument("--competitions", type=int, default=2)
+    synth_parser.add_argument("--latest_year", type=int, default=2024, help="End year of the last synthetic season (default: 2024).")
+
+    pipeline_parser = subparsers.add_parser("pipeline", help="Wall time, throughput and peak RSS of parse, clean and combine stages; results are saved as JSON.")
+    pipeline_parser.add_argument("--data_dir", type=str, default="output_data", help="Combiner input directory, e.g. one made by 'synthesize' (default: output_data).")
+    pipeline_parser.add_argument("--html", nargs='*', default=[], help="Glob patterns of recorded pages (e.g. a --save_pages directory) for the parse and clean stages.")
+    pipeline_parser.add_argument("--page_cache", type=str, default=None, help="Also use every page in this page cache directory as a recorded page.")
+    pipeline_parser.add_argument("--stages", nargs='+', default=PIPELINE_STAGES, choices=PIPELINE_STAGES)
+    pipeline_parser.add_argument("--repeats", type=int, default=3)
+    pipeline_parser.add_argument("--jobs", type=int, default=1, help="--jobs of the combine_stats stage (default: 1).")
+    pipeline_parser.add_argument("--results", type=str, default=None, help=f"Results file (default: {DEFAULT_RESULTS_DIR}/pipeline_<time>.json).")
+
+    compare_parser = subparsers.add_parser("compare", help="Per-stage change between two 'pipeline' result files; exits 1 on a regression.")
+    compare_parser.add_argument("baseline"); compare_parser.add_argument("current")
+    compare_parser.add_argument("--threshold", type=float, default=DEFAULT_REGRESSION_THRESHOLD_PCT, help=f"Percent slower (or bigger) that counts as a regression (default: {DEFAULT_REGRESSION_THRESHOLD_PCT:g}).")
+
+    stage_parser = subparsers.add_parser("stage-child")
+    stage_parser.add_argument("--stage", required=True); stage_parser.add_argument("--data_dir", required=True)
+    stage_parser.add_argument("--html", nargs='*', default=[]); stage_parser.add_argument("--page_cache", default=None)
+    stage_parser.add_argument("--repeats", type=int, default=1); stage_parser.add_argument("--jobs", type=int, default=1)
+
+    child_parser = subparsers.add_parser("fetcher-child")
+    child_parser.add_argument("--backend", required=True); child_parser.add_argument("--repeats", type=int, default=1)
+    child_parser.add_argument("--urls", nargs='+', required=True)
+
+    args = parser.parse_args()
+    if args.command == "fetchers": benchmark_fetchers(args.pages_dir, args.backends, args.repeats)
+    elif args.command == "extraction": benchmark_table_extraction(sorted({p for pattern in args.html for p in glob.glob(pattern, recursive=True)}), args.repeats)
+    elif args.command == "synthesize": generate_synthetic_data(args.source, args.output, args.seasons, args.competitions, args.latest_year)
+    elif args.command == "pipeline": benchmark_pipeline(args.stages, args.data_dir, args.html, args.page_cache, args.repeats, args.jobs, args.results)
+    elif args.command == "compare": sys.exit(1 if compare_results(args.baseline, args.current, args.threshold) else 0)
+    elif args.command == "stage-child": print(json.dumps(run_pipeline_stage(args.stage, args.data_dir, args.html, args.page_cache, args.repeats, args.jobs)))
+    elif args.command == "fetcher-child": print(json.dumps(run_fetcher_benchmark_child(args.backend, args.urls, args.repeats)))
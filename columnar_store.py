@@ -0,0 +1,81 @@
+import os
+import json
+import shutil
+import pandas as pd
+from typing import Dict, List, Optional
+
+COLUMNAR_FORMATS = ["parquet", "feather", "none"]
+PARTITION_COLUMNS = ["Competition", "Season"]
+# Low-cardinality identifiers stored as categoricals (dictionary-encoded on disk).
+CATEGORICAL_COLUMNS = {"Competition", "Season", "Squad", "Comp", "Nation", "Pos", "Day", "Round", "Home", "Away", "Venue", "Referee"}
+SCHEMA_FILENAME = "_schema.json"
+
+
+def columnar_master_path(master_csv_path: str, fmt: str) -> str:
+    return f"{os.path.splitext(master_csv_path)[0]}.{fmt}"
+
+
+def build_typed_master(df: pd.DataFrame) -> tuple[pd.DataFrame, Dict[str, str]]:
+    """Applies an explicit schema to a combined master: identifiers become categoricals, fully numeric
+    columns are downcast (whole numbers to the smallest (nullable) integer, the rest to float32) and
+    everything else is a string. Returns the typed frame and the {column: dtype} schema."""
+    typed_columns = {}
+    for col in df.columns:
+        series = df[col]
+        if col in CATEGORICAL_COLUMNS:
+            typed_columns[col] = series.astype("string").astype("category")
+            continue
+        numeric = pd.to_numeric(series, errors='coerce')
+        if numeric.notna().sum() != series.notna().sum() or (series.isna().all() and not pd.api.types.is_numeric_dtype(series)):
+            typed_columns[col] = series.astype("string")
+        elif (numeric.dropna() % 1 == 0).all():
+            downcast = pd.to_numeric(numeric.dropna(), downcast='integer')
+            typed_columns[col] = numeric.astype(downcast.dtype if not numeric.isna().any() else pd.api.types.pandas_dtype(downcast.dtype.name.capitalize()))
+        else:
+            typed_columns[col] = numeric.astype("float32")
+    typed_df = pd.DataFrame(typed_columns, index=df.index)
+    return typed_df, {col: str(dtype) for col, dtype in typed_df.dtypes.items()}
+
+
+def write_columnar_master(df: pd.DataFrame, output_path: str, fmt: str = "parquet") -> bool:
+    """Writes a typed, hive-partitioned (Competition=/Season=) Parquet or Feather copy of a master
+    frame to `output_path`, replacing any previous copy. Returns False when pyarrow is unavailable."""
+    try:
+        import pyarrow as pa
+        import pyarrow.dataset as ds
+    except ImportError:
+        print(f"-> pyarrow is not installed; skipping the {fmt} master ({output_path}). Install pyarrow to write it.")
+        return False
+
+    typed_df, schema = build_typed_master(df)
+    for col in PARTITION_COLUMNS:
+        # Partition values live in the directory names, so they are plain strings on disk.
+        typed_df[col] = typed_df[col].astype("string").fillna("Unknown") if col in typed_df.columns else "Unknown"
+    table = pa.Table.from_pandas(typed_df, preserve_index=False)
+
+    tmp_path = f"{output_path}.tmp"; old_path = f"{output_path}.old"
+    for path in (tmp_path, old_path): shutil.rmtree(path, ignore_errors=True)
+    partitioning = ds.partitioning(pa.schema([table.schema.field(col) for col in PARTITION_COLUMNS]), flavor="hive")
+    ds.write_dataset(table, tmp_path, format="parquet" if fmt == "parquet" else "ipc", partitioning=partitioning)
+    with open(os.path.join(tmp_path, SCHEMA_FILENAME), "w", encoding="utf-8") as f:
+        json.dump({"columns": schema, "partition_columns": PARTITION_COLUMNS, "rows": len(typed_df)}, f, indent=1)
+    if os.path.exists(output_path): os.replace(output_path, old_path)
+    os.replace(tmp_path, output_path)
+    shutil.rmtree(old_path, ignore_errors=True)
+    print(f"Saved typed {fmt} master to {output_path} ({len(typed_df)} rows, partitioned by {'/'.join(PARTITION_COLUMNS)})")
+    return True
+
+
+def read_columnar_master(output_path: str, columns: Optional[List[str]] = None, filters: Optional[Dict[str, object]] = None) -> pd.DataFrame:
+    """Reads only the requested columns and the partitions matching `filters`, e.g.
+    read_columnar_master(path, ["Squad", "Performance_Gls"], {"Competition": "Champions League", "Season": ["2022-2023", "2023-2024"]})."""
+    import pyarrow.dataset as ds
+
+    fmt = "parquet" if output_path.rstrip("/").endswith(".parquet") else "ipc"
+    dataset = ds.dataset(output_path, format=fmt, partitioning="hive")
+    expression = None
+    for col, wanted in (filters or {}).items():
+        values = wanted if isinstance(wanted, (list, tuple, set)) else [wanted]
+        condition = ds.field(col).isin(list(values))
+        expression = condition if expression is None else expression & condition
+    return dataset.to_table(columns=columns, filter=expression).to_pandas()
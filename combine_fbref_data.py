@@ -1,10 +1,19 @@
 import pandas as pd
 import os
-import glob
-from functools import reduce
+from concurrent.futures import ProcessPoolExecutor
 import re
 import argparse
-from pathlib import Path 
+import json
+import hashlib
+
+from columnar_store import write_columnar_master, columnar_master_path, COLUMNAR_FORMATS
+from match_store import MatchStore
+from header_registry import active_header_registry, use_header_registry, master_schema_key, HEADER_REGISTRY_FILENAME
+from stat_schemas import read_typed_csv, read_master_csv, write_master_dtypes, master_dtypes_path, format_issues, categorise_columns, align_categories, normalise_join_key, COLUMN_CATEGORIES_SUFFIX
+from dataset_manifest import DatasetManifest, DATASET_MANIFEST_FILENAME
+from rollup_cubes import build_rollup_cube
+from player_similarity import build_similarity_index
+from player_identity import assign_player_keys, build_player_index, PLAYER_INDEX_FILENAME
 
 
 BIG5_COMP_NAME_IN_FILE = "Big-5-European-Leagues"
@@ -15,9 +24,16 @@ INDIVIDUAL_LEAGUE_NAMES_IN_FILES = [
     "Premier-League", "La-Liga", "Serie-A", "Bundesliga", "Ligue-1"
 ]
 
+COMBINE_STATE_FILENAME = ".combine_state.json"
+FIXTURE_CHUNK_ROWS = 5000
+
 def clean_final_dataframe_columns(df: pd.DataFrame) -> pd.DataFrame:
-    """Cleans column names of the final combined DataFrame, ensuring uniqueness robustly."""
-    cols = list(df.columns)
+    """Cleans column names of the final combined DataFrame, ensuring uniqueness robustly. Names are
+    computed once per header layout and then looked up in the active header registry."""
+    df.columns = active_header_registry().cleaned_names("master", list(df.columns), clean_column_names)
+    return df
+
+def clean_column_names(cols: list) -> list:
     new_cols = []
     counts = {}
     for col_name_original_case in cols:
@@ -41,172 +57,205 @@ def clean_final_dataframe_columns(df: pd.DataFrame) -> pd.DataFrame:
         new_cols.append(final_col_name_to_append)
         counts[col_name.lower()] = current_count + 1
         
-    df.columns = new_cols
-    return df
+    return new_cols
 
-def extract_info_from_path(file_path_str: str, base_data_dir_abs: str, type_folder_name: str):
-    file_path = Path(file_path_str)
-    relative_path = file_path.relative_to(base_data_dir_abs)
-    parts = list(relative_path.parts) 
-                                    
-    filename = file_path.name
-
-    season = "UnknownSeason"
-    competition_name = "UnknownCompetition"
-    category = "UnknownCategory"
-    data_sub_type = None 
-
-    if type_folder_name == "aggregate_stats":
-        if len(parts) == 4: 
-            season = parts[1]
-            sub_type_folder_name = parts[2]
-            if "player" in sub_type_folder_name.lower():
-                data_sub_type = "player"
-            elif "squad" in sub_type_folder_name.lower():
-                data_sub_type = "squad"
-
-
-            if filename.startswith(BIG5_COMP_NAME_IN_FILE):
-                competition_name = "Big 5 European Leagues"
-              
-                match_cat = re.search(fr"^{re.escape(BIG5_COMP_NAME_IN_FILE)}_{season}_(.+?)_(player|squad)_stats\.csv$", filename)
-                if match_cat: category = match_cat.group(1)
-            elif filename.startswith(CHAMPIONS_LEAGUE_CONFIG_NAME_FOR_FILES):
-                competition_name = "Champions League"
-                match_cat = re.search(fr"^{re.escape(CHAMPIONS_LEAGUE_CONFIG_NAME_FOR_FILES)}_{season}_(.+?)_(player|squad)_stats\.csv$", filename)
-                if match_cat: category = match_cat.group(1)
-        else:
-            print(f"Warning: Unexpected path structure for aggregate_stats: {file_path_str}")
-
-    elif type_folder_name == "scores_fixtures":
-        if len(parts) == 4:
-            competition_name = parts[1].replace("_", " ")
-            season = parts[2]
-            category = "scores_fixtures" 
-            data_sub_type = "fixtures" 
-        else:
-            print(f"Warning: Unexpected path structure for scores_fixtures: {file_path_str}")
-            
-    return season, competition_name, category, data_sub_type
+# Scraper output file names: {competition}_{season}_{category}_{data type}_stats.csv and {competition}_{season}_scores_fixtures.csv.
+STATS_FILE_PATTERN = re.compile(r'^(?P<comp>.+?)_(?P<season>\d{4}-\d{4})_(?P<category>.+?)_(?P<data_type>player|squad_against|squad)_stats\.csv$')
+FIXTURES_FILE_PATTERN = re.compile(r'^(?P<comp>.+?)_(?P<season>\d{4}-\d{4})_scores_fixtures\.csv$')
+STATS_COMPETITION_NAMES = {BIG5_COMP_NAME_IN_FILE: "Big 5 European Leagues", CL_COMP_NAME_IN_FILE: "Champions League"}
 
+def describe_output_file(file_name: str):
+    """(data_type, competition, season, category) of a scraper output file, from its name; None for other files."""
+    match = STATS_FILE_PATTERN.match(file_name)
+    if match: return match['data_type'], STATS_COMPETITION_NAMES.get(match['comp'], match['comp'].replace('-', ' ')), match['season'], match['category']
+    match = FIXTURES_FILE_PATTERN.match(file_name)
+    if match: return "fixtures", match['comp'], match['season'], "scores_fixtures"
+    return None
 
-def combine_stats_data(data_root_dir: str, target_data_type: str):
-    
-    all_dfs_by_key = {} 
-    total_source_rows = 0
-    num_contributing_files = 0
-    file_pattern = os.path.join(data_root_dir, "*", f"{target_data_type}_aggregate_stats", "*.csv")
-    
-    data_files = glob.glob(file_pattern)
-    
-    if not data_files:
-        print(f"No {target_data_type} files found with pattern: {file_pattern}")
+def index_existing_outputs(data_dir: str, manifest: DatasetManifest) -> int:
+    """Backfills the dataset manifest from the files already under `data_dir`, whatever folder they are in
+    (the aggregate_stats / Scores_Fixtures tree or the scraper's per-target folders). Entries whose file is
+    gone are dropped, files already indexed are not read again, and when two files hold the same dataset
+    the newer one is kept. Returns the number of files (re)indexed."""
+    dropped = manifest.forget_missing()
+    if dropped: print(f"-> Dropped {dropped} manifest entr{'y' if dropped == 1 else 'ies'} whose file is gone.")
+    current = {(e['data_type'], e['competition'], e['season'], e['category']): e for e in manifest.outputs()}
+    indexed = 0
+    for dir_path, dir_names, file_names in os.walk(data_dir):
+        dir_names[:] = sorted(d for d in dir_names if not d.startswith('.') and not d.startswith('MASTER_') and d != "benchmarks")
+        for file_name in sorted(file_names):
+            described = describe_output_file(file_name)
+            if described is None: continue
+            f_path = os.path.abspath(os.path.join(dir_path, file_name))
+            modified_at = os.path.getmtime(f_path)
+            existing = current.get(described)
+            if existing is not None and existing['path'] == f_path and existing['written_at'] >= modified_at: continue
+            if existing is not None and existing['path'] != f_path and os.path.isfile(existing['path']) and os.path.getmtime(existing['path']) >= modified_at:
+                print(f"-> {f_path} holds the same dataset as the newer {existing['path']}; keeping that one."); continue
+            try:
+                df = pd.read_csv(f_path, usecols=[0])
+                rows, columns = len(df), list(pd.read_csv(f_path, nrows=0).columns)
+            except (pd.errors.EmptyDataError, ValueError):
+                rows, columns = 0, []
+            manifest.record_output(f_path, *described, rows=rows, columns=columns, written_at=modified_at)
+            current[described] = {"path": f_path, "written_at": modified_at}
+            indexed += 1
+    return indexed
+
+def load_dataset_manifest(data_dir: str, reindex: bool = False) -> DatasetManifest:
+    """The dataset manifest of `data_dir`, backfilled from the files on disk when it is new or `reindex`."""
+    manifest = DatasetManifest(os.path.join(data_dir, DATASET_MANIFEST_FILENAME))
+    if reindex or not manifest.outputs():
+        print(f"Indexing existing output files under {data_dir} into {DATASET_MANIFEST_FILENAME}...")
+        print(f"-> Indexed {index_existing_outputs(data_dir, manifest)} file(s).")
+    return manifest
+
+def _existing_entries(entries: list) -> list:
+    present = []
+    for entry in entries:
+        if os.path.isfile(entry['path']): present.append(entry)
+        else: print(f"Skipping {entry['path']}: listed in the dataset manifest but missing (rerun with --reindex).")
+    return present
+
+def plan_stats_files(manifest: DatasetManifest, target_data_type: str) -> list:
+    """(file_path, season, competition, category) of every stats file of one data type in the manifest,
+    by season, then file name."""
+    entries = sorted(manifest.outputs(target_data_type), key=lambda e: (e['season'], os.path.basename(e['path'])))
+    return [(e['path'], e['season'], e['competition'], e['category']) for e in _existing_entries(entries)]
+
+def merge_stats_group(key, cat_df_infos: list, target_data_type: str):
+    """Joins the per-category frames of one (competition, season) group into one wide frame.
+    Every frame is indexed once on the normalised join key ((Player, Squad, Born) for players,
+    (Squad, Comp) for squads, as far as all frames have those columns) and the new columns of all
+    categories are aligned in a single concat. Rows keep the base (standard) order, followed by keys
+    that only appear in other categories; unmatched and repeated keys are reported."""
+    id_column = 'Player' if target_data_type == "player" else 'Squad'
+    preferred_key_cols = ['Player', 'Squad', 'Born'] if target_data_type == "player" else ['Squad', 'Comp']
+    identifier_cols = ['Nation', 'Pos', 'Age', 'Born', 'Squad', 'Comp'] if target_data_type == "player" else ['#_Pl', 'Age', 'Poss', 'Comp']
+
+    if not cat_df_infos: return None
+    cat_df_infos.sort(key=lambda x: 0 if x['category'] == 'standard' else 1)
+    base_df = cat_df_infos[0]['dataframe']
+    if base_df.empty or id_column not in base_df.columns:
+        print(f"  Base DataFrame for {key} (category: {cat_df_infos[0]['category']}) is empty or missing ID column '{id_column}'.")
         return None
-    print(f"Found {len(data_files)} files for {target_data_type} data in {data_root_dir}.")
 
-    for f_path in data_files:
-        try:
-            
-            season, comp_name, category, _ = extract_info_from_path(f_path, str(Path(data_root_dir).parent), "aggregate_stats")
-            
-            if category == "UnknownCategory" or comp_name == "UnknownCompetition":
-                print(f"Skipping file due to unknown metadata: {f_path}")
-                continue
+    other_infos = [info for info in cat_df_infos[1:] if not info['dataframe'].empty and id_column in info['dataframe'].columns]
+    key_cols = [col for col in preferred_key_cols if all(col in info['dataframe'].columns for info in [cat_df_infos[0]] + other_infos)]
 
-            df = pd.read_csv(f_path)
+    base_indexed = base_df.set_index(normalise_join_key(base_df, key_cols))
+    seen_cols = set(base_df.columns)
+    fill_cols = [col for col in list(dict.fromkeys(key_cols + identifier_cols)) if col in base_df.columns]
+    pieces, fill_sources, report = [base_indexed], [], []
+    for df_info in other_infos:
+        df = df_info['dataframe']
+        indexed = df.set_index(normalise_join_key(df, key_cols))
+        new_cols = [col for col in df.columns if col not in seen_cols]
+        seen_cols.update(new_cols)
+        unmatched = int((~indexed.index.isin(base_indexed.index)).sum())
+        repeated = sum(1 for k in indexed.index if k[-1])
+        if unmatched or repeated: report.append(f"{df_info['category']}: {unmatched} unmatched, {repeated} repeated")
+        if new_cols: pieces.append(indexed[new_cols])
+        if unmatched: fill_sources.append(indexed[[col for col in fill_cols if col in indexed.columns]])
+
+    merged_df = pd.concat(pieces, axis=1, join='outer', sort=False) if len(pieces) > 1 else base_indexed.copy()
+    # Keys that only exist in a non-base category get their identifiers from the first category that has them.
+    if fill_sources:
+        missing = merged_df.index.difference(base_indexed.index, sort=False)
+        for source in fill_sources:
+            for col in source.columns:
+                fill_values = source[col].reindex(missing)
+                merged_df[col], fill_values = align_categories(merged_df[col], fill_values)
+                merged_df.loc[missing, col] = merged_df.loc[missing, col].fillna(fill_values)
+    merged_df = merged_df.reset_index(drop=True)
+    repeated_base = sum(1 for k in base_indexed.index if k[-1])
+    if repeated_base: report.insert(0, f"{cat_df_infos[0]['category']}: {repeated_base} repeated")
+    if report: print(f"  Join report for {target_data_type} {key} on {key_cols}: " + "; ".join(report))
+    # Every row of this group belongs to it, and incremental splicing relies on the labels.
+    merged_df['Competition'], merged_df['Season'] = key
+    return merged_df
+
+def read_and_merge_stats_group(key, group_files: list, target_data_type: str):
+    """Reads the category files of one (competition, season) group, typed by their category schema,
+    and merges them. Runs in a worker process when --jobs > 1, so it only takes and returns picklable values."""
+    comp_name, season = key
+    cat_df_infos = []
+    source_rows = 0
+    for f_path, category in group_files:
+        try:
+            df, issues = read_typed_csv(f_path, target_data_type, category)
+            if issues: print(f"  Validation of {f_path}: {format_issues(issues)}")
             if df.empty:
                 print(f"Skipping empty file: {f_path}")
                 continue
             
-            total_source_rows += len(df)
-            num_contributing_files += 1
+            source_rows += len(df)
             df['Season'] = season
             df['Competition'] = comp_name
-            
-            key = (comp_name, season)
-            if key not in all_dfs_by_key:
-                all_dfs_by_key[key] = []
-            all_dfs_by_key[key].append({"category": category, "dataframe": df})
+            cat_df_infos.append({"category": category, "dataframe": df})
             
         except Exception as e:
             print(f"Error processing {target_data_type} file {f_path}: {e}")
             continue
-    
-    final_merged_dfs_list = []
-    id_column = 'Player' if target_data_type == "player" else 'Squad'
-    
-    base_identifier_cols_player = ['Nation', 'Pos', 'Age', 'Born', 'Squad']
-    base_identifier_cols_squad = ['#_Pl', 'Age', 'Poss', 'Comp'] 
+    return merge_stats_group(key, cat_df_infos, target_data_type), source_rows, len(cat_df_infos)
 
-    for key, cat_df_infos in all_dfs_by_key.items():
-        if not cat_df_infos: continue
-        
-        comp_name_iter, season_iter = key
-        cat_df_infos.sort(key=lambda x: 0 if x['category'] == 'standard' else 1)
+def combine_stats_data(stats_files: list, target_data_type: str, only_groups: set = None, jobs: int = 1):
+    """Combines the planned stats files (see plan_stats_files) of one data type into a master frame. With `only_groups`, only those
+    (competition, season) groups are read and merged (used by the incremental mode). With jobs > 1 the
+    groups are read and merged in a process pool of at most one worker per CPU; results are collected in
+    group order, so the output is identical to a serial run. Every merged frame is pickled back to this
+    process, so the pool only pays off with several cores and large groups."""
+    if only_groups is not None: stats_files = [f for f in stats_files if (f[2], f[1]) in only_groups]
+    if not stats_files:
+        print(f"No {target_data_type} files in the dataset manifest" + (" for the changed groups." if only_groups is not None else "."))
+        return None
+    print(f"Planned {len(stats_files)} files for {target_data_type} data.")
 
-        if not cat_df_infos[0]['dataframe'].empty and id_column in cat_df_infos[0]['dataframe'].columns:
-            merged_df = cat_df_infos[0]['dataframe'].copy()
-            potential_keys = base_identifier_cols_player if target_data_type == 'player' else base_identifier_cols_squad
-            
-            for df_info in cat_df_infos[1:]:
-                df_to_merge = df_info['dataframe'].copy()
-                category_suffix = f"_{df_info['category']}"
-                if df_to_merge.empty or id_column not in df_to_merge.columns: continue
-
-                current_merge_keys = [id_column]
-                for pk in potential_keys:
-                    if pk in merged_df.columns and pk in df_to_merge.columns:
-                        if merged_df[pk].dtype == df_to_merge[pk].dtype: current_merge_keys.append(pk)
-                current_merge_keys = list(dict.fromkeys(current_merge_keys))
-                cols_to_bring = [col for col in df_to_merge.columns if col in current_merge_keys or col not in merged_df.columns]
-                
-                if not any(c not in current_merge_keys for c in cols_to_bring): continue
-                try:
-                    merged_df = pd.merge(merged_df, df_to_merge[cols_to_bring], on=current_merge_keys, how='outer', suffixes=('', category_suffix))
-                except Exception as e_merge:
-                    print(f"Error merging {target_data_type} for {key}, category {df_info['category']} on {current_merge_keys}: {e_merge}. Trying '{id_column}' only.")
-                    try:
-                        cols_to_bring_fallback = [id_column] + [col for col in df_to_merge.columns if col != id_column and col not in merged_df.columns]
-                        cols_to_bring_fallback = list(dict.fromkeys(cols_to_bring_fallback))
-                        if len(cols_to_bring_fallback) > 1 :
-                             merged_df = pd.merge(merged_df, df_to_merge[cols_to_bring_fallback], on=id_column, how='outer', suffixes=('', category_suffix + "_fb"))
-                    except Exception as e_fb_merge:
-                        print(f"  Fallback merge on '{id_column}' also failed for {key}, cat {df_info['category']}: {e_fb_merge}")
-            final_merged_dfs_list.append(merged_df)
-        else:
-            print(f"  Base DataFrame for {key} (category: {cat_df_infos[0]['category']}) is empty or missing ID column '{id_column}'.")
+    files_by_key = {}
+    for f_path, season, comp_name, category in stats_files:
+        files_by_key.setdefault((comp_name, season), []).append((f_path, category))
+    keys = list(files_by_key)
+    jobs = min(jobs, len(keys), os.cpu_count() or 1)
+    if jobs > 1:
+        with ProcessPoolExecutor(max_workers=jobs) as executor:
+            group_results = list(executor.map(read_and_merge_stats_group, keys, [files_by_key[k] for k in keys], [target_data_type] * len(keys)))
+    else:
+        group_results = [read_and_merge_stats_group(k, files_by_key[k], target_data_type) for k in keys]
+
+    final_merged_dfs_list = [merged_df for merged_df, _, _ in group_results if merged_df is not None]
+    total_source_rows = sum(rows for _, rows, _ in group_results)
+    num_contributing_files = sum(n_files for _, _, n_files in group_results)
 
     if not final_merged_dfs_list:
         print(f"No {target_data_type} dataframes to combine into a master file.")
         return None
         
-    combined_master_df = pd.concat(final_merged_dfs_list, ignore_index=True)
+    combined_master_df = categorise_columns(pd.concat(final_merged_dfs_list, ignore_index=True))
     combined_master_df = clean_final_dataframe_columns(combined_master_df)
     print(f"{target_data_type.capitalize()} data: Combined {len(combined_master_df)} rows into master DataFrame, from {total_source_rows} total rows in {num_contributing_files} source files.")
     return combined_master_df
 
-def combine_match_fixtures(data_root_dir: str):
+def plan_fixture_files(manifest: DatasetManifest) -> list:
+    """(file_path, season, competition) of every fixture file in the manifest, by competition, then season."""
+    entries = sorted(manifest.outputs("fixtures"), key=lambda e: (e['competition'], e['season'], os.path.basename(e['path'])))
+    return [(e['path'], e['season'], e['competition']) for e in _existing_entries(entries)]
+
+def combine_match_fixtures(fixture_files: list, only_groups: set = None):
     
     all_fixture_dfs = []
     total_source_rows = 0
     num_contributing_files = 0
-    file_pattern = os.path.join(data_root_dir, "*", "*", "*.csv")
-    fixture_files = glob.glob(file_pattern)
-
+    if only_groups is not None: fixture_files = [f for f in fixture_files if (f[2], f[1]) in only_groups]
 
     if not fixture_files:
-        print(f"No fixture files found with pattern: {file_pattern}")
+        print("No fixture files in the dataset manifest" + (" for the changed groups." if only_groups is not None else "."))
         return None
-    print(f"Found {len(fixture_files)} fixture files.")
+    print(f"Planned {len(fixture_files)} fixture files.")
 
-    for f_path in fixture_files:
+    for f_path, season, comp_name in fixture_files:
         try:
-            season, comp_name, _, _ = extract_info_from_path(f_path, str(Path(data_root_dir).parent), "scores_fixtures")
-            if comp_name == "UnknownCompetition": 
-                print(f"Skipping fixture file due to unknown competition: {f_path}")
-                continue
-            
-            df = pd.read_csv(f_path)
+            df, issues = read_typed_csv(f_path, "fixtures", "scores_fixtures")
+            if issues: print(f"  Validation of {f_path}: {format_issues(issues)}")
             if df.empty:
                 print(f"Skipping empty fixture file: {f_path}")
                 continue
@@ -225,55 +274,232 @@ def combine_match_fixtures(data_root_dir: str):
         print("No fixture dataframes to combine.")
         return None
         
-    combined_df = pd.concat(all_fixture_dfs, ignore_index=True)
+    combined_df = categorise_columns(pd.concat(all_fixture_dfs, ignore_index=True))
     combined_df = clean_final_dataframe_columns(combined_df)
     print(f"Match fixtures: Combined {len(combined_df)} rows into master DataFrame, from {total_source_rows} total rows in {num_contributing_files} source files.")
     return combined_df
 
-def main_combiner_logic(base_data_dir_arg):
+def fixture_stream_schema(fixture_files: list, chunk_rows: int = FIXTURE_CHUNK_ROWS):
+    """First pass of the streaming fixture combiner, one chunk at a time: the union of the tagged
+    columns in order of first appearance (the column order pd.concat gives) and the files that have to
+    be read as text and validated because they do not parse with the fixture schema.
+    Returns (columns, text_files, contributing_files)."""
+    columns, text_files, contributing_files = [], set(), []
+    for f_path, season, comp_name in fixture_files:
+        rows = 0
+        try:
+            try:
+                frames, _ = read_typed_csv(f_path, "fixtures", "scores_fixtures", chunk_rows=chunk_rows)
+                rows = sum(len(chunk) for chunk in frames)
+            except (ValueError, TypeError):
+                text_files.add(f_path)
+                frames, _ = read_typed_csv(f_path, "fixtures", "scores_fixtures", chunk_rows=chunk_rows, as_text=True)
+                rows = sum(len(chunk) for chunk in frames)
+        except Exception as e:
+            print(f"Error processing fixture file {f_path}: {e}")
+            continue
+        if not rows:
+            print(f"Skipping empty fixture file: {f_path}")
+            continue
+        contributing_files.append((f_path, season, comp_name))
+        for col in list(pd.read_csv(f_path, nrows=0).columns) + ['Season', 'Competition']:
+            if col not in columns: columns.append(col)
+    return columns, text_files, contributing_files
+
+def stream_match_fixtures(fixture_files: list, master_path: str, chunk_rows: int = FIXTURE_CHUNK_ROWS):
+    """Writes MASTER_MATCH_FIXTURES.csv without holding all fixtures in memory: the union schema is
+    worked out first, then every file is read, tagged and appended in chunks of `chunk_rows` rows.
+    Column names, column order and values match combine_match_fixtures. Returns the number of rows written."""
+    if not fixture_files:
+        print("No fixture files in the dataset manifest.")
+        return 0
+    print(f"Planned {len(fixture_files)} fixture files; streaming them in chunks of {chunk_rows} rows.")
+    columns, text_files, contributing_files = fixture_stream_schema(fixture_files, chunk_rows)
+    if not contributing_files:
+        print("No fixture dataframes to combine.")
+        return 0
+
+    tmp_path = f"{master_path}.tmp"
+    clean_names = active_header_registry().cleaned_names("master", columns, clean_column_names)
+    output_names = active_header_registry().conform(master_schema_key("fixtures"), clean_names)
+    rows_written = 0
+    with open(tmp_path, "w", encoding="utf-8", newline="") as out:
+        pd.DataFrame(columns=output_names).to_csv(out, index=False)
+        for f_path, season, comp_name in contributing_files:
+            # Same read (typed, or as validated text) as combine_match_fixtures, so values match.
+            frames, issues = read_typed_csv(f_path, "fixtures", "scores_fixtures", chunk_rows=chunk_rows, as_text=f_path in text_files)
+            for chunk in frames:
+                if chunk.empty: continue
+                chunk['Season'] = season
+                chunk['Competition'] = comp_name
+                chunk = chunk.reindex(columns=columns)
+                chunk.columns = clean_names
+                chunk.reindex(columns=output_names).to_csv(out, index=False, header=False)
+                rows_written += len(chunk)
+            if issues: print(f"  Validation of {f_path}: {format_issues(issues)}")
+    os.replace(tmp_path, master_path)
+    print(f"Match fixtures: Streamed {rows_written} rows from {len(contributing_files)} source files into {master_path}")
+    return rows_written
+
+def file_fingerprint(f_path: str, previous: dict = None) -> dict:
+    """(mtime, size, sha1) of a file; the hash is reused from `previous` when mtime and size are unchanged."""
+    file_stat = os.stat(f_path)
+    if previous and previous.get('mtime_ns') == file_stat.st_mtime_ns and previous.get('size') == file_stat.st_size:
+        return {"mtime_ns": previous['mtime_ns'], "size": previous['size'], "sha1": previous['sha1']}
+    with open(f_path, "rb") as f: digest = hashlib.sha1(f.read()).hexdigest()
+    return {"mtime_ns": file_stat.st_mtime_ns, "size": file_stat.st_size, "sha1": digest}
+
+def load_combine_state(state_path: str) -> dict:
+    if not os.path.isfile(state_path): return {}
+    try:
+        with open(state_path, encoding="utf-8") as f: return json.load(f)
+    except (OSError, json.JSONDecodeError) as e:
+        print(f"Warning: Could not read combine state {state_path} ({e}); doing a full rebuild.")
+        return {}
+
+def save_combine_state(state_path: str, state: dict):
+    tmp_path = f"{state_path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f: json.dump(state, f, indent=1, sort_keys=True)
+    os.replace(tmp_path, state_path)
+
+def splice_master_groups(master_path: str, changed_df, changed_groups: set, group_order: list, label: str = "master") -> pd.DataFrame:
+    """Replaces the rows of `changed_groups` in an existing master file with `changed_df`, keeping
+    groups in the same order a full rebuild would produce. The master is read back with the dtypes it
+    was written with, so unchanged rows are written back as they were."""
+    master_df, _ = read_master_csv(master_path, label)
+    master_groups = pd.MultiIndex.from_arrays([master_df['Competition'].astype(str), master_df['Season'].astype(str)])
+    kept_df = master_df[~master_groups.isin(list(changed_groups))]
+    parts = [kept_df] + ([changed_df] if changed_df is not None and not changed_df.empty else [])
+    spliced_df = categorise_columns(pd.concat(parts, ignore_index=True))
+    group_rank = {group: rank for rank, group in enumerate(group_order)}
+    ranks = [group_rank.get(group, len(group_rank)) for group in zip(spliced_df['Competition'].astype(str), spliced_df['Season'].astype(str))]
+    order = pd.Series(ranks).sort_values(kind='stable').index
+    return spliced_df.iloc[order].reset_index(drop=True)
+
+def build_master_file(label: str, master_path: str, files_with_groups: list, combine_fn, base_dir: str,
+                      state: dict, incremental: bool = False, columnar: str = "none", stream_fn=None, finalise_fn=None):
+    """Builds one MASTER_*.csv, plus a typed Parquet/Feather copy unless `columnar` is 'none'.
+    In incremental mode only the (competition, season) groups whose input files were added, changed
+    (by content hash) or removed since the last run are re-combined and spliced into the existing
+    master; everything else is left as it is. A full rebuild goes through `stream_fn(master_path)`
+    when one is given, which writes the master itself in bounded memory. `finalise_fn` is applied to
+    the whole master frame before it is written, and its columns are put in the order pinned for
+    `label` in the header registry."""
+    columnar_path = columnar_master_path(master_path, columnar) if columnar != "none" else None
+    previous_files = state.get(label, {})
+    current_files = {}
+    for f_path, group in files_with_groups:
+        rel_path = os.path.relpath(f_path, base_dir)
+        current_files[rel_path] = {**file_fingerprint(f_path, previous_files.get(rel_path)), "group": list(group)}
+    group_order = list(dict.fromkeys(group for _, group in files_with_groups))
+
+    if incremental and previous_files and os.path.isfile(master_path):
+        changed_groups = {tuple(info['group']) for rel_path, info in current_files.items()
+                          if rel_path not in previous_files or previous_files[rel_path]['sha1'] != info['sha1']}
+        changed_groups |= {tuple(info['group']) for rel_path, info in previous_files.items() if rel_path not in current_files}
+        if not changed_groups:
+            print(f"{os.path.basename(master_path)} is up to date; no input files changed.")
+            state[label] = current_files
+            if columnar_path and not os.path.isdir(columnar_path):
+                write_columnar_master(read_master_csv(master_path, label)[0], columnar_path, columnar)
+            return
+        print(f"Incremental update of {os.path.basename(master_path)}: {len(changed_groups)} changed group(s): {', '.join(f'{c} {s}' for c, s in sorted(changed_groups))}")
+        combined_df = splice_master_groups(master_path, combine_fn(only_groups=changed_groups), changed_groups, group_order, label)
+    else:
+        if incremental: print(f"No previous combine state for {os.path.basename(master_path)}; doing a full rebuild.")
+        if stream_fn is not None:
+            if stream_fn(master_path):
+                state[label] = current_files
+                # The streamed master has no frame to record dtypes from; readers fall back to the column schema.
+                if os.path.isfile(master_dtypes_path(master_path)): os.remove(master_dtypes_path(master_path))
+                if columnar_path: print(f"-> Streaming mode keeps memory flat, so {os.path.basename(columnar_path)} was not rewritten; run without streaming to refresh it.")
+            else:
+                print(f"No {os.path.basename(master_path)} generated or result was empty.")
+            return
+        combined_df = combine_fn(only_groups=None)
+
+    if combined_df is not None and not combined_df.empty:
+        if finalise_fn is not None: combined_df = finalise_fn(combined_df)
+        combined_df = combined_df.reindex(columns=active_header_registry().conform(master_schema_key(label), list(combined_df.columns)))
+        combined_df.to_csv(master_path, index=False)
+        write_master_dtypes(master_path, combined_df)
+        print(f"Saved {os.path.basename(master_path)} with {len(combined_df)} rows to {master_path}")
+        state[label] = current_files
+        if columnar_path: write_columnar_master(combined_df, columnar_path, columnar)
+    else:
+        print(f"No {os.path.basename(master_path)} generated or result was empty.")
+
+def write_column_categories(master_path: str, stats_files: list):
+    """Records which stat category (standard, shooting, ...) each master column came from, in
+    MASTER_*.categories.json next to the master, so readers can select columns by category. A column
+    belongs to the first category (standard first) whose files have it."""
+    if not os.path.isfile(master_path): return
+    master_columns = set(pd.read_csv(master_path, nrows=0).columns)
+    header_by_category = {}
+    for f_path, _, _, category in stats_files:
+        if category not in header_by_category:
+            header_by_category[category] = active_header_registry().cleaned_names("master", list(pd.read_csv(f_path, nrows=0).columns), clean_column_names)
+    assigned, categories = set(), {}
+    for category in sorted(header_by_category, key=lambda c: (c != 'standard', c)):
+        categories[category] = [col for col in header_by_category[category] if col in master_columns and col not in assigned]
+        assigned.update(categories[category])
+    with open(f"{os.path.splitext(master_path)[0]}{COLUMN_CATEGORIES_SUFFIX}", "w", encoding="utf-8") as f:
+        json.dump(categories, f, indent=1)
+
+def main_combiner_logic(base_data_dir_arg, incremental: bool = False, jobs: int = 1, columnar: str = "none",
+                        stream_fixtures: bool = False, chunk_rows: int = FIXTURE_CHUNK_ROWS, match_store_path: str = None, reindex: bool = False,
+                        rollups: bool = False, similarity: bool = False, player_index: bool = False):
     print(f"Starting data combination process from base directory: {base_data_dir_arg}")
     abs_base_data_dir = os.path.abspath(base_data_dir_arg)
     if not os.path.isdir(abs_base_data_dir):
         print(f"Error: Base data directory '{abs_base_data_dir}' not found.")
         return
 
-    aggregate_stats_path = os.path.join(abs_base_data_dir, "aggregate_stats")
-    scores_fixtures_path = os.path.join(abs_base_data_dir, "scores_fixtures")
-
-    if os.path.isdir(aggregate_stats_path):
-        print("\nCombining Player Stats...")
-        combined_players = combine_stats_data(aggregate_stats_path, target_data_type="player")
-        if combined_players is not None and not combined_players.empty:
-            output_path = os.path.join(abs_base_data_dir, "MASTER_PLAYER_STATS.csv")
-            combined_players.to_csv(output_path, index=False)
-            print(f"Saved MASTER_PLAYER_STATS.csv with {len(combined_players)} rows to {output_path}")
-        else:
-            print("No master player stats file generated or result was empty.")
-
-        print("\nCombining Squad Stats...")
-        combined_squads = combine_stats_data(aggregate_stats_path, target_data_type="squad")
-        if combined_squads is not None and not combined_squads.empty:
-            output_path = os.path.join(abs_base_data_dir, "MASTER_SQUAD_STATS.csv")
-            combined_squads.to_csv(output_path, index=False)
-            print(f"Saved MASTER_SQUAD_STATS.csv with {len(combined_squads)} rows to {output_path}")
-        else:
-            print("No master squad stats file generated or result was empty.")
-    else:
-        print(f"Directory for aggregate stats not found: {aggregate_stats_path}")
-
-
-    if os.path.isdir(scores_fixtures_path):
-        print("\nCombining Match Fixtures...")
-        combined_fixtures = combine_match_fixtures(scores_fixtures_path)
-        if combined_fixtures is not None and not combined_fixtures.empty:
-            output_path = os.path.join(abs_base_data_dir, "MASTER_MATCH_FIXTURES.csv")
-            combined_fixtures.to_csv(output_path, index=False)
-            print(f"Saved MASTER_MATCH_FIXTURES.csv with {len(combined_fixtures)} rows to {output_path}")
-        else:
-            print("No master match fixtures file generated or result was empty.")
+    manifest = load_dataset_manifest(abs_base_data_dir, reindex)
+    state_path = os.path.join(abs_base_data_dir, COMBINE_STATE_FILENAME)
+    state = load_combine_state(state_path)
+    use_header_registry(os.path.join(abs_base_data_dir, HEADER_REGISTRY_FILENAME))
+
+    for target_data_type in ("player", "squad"):
+        print(f"\nCombining {target_data_type.capitalize()} Stats...")
+        stats_files = plan_stats_files(manifest, target_data_type)
+        if not stats_files and target_data_type not in state:
+            print(f"No {target_data_type} stats files in the dataset manifest."); continue
+        master_path = os.path.join(abs_base_data_dir, f"MASTER_{target_data_type.upper()}_STATS.csv")
+        build_master_file(target_data_type, master_path,
+                          [(f_path, (comp_name, season)) for f_path, season, comp_name, _ in stats_files],
+                          lambda only_groups, t=target_data_type, f=stats_files: combine_stats_data(f, t, only_groups, jobs),
+                          abs_base_data_dir, state, incremental, columnar,
+                          finalise_fn=assign_player_keys if target_data_type == "player" else None)
+        write_column_categories(master_path, stats_files)
+        if target_data_type == "player" and os.path.isfile(master_path):
+            if player_index: build_player_index(master_path, os.path.join(abs_base_data_dir, PLAYER_INDEX_FILENAME))
+            if similarity: build_similarity_index(master_path)
+        if rollups: build_rollup_cube(abs_base_data_dir, target_data_type)
+
+
+    print("\nCombining Match Fixtures...")
+    fixture_files = plan_fixture_files(manifest)
+    if fixture_files or "fixtures" in state:
+        fixtures_master_path = os.path.join(abs_base_data_dir, "MASTER_MATCH_FIXTURES.csv")
+        build_master_file("fixtures", fixtures_master_path,
+                          [(f_path, (comp_name, season)) for f_path, season, comp_name in fixture_files],
+                          lambda only_groups: combine_match_fixtures(fixture_files, only_groups),
+                          abs_base_data_dir, state, incremental, columnar,
+                          stream_fn=(lambda master_path: stream_match_fixtures(fixture_files, master_path, chunk_rows)) if stream_fixtures else None)
+        if match_store_path and os.path.isfile(fixtures_master_path):
+            store = MatchStore(match_store_path)
+            try:
+                n_matches = store.load_fixtures(pd.read_csv(fixtures_master_path, low_memory=False))
+                print(f"Stored {n_matches} typed matches in {match_store_path}")
+            finally:
+                store.close()
     else:
-        print(f"Directory for scores & fixtures not found: {scores_fixtures_path}")
+        print("No fixture files in the dataset manifest.")
     
+    save_combine_state(state_path, state)
+    manifest.close()
+    active_header_registry().close()
     print("\nData combination process finished.")
 
 if __name__ == "__main__":
@@ -284,6 +510,64 @@ if __name__ == "__main__":
         default="output_data", 
         help="The base directory where the 'aggregate_stats' and 'scores_fixtures' subdirectories are located (default: 'output_data/')."
     )
+    parser.add_argument(
+        "--incremental",
+        action="store_true",
+        help="Only re-combine the (competition, season) groups whose input files changed since the last run and splice them into the existing master files."
+    )
+    parser.add_argument(
+        "--jobs",
+        type=int,
+        default=1,
+        help="Number of worker processes reading and merging (competition, season) groups in parallel, capped at the CPU count (default: 1, serial). Output is identical to a serial run; only worth raising on multi-core machines, since merged groups are copied back to the main process."
+    )
+    parser.add_argument(
+        "--columnar",
+        choices=COLUMNAR_FORMATS,
+        default="none",
+        help="Also write typed masters (categorical identifiers, downcast numerics) partitioned by Competition/Season as MASTER_*.parquet or MASTER_*.feather directories (default: none). Needs pyarrow and writes one file per Competition/Season partition."
+    )
+    parser.add_argument(
+        "--stream_fixtures",
+        action="store_true",
+        help="Build MASTER_MATCH_FIXTURES.csv by appending each fixture file in chunks instead of concatenating everything in memory (full rebuilds only; the columnar copy is left as is)."
+    )
+    parser.add_argument(
+        "--chunk_rows",
+        type=int,
+        default=FIXTURE_CHUNK_ROWS,
+        help=f"Rows per chunk when streaming fixtures (default: {FIXTURE_CHUNK_ROWS})."
+    )
+    parser.add_argument(
+        "--match_store",
+        nargs='?',
+        const="matches.sqlite",
+        default=None,
+        help="Also rebuild the typed SQLite match store (parsed scores, xG, dates, team ids) from the fixtures master; the file name is relative to --data_dir (default: matches.sqlite)."
+    )
+    parser.add_argument(
+        "--reindex",
+        action="store_true",
+        help="Walk --data_dir once and update the dataset manifest (dataset_manifest.sqlite) from the files on disk, e.g. after copying in or deleting files by hand. Done automatically when there is no manifest yet."
+    )
+    parser.add_argument(
+        "--rollups",
+        action="store_true",
+        help="Also refresh the per-90 and percentile rollup cubes (cubes/PLAYER_ROLLUPS.parquet, cubes/SQUAD_ROLLUPS.parquet) for the (competition, season) groups whose master rows changed; needs pyarrow."
+    )
+    parser.add_argument(
+        "--similarity",
+        action="store_true",
+        help="Also rebuild the player similarity index (similarity/ next to the player master) when the player master changed; see player_similarity.py."
+    )
+    parser.add_argument(
+        "--player_index",
+        action="store_true",
+        help=f"Also rebuild the player identity index ({PLAYER_INDEX_FILENAME}: byte offsets of every player's rows in the player master) when the player master changed; see player_identity.py."
+    )
     args = parser.parse_args()
     
-    main_combiner_logic(args.data_dir)
\ No newline at end of file
+    main_combiner_logic(args.data_dir, incremental=args.incremental, jobs=max(1, args.jobs), columnar=args.columnar,
+                        stream_fixtures=args.stream_fixtures, chunk_rows=max(1, args.chunk_rows),
+                        match_store_path=os.path.join(args.data_dir, args.match_store) if args.match_store else None, reindex=args.reindex,
+                        rollups=args.rollups, similarity=args.similarity, player_index=args.player_index)
\ No newline at end of file
@@ -0,0 +1,129 @@
+import os
+import json
+import time
+import sqlite3
+import hashlib
+import argparse
+import threading
+from typing import Dict, List, Optional
+
+HARVEST_MANIFEST_FILENAME = "harvest_manifest.jsonl"
+DATASET_MANIFEST_FILENAME = "dataset_manifest.sqlite"
+
+_manifest_lock = threading.Lock()
+
+
+def append_manifest_record(manifest_path: str, record: Dict):
+    """Appends one JSON line describing a saved output file (which table, from which URL)."""
+    line = json.dumps(record, ensure_ascii=False)
+    with _manifest_lock:
+        with open(manifest_path, "a", encoding="utf-8") as f: f.write(line + "\n")
+
+
+def load_manifest_records(manifest_path: str) -> List[Dict]:
+    if not os.path.isfile(manifest_path): return []
+    records = []
+    with open(manifest_path, encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line: continue
+            try: records.append(json.loads(line))
+            except json.JSONDecodeError: print(f"Warning: Skipping unreadable manifest line in {manifest_path}: {line[:80]}")
+    return records
+
+
+def schema_hash(columns: list) -> str:
+    return hashlib.sha1(json.dumps([str(col) for col in columns], ensure_ascii=False).encode("utf-8")).hexdigest()[:16]
+
+
+class DatasetManifest:
+    """Index of every scraped output file under one data directory: its data type (player, squad,
+    squad_against, fixtures), competition, season, category, row count, schema hash and source URL.
+
+    There is one current file per (data type, competition, season, category); recording a new file for
+    the same dataset replaces the old entry. Paths are stored relative to the directory of the manifest,
+    so the data directory can be moved. Safe to share between threads."""
+
+    def __init__(self, manifest_path: str):
+        self.manifest_path = manifest_path
+        self.root_dir = os.path.dirname(os.path.abspath(manifest_path))
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(manifest_path, check_same_thread=False)
+        self.conn.execute("""CREATE TABLE IF NOT EXISTS outputs (
+            data_type TEXT NOT NULL, competition TEXT NOT NULL, season TEXT NOT NULL, category TEXT NOT NULL,
+            path TEXT NOT NULL, rows INTEGER, schema_hash TEXT, source_url TEXT, written_at REAL NOT NULL,
+            PRIMARY KEY (data_type, competition, season, category))""")
+        self.conn.commit()
+
+    def absolute_path(self, rel_path: str) -> str:
+        return os.path.join(self.root_dir, rel_path)
+
+    def record_output(self, path: str, data_type: str, competition: str, season: str, category: str,
+                      rows: Optional[int] = None, columns: Optional[list] = None, source_url: Optional[str] = None,
+                      written_at: Optional[float] = None):
+        rel_path = os.path.relpath(os.path.abspath(path), self.root_dir)
+        with self.lock:
+            self.conn.execute("INSERT OR REPLACE INTO outputs VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                              (data_type, competition, season, category, rel_path, rows, schema_hash(columns) if columns is not None else None,
+                               source_url, written_at or time.time()))
+            self.conn.commit()
+
+    def outputs(self, data_type: Optional[str] = None) -> List[Dict]:
+        """Entries (of one data type), with 'path' made absolute."""
+        sql = "SELECT data_type, competition, season, category, path, rows, schema_hash, source_url, written_at FROM outputs"
+        with self.lock:
+            rows = self.conn.execute(sql + " WHERE data_type = ?", (data_type,)).fetchall() if data_type else self.conn.execute(sql).fetchall()
+        keys = ["data_type", "competition", "season", "category", "path", "rows", "schema_hash", "source_url", "written_at"]
+        return [{**dict(zip(keys, row)), "path": self.absolute_path(row[4])} for row in rows]
+
+    def forget_missing(self) -> int:
+        """Drops entries whose file no longer exists. Returns how many were dropped."""
+        missing = [(e['data_type'], e['competition'], e['season'], e['category']) for e in self.outputs() if not os.path.isfile(e['path'])]
+        with self.lock:
+            self.conn.executemany("DELETE FROM outputs WHERE data_type = ? AND competition = ? AND season = ? AND category = ?", missing)
+            self.conn.commit()
+        return len(missing)
+
+    def close(self):
+        with self.lock:
+            if self.conn is not None: self.conn.close(); self.conn = None
+
+
+_active_manifest: Optional[DatasetManifest] = None
+
+
+def use_dataset_manifest(manifest_path: Optional[str]) -> Optional[DatasetManifest]:
+    """Makes the manifest at `manifest_path` (None: none) the one `record_saved_output` writes to."""
+    global _active_manifest
+    if _active_manifest is not None and manifest_path and _active_manifest.manifest_path == manifest_path: return _active_manifest
+    if _active_manifest is not None: _active_manifest.close()
+    _active_manifest = DatasetManifest(manifest_path) if manifest_path else None
+    return _active_manifest
+
+
+def record_saved_output(path: str, df, entry: Dict):
+    """Records a just-written scraper output in the active manifest, if there is one. `entry` holds
+    its data_type, competition, season, category and source_url."""
+    if _active_manifest is not None: _active_manifest.record_output(path, rows=len(df), columns=list(df.columns), **entry)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Summarise the dataset manifest of a data directory.")
+    parser.add_argument("--data_dir", type=str, default="output_data")
+    args = parser.parse_args()
+
+    manifest_path = os.path.join(args.data_dir, DATASET_MANIFEST_FILENAME)
+    if not os.path.isfile(manifest_path): print(f"No dataset manifest at {manifest_path}; run combine_fbref_data.py --reindex to build one."); raise SystemExit(1)
+    manifest = DatasetManifest(manifest_path)
+    try:
+        summary: Dict[tuple, Dict] = {}
+        for entry in manifest.outputs():
+            group = summary.setdefault((entry['data_type'], entry['competition']), {"files": 0, "rows": 0, "seasons": set(), "missing": 0})
+            group["files"] += 1; group["rows"] += entry['rows'] or 0; group["seasons"].add(entry['season'])
+            group["missing"] += not os.path.isfile(entry['path'])
+        for (data_type, competition), group in sorted(summary.items()):
+            seasons = sorted(group["seasons"])
+            print(f"  {data_type:<14} {competition:<26} {group['files']:>5} file(s) {group['rows']:>9} rows  {seasons[0]}..{seasons[-1]}"
+                  + (f"  ({group['missing']} missing)" if group["missing"] else ""))
+    finally:
+        manifest.close()
@@ -0,0 +1,210 @@
+from __future__ import annotations
+import json
+import time
+import sqlite3
+import hashlib
+import argparse
+import threading
+from typing import Callable, Dict, List, Optional
+
+from lazy_imports import lazy_import
+from page_cache import season_is_finished
+
+pd = lazy_import("pandas")
+
+DELTA_STORE_FILENAME = "delta_store.sqlite"
+DEFAULT_KEEP_VERSIONS = 30
+# Natural key of a row per data type; columns missing from a table are left out of its key.
+NATURAL_KEYS = {"player": ["Player", "Squad", "Born"], "squad": ["Squad", "Comp"], "squad_against": ["Squad", "Comp"],
+                "fixtures": ["Date", "Home", "Away"]}
+CHANGE_INSERT, CHANGE_UPDATE, CHANGE_REMOVE = "insert", "update", "remove"
+
+
+def dataset_key(data_type: str, competition: str, season: str, category: str) -> str:
+    return f"{data_type}|{competition}|{season}|{category}"
+
+
+def row_keys(df: pd.DataFrame, data_type: str) -> List[str]:
+    """Natural key of every row as a string; repeated keys get an occurrence number, in table order."""
+    from stat_schemas import normalise_join_key
+    key_cols = [col for col in NATURAL_KEYS.get(data_type, []) if col in df.columns] or list(df.columns)
+    return ["|".join(str(part) for part in key) for key in normalise_join_key(df, key_cols)]
+
+
+class DeltaStore:
+    """Versioned row store for tables that are scraped again and again (current-season pages).
+
+    Every snapshot of a table (a dataset, see `dataset_key`) is compared row by row, by natural key and
+    row hash, with the stored current rows; only inserted, updated and removed rows are written, as a
+    new version. Readers ask for `changes_since(dataset, version)` instead of re-reading the table.
+    Change records older than the last `keep_versions` versions are compacted away (the current rows are
+    always kept); asking for changes from before that raises ValueError, and the reader should take a
+    full `snapshot` instead. Safe to share between threads."""
+
+    def __init__(self, store_path: str, keep_versions: int = DEFAULT_KEEP_VERSIONS):
+        self.store_path = store_path
+        self.keep_versions = max(1, keep_versions)
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(store_path, check_same_thread=False)
+        self.conn.executescript("""
+            CREATE TABLE IF NOT EXISTS versions (dataset TEXT NOT NULL, version INTEGER NOT NULL, created_at REAL NOT NULL, source_url TEXT,
+                columns TEXT NOT NULL, inserted INTEGER NOT NULL, updated INTEGER NOT NULL, removed INTEGER NOT NULL, PRIMARY KEY (dataset, version));
+            CREATE TABLE IF NOT EXISTS current_rows (dataset TEXT NOT NULL, row_key TEXT NOT NULL, position INTEGER NOT NULL, row_hash TEXT NOT NULL,
+                row_json TEXT NOT NULL, PRIMARY KEY (dataset, row_key));
+            CREATE TABLE IF NOT EXISTS changes (dataset TEXT NOT NULL, version INTEGER NOT NULL, row_key TEXT NOT NULL, change TEXT NOT NULL,
+                row_json TEXT, PRIMARY KEY (dataset, version, row_key));
+            CREATE TABLE IF NOT EXISTS compactions (dataset TEXT PRIMARY KEY, compacted_through INTEGER NOT NULL);""")
+
+    def _current_version(self, dataset: str) -> int:
+        return self.conn.execute("SELECT COALESCE(MAX(version), 0) FROM versions WHERE dataset = ?", (dataset,)).fetchone()[0]
+
+    def _compacted_through(self, dataset: str) -> int:
+        row = self.conn.execute("SELECT compacted_through FROM compactions WHERE dataset = ?", (dataset,)).fetchone()
+        return row[0] if row else 0
+
+    def current_version(self, dataset: str) -> int:
+        with self.lock: return self._current_version(dataset)
+
+    def apply_snapshot(self, dataset: str, df: pd.DataFrame, data_type: str, source_url: Optional[str] = None,
+                       before_commit: Optional[Callable[[Dict], None]] = None) -> Dict:
+        """Stores a fresh scrape of `dataset` as the delta against its current rows. Returns the version
+        (unchanged when nothing changed) and the inserted / updated / removed row counts. When rows
+        changed, `before_commit(result)` runs before the new version is stored (e.g. to write the table
+        out); if it raises, nothing is stored and the next snapshot sees the same changes again."""
+        keys = row_keys(df, data_type)
+        records = json.loads(df.to_json(orient="records", force_ascii=False))
+        row_jsons = [json.dumps(record, ensure_ascii=False, sort_keys=True) for record in records]
+        new_rows = {key: (position, hashlib.sha1(row_json.encode("utf-8")).hexdigest(), row_json)
+                    for position, (key, row_json) in enumerate(zip(keys, row_jsons))}
+        columns = json.dumps([str(col) for col in df.columns], ensure_ascii=False)
+        with self.lock:
+            old_rows = {key: (position, row_hash) for key, position, row_hash in
+                        self.conn.execute("SELECT row_key, position, row_hash FROM current_rows WHERE dataset = ?", (dataset,))}
+            inserted = [key for key in new_rows if key not in old_rows]
+            updated = [key for key in new_rows if key in old_rows and old_rows[key][1] != new_rows[key][1]]
+            removed = [key for key in old_rows if key not in new_rows]
+            moved = [key for key in new_rows if key in old_rows and key not in updated and old_rows[key][0] != new_rows[key][0]]
+            version = self._current_version(dataset)
+            last_columns = self.conn.execute("SELECT columns FROM versions WHERE dataset = ? AND version = ?", (dataset, version)).fetchone()
+            if not (inserted or updated or removed) and last_columns and last_columns[0] == columns:
+                if moved:
+                    with self.conn:
+                        self.conn.executemany("UPDATE current_rows SET position = ? WHERE dataset = ? AND row_key = ?", [(new_rows[k][0], dataset, k) for k in moved])
+                return {"dataset": dataset, "version": version, "changed": False, "inserted": 0, "updated": 0, "removed": 0}
+            version += 1
+            result = {"dataset": dataset, "version": version, "changed": True, "inserted": len(inserted), "updated": len(updated), "removed": len(removed)}
+            if before_commit is not None: before_commit(result)
+            with self.conn:
+                self.conn.execute("INSERT INTO versions VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                                  (dataset, version, time.time(), source_url, columns, len(inserted), len(updated), len(removed)))
+                self.conn.executemany("INSERT INTO changes VALUES (?, ?, ?, ?, ?)",
+                                      [(dataset, version, k, CHANGE_INSERT, new_rows[k][2]) for k in inserted] +
+                                      [(dataset, version, k, CHANGE_UPDATE, new_rows[k][2]) for k in updated] +
+                                      [(dataset, version, k, CHANGE_REMOVE, None) for k in removed])
+                self.conn.executemany("DELETE FROM current_rows WHERE dataset = ? AND row_key = ?", [(dataset, k) for k in removed])
+                self.conn.executemany("INSERT OR REPLACE INTO current_rows VALUES (?, ?, ?, ?, ?)", [(dataset, k, *new_rows[k]) for k in inserted + updated])
+                self.conn.executemany("UPDATE current_rows SET position = ? WHERE dataset = ? AND row_key = ?", [(new_rows[k][0], dataset, k) for k in moved])
+            if version - self._compacted_through(dataset) > 2 * self.keep_versions: self._compact(dataset, self.keep_versions)
+        return result
+
+    def changes_since(self, dataset: str, version: int) -> pd.DataFrame:
+        """Net change of every row changed after `version`: one row per key with `_change` (insert,
+        update or remove, relative to `version`), `_version` (the latest version that changed it),
+        `_row_key` and the row's current values (empty for removed rows)."""
+        with self.lock:
+            compacted_through = self._compacted_through(dataset)
+            if version < compacted_through:
+                raise ValueError(f"Changes of {dataset} up to version {compacted_through} were compacted; read snapshot() instead.")
+            rows = self.conn.execute("SELECT version, row_key, change, row_json FROM changes WHERE dataset = ? AND version > ? ORDER BY version",
+                                     (dataset, version)).fetchall()
+        first_change, latest = {}, {}
+        for change_version, key, change, row_json in rows:
+            first_change.setdefault(key, change)
+            latest[key] = (change_version, change, row_json)
+        records = []
+        for key, (change_version, change, row_json) in latest.items():
+            if first_change[key] == CHANGE_INSERT and change == CHANGE_REMOVE: continue  # added and removed again since `version`
+            net_change = CHANGE_REMOVE if change == CHANGE_REMOVE else CHANGE_INSERT if first_change[key] == CHANGE_INSERT else CHANGE_UPDATE
+            records.append({"_change": net_change, "_version": change_version, "_row_key": key, **(json.loads(row_json) if row_json else {})})
+        return pd.DataFrame(records, columns=["_change", "_version", "_row_key"] + self._columns(dataset)) if records else pd.DataFrame(columns=["_change", "_version", "_row_key"])
+
+    def _columns(self, dataset: str) -> List[str]:
+        with self.lock:
+            row = self.conn.execute("SELECT columns FROM versions WHERE dataset = ? ORDER BY version DESC LIMIT 1", (dataset,)).fetchone()
+        return json.loads(row[0]) if row else []
+
+    def snapshot(self, dataset: str) -> pd.DataFrame:
+        """The current rows of `dataset`, in the order of its latest scrape."""
+        columns = self._columns(dataset)
+        with self.lock:
+            rows = self.conn.execute("SELECT row_json FROM current_rows WHERE dataset = ? ORDER BY position", (dataset,)).fetchall()
+        return pd.DataFrame([json.loads(row_json) for row_json, in rows], columns=columns)
+
+    def _compact(self, dataset: str, keep_versions: int) -> int:
+        compact_through = self._current_version(dataset) - keep_versions
+        if compact_through <= self._compacted_through(dataset): return 0
+        with self.conn:
+            dropped = self.conn.execute("DELETE FROM changes WHERE dataset = ? AND version <= ?", (dataset, compact_through)).rowcount
+            self.conn.execute("INSERT OR REPLACE INTO compactions VALUES (?, ?)", (dataset, compact_through))
+        return dropped
+
+    def compact(self, dataset: Optional[str] = None, keep_versions: Optional[int] = None) -> int:
+        """Drops the change records of all but the last `keep_versions` versions of `dataset` (default:
+        every dataset). Returns the number of change records dropped."""
+        with self.lock:
+            datasets = [dataset] if dataset else [row[0] for row in self.conn.execute("SELECT DISTINCT dataset FROM versions")]
+            return sum(self._compact(name, keep_versions or self.keep_versions) for name in datasets)
+
+    def datasets(self) -> List[Dict]:
+        with self.lock:
+            rows = self.conn.execute("""SELECT v.dataset, MAX(v.version), (SELECT COUNT(*) FROM current_rows r WHERE r.dataset = v.dataset),
+                                        COALESCE((SELECT compacted_through FROM compactions c WHERE c.dataset = v.dataset), 0)
+                                        FROM versions v GROUP BY v.dataset ORDER BY v.dataset""").fetchall()
+        return [{"dataset": name, "version": version, "rows": n_rows, "compacted_through": compacted} for name, version, n_rows, compacted in rows]
+
+    def close(self):
+        with self.lock:
+            if self.conn is not None: self.conn.close(); self.conn = None
+
+
+_active_store: Optional[DeltaStore] = None
+
+
+def use_delta_store(store_path: Optional[str]) -> Optional[DeltaStore]:
+    """Makes the store at `store_path` (None: none) the one `record_table_delta` writes to."""
+    global _active_store
+    if _active_store is not None and store_path and _active_store.store_path == store_path: return _active_store
+    if _active_store is not None: _active_store.close()
+    _active_store = DeltaStore(store_path) if store_path else None
+    return _active_store
+
+
+def record_table_delta(df: pd.DataFrame, entry: Dict, before_commit: Optional[Callable[[Dict], None]] = None) -> Optional[Dict]:
+    """Stores a freshly scraped table (described like a dataset manifest entry) as a delta in the active
+    store, calling `before_commit` first when rows changed (see `DeltaStore.apply_snapshot`). Only
+    seasons still in progress are tracked; finished seasons are scraped once. Returns the
+    `apply_snapshot` result, or None when the table is not tracked."""
+    if _active_store is None or season_is_finished(entry['season']): return None
+    return _active_store.apply_snapshot(dataset_key(entry['data_type'], entry['competition'], entry['season'], entry['category']),
+                                        df, entry['data_type'], entry.get('source_url'), before_commit)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Inspect, read or compact the row-level delta store of re-scraped tables.")
+    parser.add_argument("--store", type=str, default=f"output_data/{DELTA_STORE_FILENAME}")
+    parser.add_argument("--dataset", type=str, default=None, help="Dataset key, e.g. 'player|Big 5 European Leagues|2024-2025|standard'.")
+    parser.add_argument("--since", type=int, default=None, help="With --dataset, write the rows changed after this version as CSV to stdout.")
+    parser.add_argument("--compact", action="store_true", help="Drop change records of all but the last --keep_versions versions.")
+    parser.add_argument("--keep_versions", type=int, default=DEFAULT_KEEP_VERSIONS)
+    args = parser.parse_args()
+
+    store = DeltaStore(args.store, args.keep_versions)
+    try:
+        if args.compact: print(f"Compacted {store.compact(args.dataset)} change record(s).")
+        if args.dataset and args.since is not None:
+            print(store.changes_since(args.dataset, args.since).to_csv(index=False), end="")
+        else:
+            for info in store.datasets():
+                print(f"  {info['dataset']:<60} v{info['version']:<5} {info['rows']:>6} rows  (changes kept after v{info['compacted_through']})")
+    finally:
+        store.close()
@@ -0,0 +1,51 @@
+import os
+import argparse
+import threading
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+from page_cache import url_to_page_filename
+
+
+class SavedPageHandler(BaseHTTPRequestHandler):
+    pages_dir = "."
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        page_path = os.path.join(self.pages_dir, url_to_page_filename(self.path))
+        if not os.path.isfile(page_path):
+            self.send_error(404, f"No saved page for {self.path}"); return
+        page_stat = os.stat(page_path)
+        etag = f'"{page_stat.st_mtime_ns:x}-{page_stat.st_size:x}"'
+        if self.headers.get("If-None-Match") == etag:
+            self.send_response(304); self.send_header("ETag", etag); self.end_headers(); return
+        with open(page_path, "rb") as f: body = f.read()
+        self.send_response(200)
+        self.send_header("ETag", etag)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_stand_in_server(pages_dir: str, host: str = "127.0.0.1", port: int = 0) -> ThreadingHTTPServer:
+    """Serves saved FBRef pages from `pages_dir` on a background thread. Use port 0 for a free port;
+    the scraper can then be pointed at it with --base_url http://127.0.0.1:<server.server_port>."""
+    handler = type("BoundSavedPageHandler", (SavedPageHandler,), {"pages_dir": os.path.abspath(pages_dir)})
+    server = ThreadingHTTPServer((host, port), handler)
+    threading.Thread(target=server.serve_forever, name="fbref-stand-in", daemon=True).start()
+    return server
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Serve saved FBRef pages locally as a stand-in for fbref.com.")
+    parser.add_argument("--pages_dir", type=str, required=True, help="Directory of pages saved with the scraper's --save_pages option.")
+    parser.add_argument("--port", type=int, default=8765, help="Port to listen on (default: 8765).")
+    args = parser.parse_args()
+
+    server = start_stand_in_server(args.pages_dir, port=args.port)
+    print(f"Serving saved pages from {args.pages_dir} on http://127.0.0.1:{server.server_port} (Ctrl+C to stop)")
+    try: threading.Event().wait()
+    except KeyboardInterrupt: server.shutdown()
@@ -0,0 +1,148 @@
+import json
+import sqlite3
+import hashlib
+import argparse
+import threading
+from typing import Callable, Dict, List, Optional
+
+HEADER_REGISTRY_FILENAME = "header_registry.sqlite"
+
+
+def header_signature(stage: str, columns: list) -> str:
+    """Identifies a raw header layout: the cleaning stage plus every column label (tuples for
+    two-level FBRef headers), in order."""
+    labels = [[str(part) for part in col] if isinstance(col, tuple) else str(col) for col in columns]
+    return hashlib.sha1(json.dumps([stage, labels], ensure_ascii=False).encode("utf-8")).hexdigest()
+
+
+def master_schema_key(label: str) -> str:
+    return f"master:{label}"
+
+
+class HeaderRegistry:
+    """Cleaned column names per raw header layout, computed once by the regex cleaners and then looked
+    up by signature, plus pinned names that keep schemas stable between runs:
+
+    - per stat category, the name first given to each FBRef column (its data-stat), so a table whose
+      header text drifts (xG vs xG1, an extra duplicate suffix) still gets the names of earlier runs;
+    - per master file, the column order of earlier runs, so masters keep the same schema (new columns
+      are appended, columns missing from this run stay as empty columns).
+
+    Without `registry_path` everything lives in memory for the process; with one it is kept in SQLite.
+    Safe to share between threads."""
+
+    def __init__(self, registry_path: Optional[str] = None):
+        self.registry_path = registry_path
+        self.lock = threading.Lock()
+        self.mappings: Dict[str, List[str]] = {}
+        self.pinned_names: Dict[tuple, str] = {}
+        self.schemas: Dict[str, List[str]] = {}
+        self.conn = None
+        if registry_path:
+            self.conn = sqlite3.connect(registry_path, check_same_thread=False)
+            self.conn.executescript("""
+                CREATE TABLE IF NOT EXISTS header_mappings (signature TEXT PRIMARY KEY, stage TEXT NOT NULL, raw_columns TEXT NOT NULL, cleaned_columns TEXT NOT NULL);
+                CREATE TABLE IF NOT EXISTS pinned_names (schema TEXT NOT NULL, data_stat TEXT NOT NULL, name TEXT NOT NULL, PRIMARY KEY (schema, data_stat));
+                CREATE TABLE IF NOT EXISTS schema_columns (schema TEXT NOT NULL, position INTEGER NOT NULL, name TEXT NOT NULL, PRIMARY KEY (schema, position));""")
+            self.mappings = {signature: json.loads(cleaned) for signature, cleaned in self.conn.execute("SELECT signature, cleaned_columns FROM header_mappings")}
+            self.pinned_names = {(schema, data_stat): name for schema, data_stat, name in self.conn.execute("SELECT schema, data_stat, name FROM pinned_names")}
+            for schema, name in self.conn.execute("SELECT schema, name FROM schema_columns ORDER BY schema, position"):
+                self.schemas.setdefault(schema, []).append(name)
+
+    def _store(self, sql: str, rows: list):
+        if self.conn is None or not rows: return
+        self.conn.executemany(sql, rows); self.conn.commit()
+
+    def cleaned_names(self, stage: str, columns: list, cleaner: Callable[[list], list]) -> List[str]:
+        """`cleaner(columns)` for this header layout, computed on first sight only."""
+        signature = header_signature(stage, columns)
+        with self.lock:
+            cached = self.mappings.get(signature)
+        if cached is not None: return list(cached)
+        cleaned = list(cleaner(list(columns)))
+        with self.lock:
+            self.mappings[signature] = cleaned
+            self._store("INSERT OR REPLACE INTO header_mappings VALUES (?, ?, ?, ?)",
+                        [(signature, stage, json.dumps([list(map(str, c)) if isinstance(c, tuple) else str(c) for c in columns], ensure_ascii=False), json.dumps(cleaned))])
+        return list(cleaned)
+
+    def pin_names(self, schema: str, data_stats: list, names: List[str]) -> List[str]:
+        """`names` with every column whose data-stat was seen before in `schema` renamed to its pinned
+        name; new data-stats are pinned to their current name. Columns without (or with a repeated)
+        data-stat keep their names, and the table keeps all its names if pinning would create duplicates."""
+        stat_counts: Dict[str, int] = {}
+        for data_stat in data_stats: stat_counts[data_stat] = stat_counts.get(data_stat, 0) + 1
+        pinned, new_pins = list(names), []
+        with self.lock:
+            for i, (data_stat, name) in enumerate(zip(data_stats, names)):
+                if not data_stat or stat_counts[data_stat] > 1: continue
+                existing = self.pinned_names.get((schema, data_stat))
+                if existing is None: new_pins.append((schema, data_stat, name))
+                else: pinned[i] = existing
+            if len(set(pinned)) != len(pinned):
+                print(f"-> Pinned column names of {schema} would repeat a name; keeping this table's own names.")
+                return list(names)
+            for schema_name, data_stat, name in new_pins: self.pinned_names[(schema_name, data_stat)] = name
+            self._store("INSERT OR IGNORE INTO pinned_names VALUES (?, ?, ?)", new_pins)
+        return pinned
+
+    def conform(self, schema: str, columns: List[str]) -> List[str]:
+        """Column order of `schema`: the columns of earlier runs in their order, then any new ones in
+        `columns` (which are remembered from now on)."""
+        with self.lock:
+            known = self.schemas.setdefault(schema, [])
+            known_set = set(known)
+            added = [col for col in columns if col not in known_set]
+            if added:
+                self._store("INSERT INTO schema_columns VALUES (?, ?, ?)", [(schema, len(known) + i, col) for i, col in enumerate(added)])
+                known.extend(added)
+            return list(known)
+
+    def forget(self, schema: str):
+        """Drops the pinned names and column order of `schema`, so the next run pins them afresh."""
+        with self.lock:
+            self.schemas.pop(schema, None)
+            self.pinned_names = {key: name for key, name in self.pinned_names.items() if key[0] != schema}
+            if self.conn is not None:
+                with self.conn:
+                    self.conn.execute("DELETE FROM schema_columns WHERE schema = ?", (schema,))
+                    self.conn.execute("DELETE FROM pinned_names WHERE schema = ?", (schema,))
+
+    def close(self):
+        with self.lock:
+            if self.conn is not None: self.conn.close(); self.conn = None
+
+
+_active_registry = HeaderRegistry()
+
+
+def active_header_registry() -> HeaderRegistry:
+    return _active_registry
+
+
+def use_header_registry(registry_path: Optional[str]) -> HeaderRegistry:
+    """Makes the registry at `registry_path` (None: a fresh in-memory one) the one the cleaners use."""
+    global _active_registry
+    if registry_path and _active_registry.registry_path == registry_path: return _active_registry
+    _active_registry.close()
+    _active_registry = HeaderRegistry(registry_path)
+    return _active_registry
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Inspect or reset the header-mapping registry used by the scraper and the combiner.")
+    parser.add_argument("--registry", type=str, default=f"output_data/{HEADER_REGISTRY_FILENAME}")
+    parser.add_argument("--forget", nargs='+', default=None, metavar="SCHEMA", help="Schemas to re-pin on the next run, e.g. master:player or player:shooting.")
+    args = parser.parse_args()
+
+    registry = HeaderRegistry(args.registry)
+    try:
+        for schema in args.forget or []:
+            registry.forget(schema); print(f"Forgot the pinned names and columns of {schema}.")
+        print(f"{len(registry.mappings)} header layout(s) memoised in {args.registry}")
+        schemas = sorted(set(registry.schemas) | {schema for schema, _ in registry.pinned_names})
+        for schema in schemas:
+            n_pinned = sum(1 for key in registry.pinned_names if key[0] == schema)
+            print(f"  {schema:<28} {len(registry.schemas.get(schema, [])):>4} column(s) in order, {n_pinned:>4} pinned name(s)")
+    finally:
+        registry.close()
@@ -0,0 +1,17 @@
+import importlib
+from types import ModuleType
+
+
+class LazyModule(ModuleType):
+    """Stands in for a module until one of its attributes is first used, then imports it. Lets the
+    scraper start (--help, --plan, argument errors) without paying for pandas, selenium or bs4."""
+
+    def __getattr__(self, attribute: str):
+        module = importlib.import_module(self.__name__)
+        # Later lookups find the attributes directly instead of coming back here.
+        self.__dict__.update(module.__dict__)
+        return getattr(module, attribute)
+
+
+def lazy_import(module_name: str) -> ModuleType:
+    return LazyModule(module_name)
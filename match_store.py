@@ -0,0 +1,196 @@
+import os
+import re
+import sqlite3
+import hashlib
+import argparse
+import threading
+import pandas as pd
+from typing import Dict, Optional
+
+DEFAULT_FIXTURES_CSV = os.path.join("output_data", "MASTER_MATCH_FIXTURES.csv")
+DEFAULT_MATCH_DB = os.path.join("output_data", "matches.sqlite")
+# "2–1", or "(4) 1–1 (3)" when the tie went to a penalty shootout; FBRef uses an en dash.
+SCORE_PATTERN = r'^\s*(?:\((?P<home_pens>\d+)\)\s*)?(?P<home_goals>\d+)\s*[–—-]\s*(?P<away_goals>\d+)(?:\s*\((?P<away_pens>\d+)\))?\s*$'
+# Champions League fixtures carry the club's country code: "Santa Coloma ad" at home, "am Banants" away.
+HOME_COUNTRY_SUFFIX = r'\s+[a-z]{2,3}$'
+AWAY_COUNTRY_PREFIX = r'^[a-z]{2,3}\s+'
+
+MATCH_COLUMNS = ["match_id", "competition", "season", "round", "matchweek", "date", "kickoff", "home_team_id", "away_team_id",
+                 "home_goals", "away_goals", "home_pens", "away_pens", "home_xg", "away_xg", "result", "winner_team_id",
+                 "attendance", "venue", "referee", "notes"]
+TEAM_MATCH_COLUMNS = ["team_id", "opponent_id", "match_id", "competition", "season", "kickoff", "is_home",
+                      "goals_for", "goals_against", "pens_for", "pens_against", "xg_for", "xg_against", "points"]
+
+
+def team_id_for(team_name: str) -> str:
+    """Stable id of a team: the same name always maps to the same id, whatever order matches are loaded in."""
+    return hashlib.sha1(team_name.encode("utf-8")).hexdigest()[:12]
+
+
+def _stable_ids(values: pd.Series) -> pd.Series:
+    unique = values.dropna().unique()
+    return values.map(dict(zip(unique, (team_id_for(v) for v in unique))))
+
+
+def _first_column(df: pd.DataFrame, *names: str) -> pd.Series:
+    for name in names:
+        if name in df.columns: return df[name]
+    return pd.Series(pd.NA, index=df.index, dtype=object)
+
+
+def parse_fixtures(fixtures_df: pd.DataFrame) -> tuple[pd.DataFrame, pd.DataFrame]:
+    """Normalises a combined fixtures frame (MASTER_MATCH_FIXTURES.csv) into typed match rows and a
+    team table. Repeated header rows and spacer rows are dropped; unplayed fixtures are kept with empty
+    goals. Home/away xG are the xG columns either side of Score, whatever the header de-duplication
+    named them. Returns (matches, teams)."""
+    df = fixtures_df[fixtures_df['Date'].notna() & fixtures_df['Home'].notna() & fixtures_df['Away'].notna()]
+    df = df[(df['Home'] != 'Home') & (df['Date'] != 'Date')].reset_index(drop=True)
+
+    home_names = df['Home'].astype(str).str.strip().str.replace(HOME_COUNTRY_SUFFIX, '', regex=True)
+    away_names = df['Away'].astype(str).str.strip().str.replace(AWAY_COUNTRY_PREFIX, '', regex=True)
+    score = df['Score'].astype('string').str.extract(SCORE_PATTERN)
+    xg_columns = [col for col in df.columns if re.fullmatch(r'xG(_?\d+)?', str(col))]
+    date = pd.to_datetime(df['Date'], format='%Y-%m-%d', errors='coerce')
+    kickoff_time = _first_column(df, 'Time').astype('string').str.extract(r'^(\d{1,2}:\d{2})', expand=False)
+    kickoff = pd.to_datetime(date.dt.strftime('%Y-%m-%d') + ' ' + kickoff_time.fillna('00:00'), format='%Y-%m-%d %H:%M', errors='coerce')
+
+    matches = pd.DataFrame({
+        "competition": df['Competition'].astype(str), "season": df['Season'].astype(str),
+        "round": _first_column(df, 'Round').astype('string').fillna(pd.to_numeric(_first_column(df, 'Wk'), errors='coerce').astype('Int64').astype('string')),
+        "matchweek": pd.to_numeric(_first_column(df, 'Wk'), errors='coerce').astype('Int64'),
+        "date": date.dt.strftime('%Y-%m-%d'), "kickoff": kickoff.dt.strftime('%Y-%m-%d %H:%M:%S'),
+        "home_team_id": _stable_ids(home_names), "away_team_id": _stable_ids(away_names),
+        "home_goals": pd.to_numeric(score['home_goals']).astype('Int64'), "away_goals": pd.to_numeric(score['away_goals']).astype('Int64'),
+        "home_pens": pd.to_numeric(score['home_pens']).astype('Int64'), "away_pens": pd.to_numeric(score['away_pens']).astype('Int64'),
+        "home_xg": pd.to_numeric(df[xg_columns[0]], errors='coerce') if len(xg_columns) > 0 else pd.NA,
+        "away_xg": pd.to_numeric(df[xg_columns[1]], errors='coerce') if len(xg_columns) > 1 else pd.NA,
+        "attendance": pd.to_numeric(_first_column(df, 'Attendance').astype('string').str.replace(',', ''), errors='coerce').astype('Int64'),
+        "venue": _first_column(df, 'Venue').astype('string'), "referee": _first_column(df, 'Referee').astype('string'),
+        "notes": _first_column(df, 'Notes').astype('string'),
+    })
+    matches = matches[matches['date'].notna()]
+    home_won = matches['home_goals'] > matches['away_goals']; away_won = matches['home_goals'] < matches['away_goals']
+    matches['result'] = pd.Series(pd.NA, index=matches.index, dtype='string')
+    matches.loc[home_won.fillna(False), 'result'] = 'H'; matches.loc[away_won.fillna(False), 'result'] = 'A'
+    matches.loc[(matches['home_goals'] == matches['away_goals']).fillna(False), 'result'] = 'D'
+    # A drawn tie decided on penalties still has a winner.
+    home_advances = home_won.fillna(False) | (matches['home_pens'] > matches['away_pens']).fillna(False)
+    away_advances = away_won.fillna(False) | (matches['home_pens'] < matches['away_pens']).fillna(False)
+    matches['winner_team_id'] = matches['home_team_id'].where(home_advances, matches['away_team_id'].where(away_advances))
+    matches['match_id'] = [hashlib.sha1("|".join(map(str, key)).encode("utf-8")).hexdigest()[:16]
+                           for key in zip(matches['competition'], matches['season'], matches['date'], matches['home_team_id'], matches['away_team_id'])]
+    matches = matches.drop_duplicates('match_id', keep='last')[MATCH_COLUMNS].reset_index(drop=True)
+
+    names = pd.concat([home_names, away_names]).drop_duplicates()
+    teams = pd.DataFrame({"team_id": [team_id_for(name) for name in names], "name": names.to_numpy()})
+    return matches, teams
+
+
+def team_match_rows(matches: pd.DataFrame) -> pd.DataFrame:
+    """Two rows per match, one from each side's point of view, for per-team lookups."""
+    sides = []
+    for side, other, is_home in (("home", "away", 1), ("away", "home", 0)):
+        rows = pd.DataFrame({
+            "team_id": matches[f"{side}_team_id"], "opponent_id": matches[f"{other}_team_id"], "match_id": matches['match_id'],
+            "competition": matches['competition'], "season": matches['season'], "kickoff": matches['kickoff'], "is_home": is_home,
+            "goals_for": matches[f"{side}_goals"], "goals_against": matches[f"{other}_goals"],
+            "pens_for": matches[f"{side}_pens"], "pens_against": matches[f"{other}_pens"],
+            "xg_for": matches[f"{side}_xg"], "xg_against": matches[f"{other}_xg"]})
+        rows['points'] = (3 * (rows['goals_for'] > rows['goals_against']) + (rows['goals_for'] == rows['goals_against'])).astype('Int64')
+        sides.append(rows)
+    return pd.concat(sides, ignore_index=True)[TEAM_MATCH_COLUMNS]
+
+
+def _sql_rows(df: pd.DataFrame) -> list:
+    return [tuple(None if pd.isna(v) else v.item() if hasattr(v, 'item') else v for v in row) for row in df.itertuples(index=False, name=None)]
+
+
+class MatchStore:
+    """Typed match results in SQLite, built from the combined fixtures.
+
+    `matches` holds one row per fixture (integer goals and shootout penalties, ISO dates, xG, stable
+    team ids), `team_matches` one row per team per fixture, indexed on (team_id, kickoff) so form
+    lookups before a date are index range scans; `matches` is indexed on (competition, season)."""
+
+    def __init__(self, db_path: str = DEFAULT_MATCH_DB):
+        os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(db_path, check_same_thread=False)
+        self.conn.executescript("""
+            CREATE TABLE IF NOT EXISTS teams (team_id TEXT PRIMARY KEY, name TEXT NOT NULL);
+            CREATE TABLE IF NOT EXISTS matches (
+                match_id TEXT PRIMARY KEY, competition TEXT NOT NULL, season TEXT NOT NULL, round TEXT, matchweek INTEGER,
+                date TEXT NOT NULL, kickoff TEXT NOT NULL, home_team_id TEXT NOT NULL, away_team_id TEXT NOT NULL,
+                home_goals INTEGER, away_goals INTEGER, home_pens INTEGER, away_pens INTEGER, home_xg REAL, away_xg REAL,
+                result TEXT, winner_team_id TEXT, attendance INTEGER, venue TEXT, referee TEXT, notes TEXT);
+            CREATE TABLE IF NOT EXISTS team_matches (
+                team_id TEXT NOT NULL, opponent_id TEXT NOT NULL, match_id TEXT NOT NULL, competition TEXT NOT NULL, season TEXT NOT NULL,
+                kickoff TEXT NOT NULL, is_home INTEGER NOT NULL, goals_for INTEGER, goals_against INTEGER, pens_for INTEGER,
+                pens_against INTEGER, xg_for REAL, xg_against REAL, points INTEGER, PRIMARY KEY (team_id, match_id));
+            CREATE INDEX IF NOT EXISTS matches_competition_season ON matches (competition, season);
+            CREATE INDEX IF NOT EXISTS matches_kickoff ON matches (kickoff);
+            CREATE INDEX IF NOT EXISTS team_matches_team_kickoff ON team_matches (team_id, kickoff);""")
+        self.conn.commit()
+
+    def load_fixtures(self, fixtures_df: pd.DataFrame, replace: bool = True) -> int:
+        """Parses and stores a combined fixtures frame. With `replace` the store is rebuilt from it;
+        otherwise its matches are upserted (re-scraped fixtures overwrite their earlier rows)."""
+        matches, teams = parse_fixtures(fixtures_df)
+        with self.lock:
+            with self.conn:
+                if replace:
+                    for table in ("team_matches", "matches", "teams"): self.conn.execute(f"DELETE FROM {table}")
+                self.conn.executemany("INSERT OR REPLACE INTO teams VALUES (?, ?)", _sql_rows(teams))
+                self.conn.executemany(f"INSERT OR REPLACE INTO matches VALUES ({','.join('?' * len(MATCH_COLUMNS))})", _sql_rows(matches))
+                self.conn.executemany(f"INSERT OR REPLACE INTO team_matches VALUES ({','.join('?' * len(TEAM_MATCH_COLUMNS))})", _sql_rows(team_match_rows(matches)))
+        return len(matches)
+
+    def query(self, sql: str, params: tuple = ()) -> pd.DataFrame:
+        with self.lock:
+            df = pd.read_sql_query(sql, self.conn, params=params)
+        if 'kickoff' in df.columns: df['kickoff'] = pd.to_datetime(df['kickoff'])
+        return df
+
+    def team_id(self, team_name: str) -> Optional[str]:
+        with self.lock:
+            row = self.conn.execute("SELECT team_id FROM teams WHERE name = ?", (team_name,)).fetchone()
+        return row[0] if row else None
+
+    def team_matches_before(self, team_name: str, before: str, last_n: int = 5, played_only: bool = True) -> pd.DataFrame:
+        """The team's last `last_n` matches that kicked off strictly before `before` (a date or datetime), newest first."""
+        before = pd.Timestamp(before).strftime('%Y-%m-%d %H:%M:%S')
+        return self.query(f"""SELECT tm.*, opp.name AS opponent FROM team_matches tm JOIN teams opp ON opp.team_id = tm.opponent_id
+                               WHERE tm.team_id = ? AND tm.kickoff < ? {"AND tm.goals_for IS NOT NULL" if played_only else ""}
+                               ORDER BY tm.kickoff DESC LIMIT ?""", (team_id_for(team_name), before, last_n))
+
+    def season_matches(self, competition: str, season: str) -> pd.DataFrame:
+        return self.query("""SELECT m.*, h.name AS home_team, a.name AS away_team FROM matches m
+                              JOIN teams h ON h.team_id = m.home_team_id JOIN teams a ON a.team_id = m.away_team_id
+                              WHERE m.competition = ? AND m.season = ? ORDER BY m.kickoff, m.match_id""", (competition, season))
+
+    def summary(self) -> Dict[str, int]:
+        with self.lock:
+            return {table: self.conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0] for table in ("matches", "team_matches", "teams")}
+
+    def close(self):
+        with self.lock: self.conn.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Build or query the typed match-results store from the combined fixtures.")
+    parser.add_argument("--fixtures", type=str, default=DEFAULT_FIXTURES_CSV, help=f"Combined fixtures CSV (default: {DEFAULT_FIXTURES_CSV}).")
+    parser.add_argument("--db", type=str, default=DEFAULT_MATCH_DB, help=f"SQLite match store (default: {DEFAULT_MATCH_DB}).")
+    parser.add_argument("--team", type=str, help="Instead of building, show this team's last matches before --before.")
+    parser.add_argument("--before", type=str, default=None, help="Date/datetime for --team (default: now).")
+    parser.add_argument("--last", type=int, default=5, help="Number of matches for --team (default: 5).")
+    args = parser.parse_args()
+
+    store = MatchStore(args.db)
+    try:
+        if args.team:
+            print(store.team_matches_before(args.team, args.before or pd.Timestamp.now(), args.last).to_string(index=False))
+        else:
+            n_matches = store.load_fixtures(pd.read_csv(args.fixtures, low_memory=False))
+            print(f"Stored {n_matches} matches from {args.fixtures} in {args.db}: {store.summary()}")
+    finally:
+        store.close()
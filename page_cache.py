@@ -0,0 +1,111 @@
+import os
+import re
+import gzip
+import time
+import sqlite3
+import hashlib
+import datetime
+import threading
+from typing import Optional, Dict
+from urllib.parse import urlparse
+
+DEFAULT_CACHE_DIR = ".page_cache"
+DEFAULT_CURRENT_SEASON_TTL_HOURS = 12.0
+SEASON_END_MONTH = 8  # a season ending in year Y is treated as finished from 1 August of Y
+
+
+def season_from_url(url: str) -> Optional[str]:
+    match = re.search(r'/(\d{4}-\d{4})/', url)
+    return match.group(1) if match else None
+
+
+def season_is_finished(season: Optional[str], now: Optional[datetime.datetime] = None) -> bool:
+    if not season: return False
+    now = now or datetime.datetime.now()
+    season_end_year = int(season.split('-')[1])
+    return now >= datetime.datetime(season_end_year, SEASON_END_MONTH, 1)
+
+
+def url_to_page_filename(url: str) -> str:
+    """Maps an FBRef URL to the file name its saved page is stored under, e.g.
+    https://fbref.com/en/comps/9/2014-2015/schedule/... -> en_comps_9_2014-2015_schedule_....html"""
+    path = urlparse(url).path.strip('/') or "index"
+    return re.sub(r'[^0-9a-zA-Z\-_.]+', '_', path.replace('/', '_')) + ".html"
+
+
+def save_page_for_stand_in(pages_dir: str, url: str, page_source: str):
+    """Saves a fetched page as a plain .html file that fbref_stand_in_server.py can serve again."""
+    os.makedirs(pages_dir, exist_ok=True)
+    with open(os.path.join(pages_dir, url_to_page_filename(url)), "w", encoding="utf-8") as f: f.write(page_source)
+
+
+class PageCache:
+    """Compressed, content-addressed store of raw page HTML, keyed by URL.
+
+    Page bodies live in objects/<sha[:2]>/<sha>.html.gz (identical pages are stored once) and an
+    SQLite index maps each URL to its current body and expiry. Pages of finished seasons never
+    expire; pages of the current season expire `current_season_ttl_hours` after they were fetched."""
+
+    def __init__(self, cache_dir: str = DEFAULT_CACHE_DIR, current_season_ttl_hours: float = DEFAULT_CURRENT_SEASON_TTL_HOURS):
+        self.cache_dir = cache_dir
+        self.current_season_ttl_hours = current_season_ttl_hours
+        os.makedirs(os.path.join(cache_dir, "objects"), exist_ok=True)
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(os.path.join(cache_dir, "index.sqlite"), check_same_thread=False)
+        self.conn.execute("""CREATE TABLE IF NOT EXISTS pages (
+            url TEXT PRIMARY KEY, content_sha TEXT NOT NULL, fetched_at REAL NOT NULL,
+            expires_at REAL, etag TEXT, last_modified TEXT)""")
+        self.conn.commit()
+
+    def _object_path(self, content_sha: str) -> str:
+        return os.path.join(self.cache_dir, "objects", content_sha[:2], f"{content_sha}.html.gz")
+
+    def _entry(self, url: str) -> Optional[Dict]:
+        with self.lock:
+            row = self.conn.execute("SELECT content_sha, fetched_at, expires_at, etag, last_modified FROM pages WHERE url = ?", (url,)).fetchone()
+        if row is None: return None
+        return {"content_sha": row[0], "fetched_at": row[1], "expires_at": row[2], "etag": row[3], "last_modified": row[4]}
+
+    def is_fresh(self, url: str) -> bool:
+        entry = self._entry(url)
+        return entry is not None and (entry['expires_at'] is None or entry['expires_at'] > time.time())
+
+    def validators(self, url: str) -> Dict:
+        """ETag / Last-Modified recorded for `url`, for conditional refetches."""
+        entry = self._entry(url) or {}
+        return {"etag": entry.get('etag'), "last_modified": entry.get('last_modified')}
+
+    def get(self, url: str, allow_stale: bool = False) -> Optional[str]:
+        entry = self._entry(url)
+        if entry is None: return None
+        if not allow_stale and entry['expires_at'] is not None and entry['expires_at'] <= time.time(): return None
+        try:
+            with gzip.open(self._object_path(entry['content_sha']), "rt", encoding="utf-8") as f: return f.read()
+        except FileNotFoundError:
+            return None
+
+    def put(self, url: str, page_source: str, etag: Optional[str] = None, last_modified: Optional[str] = None):
+        content_sha = hashlib.sha256(page_source.encode("utf-8")).hexdigest()
+        object_path = self._object_path(content_sha)
+        if not os.path.exists(object_path):
+            os.makedirs(os.path.dirname(object_path), exist_ok=True)
+            tmp_path = f"{object_path}.{threading.get_ident()}.tmp"
+            with gzip.open(tmp_path, "wt", encoding="utf-8") as f: f.write(page_source)
+            os.replace(tmp_path, object_path)
+        self.touch(url, content_sha, etag, last_modified)
+
+    def touch(self, url: str, content_sha: Optional[str] = None, etag: Optional[str] = None, last_modified: Optional[str] = None):
+        """Marks `url` as just fetched, e.g. after a conditional refetch reported it unchanged."""
+        now = time.time()
+        expires_at = None if season_is_finished(season_from_url(url)) else now + self.current_season_ttl_hours * 3600
+        with self.lock:
+            if content_sha is None:
+                self.conn.execute("UPDATE pages SET fetched_at = ?, expires_at = ?, etag = COALESCE(?, etag), last_modified = COALESCE(?, last_modified) WHERE url = ?",
+                                  (now, expires_at, etag, last_modified, url))
+            else:
+                self.conn.execute("INSERT OR REPLACE INTO pages (url, content_sha, fetched_at, expires_at, etag, last_modified) VALUES (?, ?, ?, ?, ?, ?)",
+                                  (url, content_sha, now, expires_at, etag, last_modified))
+            self.conn.commit()
+
+    def close(self):
+        with self.lock: self.conn.close()
@@ -0,0 +1,176 @@
+import re
+import time
+import random
+from typing import Callable, Dict, Optional, Tuple
+
+from lazy_imports import lazy_import
+from page_cache import PageCache
+from scrape_metrics import phase, count
+
+requests = lazy_import("requests")
+
+PAGE_LOAD_TIMEOUT_SECONDS = 20
+HTTP_USER_AGENT = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/90.0.4430.212 Safari/537.36"
+FETCHER_BACKENDS = ["auto", "http", "selenium"]
+
+
+class PageNotCachedError(Exception):
+    pass
+
+
+class SeleniumFetcher:
+    """Loads pages in a WebDriver session, started lazily by `start_driver` on the first fetch.
+    Every page load first draws from the shared `rate_limiter`, so cache hits cost no budget."""
+
+    def __init__(self, start_driver: Callable[[], object], rate_limiter=None):
+        self.start_driver = start_driver
+        self.rate_limiter = rate_limiter
+        self.driver = None
+
+    def fetch(self, url: str, wait_css: Optional[str] = None, expect_pattern: Optional[str] = None, post_load_delay: Optional[tuple] = None) -> str:
+        if self.driver is None:
+            with phase("driver_start"): self.driver = self.start_driver()
+        if self.rate_limiter is not None:
+            with phase("rate_limit"): self.rate_limiter.acquire(url)
+        with phase("navigate"): self.driver.get(url)
+        if wait_css:
+            from selenium.webdriver.support.ui import WebDriverWait
+            from selenium.webdriver.support import expected_conditions as EC
+            from selenium.webdriver.common.by import By
+            with phase("wait"): WebDriverWait(self.driver, PAGE_LOAD_TIMEOUT_SECONDS).until(EC.presence_of_element_located((By.CSS_SELECTOR, wait_css)))
+        if post_load_delay:
+            with phase("sleep"): time.sleep(random.uniform(*post_load_delay))
+        page_source = self.driver.page_source
+        count("bytes_fetched", len(page_source.encode("utf-8"))); count("pages_fetched_selenium")
+        return page_source
+
+    def close(self):
+        if self.driver is not None: self.driver.quit(); self.driver = None
+
+
+class HttpFetcher:
+    """Plain HTTP fetches over one keep-alive session with a pooled connection per host.
+
+    FBRef ships its tables in the static HTML (some inside comments), so no browser is needed
+    for most pages. `expect_pattern` is not checked here; AutoFetcher uses it to decide on fallback."""
+
+    def __init__(self, rate_limiter=None, pool_maxsize: int = 4):
+        self.rate_limiter = rate_limiter
+        self.session = requests.Session()
+        adapter = requests.adapters.HTTPAdapter(pool_connections=4, pool_maxsize=pool_maxsize)
+        self.session.mount("http://", adapter); self.session.mount("https://", adapter)
+        self.session.headers.update({"User-Agent": HTTP_USER_AGENT, "Accept-Language": "en-US,en;q=0.9"})
+
+    def fetch_if_modified(self, url: str, validators: Optional[Dict] = None) -> Tuple[Optional[str], Dict]:
+        """Conditional GET. Returns (None, validators) on 304 Not Modified, else (page_source, validators)."""
+        headers = {}
+        if validators and validators.get('etag'): headers["If-None-Match"] = validators['etag']
+        if validators and validators.get('last_modified'): headers["If-Modified-Since"] = validators['last_modified']
+        if self.rate_limiter is not None:
+            with phase("rate_limit"): self.rate_limiter.acquire(url)
+        with phase("http"): response = self.session.get(url, headers=headers, timeout=PAGE_LOAD_TIMEOUT_SECONDS)
+        new_validators = {"etag": response.headers.get("ETag"), "last_modified": response.headers.get("Last-Modified")}
+        if response.status_code == 304:
+            count("not_modified"); return None, new_validators
+        count("bytes_fetched", len(response.content)); count("pages_fetched_http")
+        response.raise_for_status()
+        if response.encoding is None or response.encoding.lower() == "iso-8859-1": response.encoding = "utf-8"
+        return response.text, new_validators
+
+    def fetch(self, url: str, wait_css: Optional[str] = None, expect_pattern: Optional[str] = None, post_load_delay: Optional[tuple] = None) -> str:
+        page_source, _ = self.fetch_if_modified(url)
+        return page_source
+
+    def close(self):
+        self.session.close()
+
+
+class AutoFetcher:
+    """HTTP first; falls back to the WebDriver only when the expected table is missing from the
+    static HTML or the plain request is refused (HTTP 403)."""
+
+    def __init__(self, http_fetcher: HttpFetcher, selenium_fetcher: SeleniumFetcher):
+        self.http_fetcher = http_fetcher
+        self.selenium_fetcher = selenium_fetcher
+
+    def fetch_if_modified(self, url: str, validators: Optional[Dict] = None) -> Tuple[Optional[str], Dict]:
+        return self.http_fetcher.fetch_if_modified(url, validators)
+
+    def fetch(self, url: str, wait_css: Optional[str] = None, expect_pattern: Optional[str] = None, post_load_delay: Optional[tuple] = None) -> str:
+        try:
+            page_source = self.http_fetcher.fetch(url)
+            if page_source is not None and (not expect_pattern or re.search(expect_pattern, page_source)): return page_source
+            print(f"      -> Expected table not in static HTML of {url}; falling back to WebDriver.")
+        except requests.HTTPError as e:
+            if e.response is None or e.response.status_code != 403: raise
+            print(f"      -> HTTP 403 for {url}; falling back to WebDriver.")
+        return self.selenium_fetcher.fetch(url, wait_css=wait_css, expect_pattern=expect_pattern, post_load_delay=post_load_delay)
+
+    def close(self):
+        self.http_fetcher.close(); self.selenium_fetcher.close()
+
+
+class CachedFetcher:
+    """Serves fresh pages from the page cache and fetches (then stores) the rest through `inner`.
+    Expired pages are refetched conditionally when `inner` supports it, so an unchanged page costs a 304."""
+
+    def __init__(self, inner, cache: PageCache):
+        self.inner = inner
+        self.cache = cache
+
+    def fetch(self, url: str, wait_css: Optional[str] = None, expect_pattern: Optional[str] = None, post_load_delay: Optional[tuple] = None) -> str:
+        with phase("cache"): page_source = self.cache.get(url)
+        if page_source is not None:
+            print(f"      -> Page cache hit for {url}")
+            count("cache_hits")
+            return page_source
+        with phase("cache"): stale_page_source = self.cache.get(url, allow_stale=True)
+        if hasattr(self.inner, "fetch_if_modified"):
+            page_source, validators = self.inner.fetch_if_modified(url, self.cache.validators(url) if stale_page_source is not None else None)
+            if page_source is None and stale_page_source is not None:
+                print(f"      -> Cached page still current (304) for {url}")
+                with phase("cache"): self.cache.touch(url, etag=validators['etag'], last_modified=validators['last_modified'])
+                return stale_page_source
+            if page_source is not None and (not expect_pattern or re.search(expect_pattern, page_source)):
+                with phase("cache"): self.cache.put(url, page_source, etag=validators['etag'], last_modified=validators['last_modified'])
+                return page_source
+        page_source = self.inner.fetch(url, wait_css=wait_css, expect_pattern=expect_pattern, post_load_delay=post_load_delay)
+        with phase("cache"): self.cache.put(url, page_source)
+        return page_source
+
+    def close(self):
+        self.inner.close()
+
+
+class ReplayFetcher:
+    """Browserless fetcher for --replay runs: answers only from the page cache, stale or not."""
+
+    def __init__(self, cache: PageCache):
+        self.cache = cache
+
+    def fetch(self, url: str, wait_css: Optional[str] = None, expect_pattern: Optional[str] = None, post_load_delay: Optional[tuple] = None) -> str:
+        with phase("cache"): page_source = self.cache.get(url, allow_stale=True)
+        if page_source is None: raise PageNotCachedError(f"No cached page for {url}")
+        count("cache_hits")
+        return page_source
+
+    def close(self):
+        pass
+
+
+class PrefetchedFetcher:
+    """Hands out the page the async pipeline's fetch stage already loaded for `url` (or re-raises the
+    error that fetch ended with), so the scrape functions parse it as if they had fetched it themselves."""
+
+    def __init__(self, url: str, page_source: Optional[str] = None, error: Optional[BaseException] = None):
+        self.url = url
+        self.page_source = page_source
+        self.error = error
+
+    def fetch(self, url: str, wait_css: Optional[str] = None, expect_pattern: Optional[str] = None, post_load_delay: Optional[tuple] = None) -> str:
+        if url != self.url: raise ValueError(f"Page of {self.url} was prefetched, not {url}")
+        if self.error is not None: raise self.error
+        return self.page_source
+
+    def close(self):
+        pass
@@ -0,0 +1,185 @@
+import os
+import io
+import csv
+import sqlite3
+import hashlib
+import argparse
+import threading
+import unicodedata
+import pandas as pd
+from typing import Dict, List, Optional
+
+DEFAULT_PLAYER_MASTER = os.path.join("output_data", "MASTER_PLAYER_STATS.csv")
+PLAYER_INDEX_FILENAME = "player_index.sqlite"
+FALLBACK_KEY_PREFIX = "k-"
+
+
+def normalise_player_name(name) -> str:
+    """Lower-case, accent-free, single-spaced name, so 'Martin Ødegaard' and 'Martin Odegaard ' agree."""
+    if pd.isna(name): return ''
+    folded = unicodedata.normalize('NFKD', str(name).replace('ø', 'o').replace('Ø', 'O').replace('ß', 'ss'))
+    return ' '.join(''.join(c for c in folded if not unicodedata.combining(c)).lower().split())
+
+
+def fallback_player_key(normalised_name: str, born: str) -> str:
+    """Deterministic key for rows scraped without an FBRef player id. Two different players with the
+    same name and birth year would share it; FBRef ids, where present, keep them apart."""
+    return FALLBACK_KEY_PREFIX + hashlib.sha1(f"{normalised_name}|{born}".encode("utf-8")).hexdigest()[:10]
+
+
+def assign_player_keys(df: pd.DataFrame) -> pd.DataFrame:
+    """Adds a persistent 'Player_Key' after 'Player': the FBRef player id captured while scraping
+    ('Player_ID') when the row has one, else the id seen on other rows with the same normalised name and
+    birth year (when that id is unambiguous), else a deterministic key from name and birth year."""
+    if 'Player' not in df.columns: return df
+    names = df['Player'].map(normalise_player_name)
+    born = pd.to_numeric(df['Born'], errors='coerce').astype('Int64').astype('string').fillna('') if 'Born' in df.columns else pd.Series('', index=df.index)
+    identity = names + '|' + born
+    fbref_ids = df['Player_ID'].astype('string') if 'Player_ID' in df.columns else pd.Series(pd.NA, index=df.index, dtype='string')
+
+    known = pd.DataFrame({"identity": identity, "player_id": fbref_ids}).dropna().drop_duplicates()
+    unambiguous = known[~known['identity'].duplicated(keep=False)].set_index('identity')['player_id']
+    fallback = {value: fallback_player_key(*value.split('|', 1)) for value in identity.unique()}
+    keys = fbref_ids.fillna(identity.map(unambiguous)).fillna(identity.map(fallback))
+
+    df = df.drop(columns=['Player_Key'], errors='ignore').copy()
+    insert_after = 'Player_ID' if 'Player_ID' in df.columns else 'Player'
+    df.insert(df.columns.get_loc(insert_after) + 1, 'Player_Key', keys.astype(str).to_numpy())
+    return df
+
+
+def _row_offsets(master_path: str) -> tuple[bytes, List[int], List[int]]:
+    """Header bytes and the byte offset and length of every record of a CSV. Records are split by the
+    csv module, so a quoted field holding a line break stays within its record."""
+    with open(master_path, "rb") as f:
+        consumed = 0
+
+        def decoded_lines():
+            nonlocal consumed
+            for line in f:
+                consumed += len(line)
+                yield line.decode("utf-8")
+
+        reader = csv.reader(decoded_lines())
+        next(reader, None)
+        header_length = position = consumed
+        offsets, lengths = [], []
+        for record in reader:
+            if record: offsets.append(position); lengths.append(consumed - position)
+            position = consumed
+        f.seek(0)
+        header = f.read(header_length)
+    return header, offsets, lengths
+
+
+def _master_signature(master_path: str) -> str:
+    stat = os.stat(master_path)
+    return f"{stat.st_size}:{stat.st_mtime_ns}"
+
+
+def build_player_index(master_path: str, index_path: str, force: bool = False) -> bool:
+    """Maps every Player_Key of a player master CSV to the byte offsets of its rows, with one summary
+    row per player. Skips the work when the index already matches the master. Returns True if built."""
+    if not force and os.path.isfile(index_path):
+        index = PlayerIndex(index_path)
+        try:
+            if index.is_current(master_path): return False
+        finally:
+            index.close()
+
+    master = pd.read_csv(master_path, usecols=lambda col: col in ('Player', 'Player_Key', 'Born', 'Season', 'Squad', 'Competition'), low_memory=False)
+    if 'Player_Key' not in master.columns:
+        print(f"-> {master_path} has no Player_Key column; re-run the combiner to add it.")
+        return False
+    header, offsets, lengths = _row_offsets(master_path)
+    if len(offsets) != len(master):
+        raise ValueError(f"{master_path} has {len(master)} rows but {len(offsets)} CSV records; cannot index it.")
+
+    rows = pd.DataFrame({"player_key": master['Player_Key'].astype(str), "offset": offsets, "length": lengths})
+    players = master.assign(player_key=master['Player_Key'].astype(str), name_key=master['Player'].map(normalise_player_name)).groupby('player_key', sort=True).agg(
+        name=('Player', 'first'), name_key=('name_key', 'first'), born=('Born', 'first'), rows=('Player', 'size'),
+        first_season=('Season', 'min'), last_season=('Season', 'max'), squads=('Squad', 'nunique'))
+
+    tmp_path = f"{index_path}.tmp"
+    if os.path.exists(tmp_path): os.remove(tmp_path)
+    conn = sqlite3.connect(tmp_path)
+    try:
+        with conn:
+            conn.executescript("""
+                CREATE TABLE meta (key TEXT PRIMARY KEY, value TEXT NOT NULL);
+                CREATE TABLE players (player_key TEXT PRIMARY KEY, name TEXT, name_key TEXT, born REAL, rows INTEGER,
+                                      first_season TEXT, last_season TEXT, squads INTEGER);
+                CREATE TABLE player_rows (player_key TEXT NOT NULL, offset INTEGER NOT NULL, length INTEGER NOT NULL);""")
+            conn.executemany("INSERT INTO meta VALUES (?, ?)", [("master_path", os.path.abspath(master_path)), ("master_signature", _master_signature(master_path)),
+                                                                ("header", header.decode("utf-8"))])
+            players.reset_index().to_sql("players", conn, if_exists='append', index=False)
+            rows.to_sql("player_rows", conn, if_exists='append', index=False)
+            conn.execute("CREATE INDEX player_rows_key ON player_rows (player_key, offset)")
+            conn.execute("CREATE INDEX players_name_key ON players (name_key)")
+    finally:
+        conn.close()
+    os.replace(tmp_path, index_path)
+    print(f"Indexed {len(rows)} rows of {len(players)} players from {os.path.basename(master_path)} in {index_path}")
+    return True
+
+
+class PlayerIndex:
+    """Player lookups against a master CSV without loading it: rows are read by seeking to the byte
+    offsets recorded for a Player_Key, so a career costs O(rows of that player)."""
+
+    def __init__(self, index_path: str):
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(index_path, check_same_thread=False)
+        self.meta = dict(self.conn.execute("SELECT key, value FROM meta").fetchall())
+
+    def is_current(self, master_path: Optional[str] = None) -> bool:
+        master_path = master_path or self.meta['master_path']
+        return os.path.isfile(master_path) and self.meta.get('master_signature') == _master_signature(master_path)
+
+    def find(self, name: str, born: Optional[int] = None) -> pd.DataFrame:
+        """Players whose normalised name matches `name` (and birth year, if given)."""
+        sql = "SELECT * FROM players WHERE name_key = ?" + (" AND born = ?" if born is not None else "") + " ORDER BY first_season"
+        with self.lock:
+            return pd.read_sql_query(sql, self.conn, params=(normalise_player_name(name),) + ((float(born),) if born is not None else ()))
+
+    def rows(self, player_key: str, columns: Optional[List[str]] = None) -> pd.DataFrame:
+        """The master rows of one player, in file order."""
+        if not self.is_current():
+            raise RuntimeError(f"The player index is older than {self.meta['master_path']}; rebuild it with player_identity.py.")
+        with self.lock:
+            spans = self.conn.execute("SELECT offset, length FROM player_rows WHERE player_key = ? ORDER BY offset", (player_key,)).fetchall()
+        chunks = [self.meta['header'].encode("utf-8")]
+        with open(self.meta['master_path'], "rb") as f:
+            for offset, length in spans:
+                f.seek(offset); chunks.append(f.read(length))
+        return pd.read_csv(io.BytesIO(b"".join(chunks)), usecols=columns)
+
+    def career(self, player_key: str, sum_columns: Optional[List[str]] = None) -> pd.DataFrame:
+        """Per-season totals of `sum_columns` (default: every numeric column) across the player's rows."""
+        rows = self.rows(player_key)
+        sum_columns = sum_columns or [col for col in rows.select_dtypes('number').columns if col not in ('Rk', 'Born', 'Age')]
+        return rows.groupby(['Season', 'Competition'], sort=True)[sum_columns].sum(min_count=1).reset_index()
+
+    def close(self):
+        with self.lock: self.conn.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Build or query the player identity index of the player master CSV.")
+    parser.add_argument("--master", type=str, default=DEFAULT_PLAYER_MASTER, help=f"Player master CSV (default: {DEFAULT_PLAYER_MASTER}).")
+    parser.add_argument("--index", type=str, default=None, help=f"Index file (default: {PLAYER_INDEX_FILENAME} next to the master).")
+    parser.add_argument("--player", type=str, help="Show the career rows of players with this name instead of building.")
+    parser.add_argument("--force", action="store_true", help="Rebuild the index even if it matches the master.")
+    args = parser.parse_args()
+
+    index_path = args.index or os.path.join(os.path.dirname(os.path.abspath(args.master)), PLAYER_INDEX_FILENAME)
+    if args.player:
+        index = PlayerIndex(index_path)
+        try:
+            for player_key in index.find(args.player)['player_key']:
+                print(f"\n{player_key}:")
+                print(index.rows(player_key, ['Season', 'Competition', 'Squad', 'Player', 'Age']).to_string(index=False))
+        finally:
+            index.close()
+    elif not build_player_index(args.master, index_path, force=args.force):
+        print(f"{index_path} is up to date.")
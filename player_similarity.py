@@ -0,0 +1,226 @@
+import os
+import json
+import time
+import argparse
+import warnings
+import numpy as np
+import pandas as pd
+from typing import List, Optional
+
+from stat_schemas import read_master_csv
+from player_identity import normalise_player_name, DEFAULT_PLAYER_MASTER
+from rollup_cubes import per90_columns, nineties_played, position_group
+
+SIMILARITY_DIRNAME = "similarity"
+FEATURES_FILENAME = "features.npy"
+ROWS_FILENAME = "rows.csv"
+META_FILENAME = "meta.json"
+IVF_CENTROIDS_FILENAME = "ivf_centroids.npy"
+IVF_LISTS_FILENAME = "ivf_lists.npy"
+# Rows scored per matrix-vector product; bounds the working set of a query to BLOCK_ROWS * features floats.
+BLOCK_ROWS = 8192
+# Rows with at least this many minutes set the standardisation means and deviations.
+FIT_MIN_MINUTES = 450
+DEFAULT_TOP_K = 10
+DEFAULT_NPROBE = 8
+KMEANS_ITERATIONS = 10
+ROW_COLUMNS = ["Player", "Player_Key", "Squad", "Competition", "Season", "Pos", "Position_Group", "Minutes"]
+
+
+def similarity_dir(master_path: str) -> str:
+    return os.path.join(os.path.dirname(os.path.abspath(master_path)), SIMILARITY_DIRNAME)
+
+
+def _master_signature(master_path: str) -> str:
+    stat = os.stat(master_path)
+    return f"{stat.st_size}:{stat.st_mtime_ns}"
+
+
+def standardised_features(master_df: pd.DataFrame) -> tuple[np.ndarray, List[str], np.ndarray, np.ndarray]:
+    """Per-90 rate of every count column, z-scored with the means and deviations of rows with at least
+    FIT_MIN_MINUTES, missing values imputed as the mean (0), and every row scaled to unit length so a
+    dot product is the cosine similarity. Returns (float32 matrix, columns, means, deviations)."""
+    columns = per90_columns(master_df)
+    nineties = nineties_played(master_df)
+    per90 = master_df[columns].astype('float32').div(nineties.where(nineties > 0), axis=0).to_numpy(dtype='float32', na_value=np.nan)
+    fit_rows = (nineties * 90 >= FIT_MIN_MINUTES).to_numpy()
+    fit = per90[fit_rows] if fit_rows.any() else per90
+    with warnings.catch_warnings(), np.errstate(all='ignore'):
+        warnings.simplefilter("ignore", RuntimeWarning)  # all-missing columns (e.g. goalkeeping stats in a field-player-only file)
+        means = np.nan_to_num(np.nanmean(fit, axis=0)).astype('float32')
+        deviations = np.nan_to_num(np.nanstd(fit, axis=0), nan=1.0).astype('float32')
+    deviations[deviations == 0] = 1.0
+    features = np.nan_to_num((per90 - means) / deviations, nan=0.0, posinf=0.0, neginf=0.0)
+    norms = np.linalg.norm(features, axis=1, keepdims=True)
+    features /= np.where(norms > 0, norms, 1.0)
+    return np.ascontiguousarray(features, dtype='float32'), columns, means, deviations
+
+
+def _kmeans(features: np.ndarray, n_lists: int, seed: int = 0) -> tuple[np.ndarray, np.ndarray]:
+    """Spherical k-means (centroids of unit rows, assigned by dot product), scored in blocks."""
+    rng = np.random.default_rng(seed)
+    centroids = features[rng.choice(len(features), n_lists, replace=False)].copy()
+    assignment = np.zeros(len(features), dtype='int32')
+    for _ in range(KMEANS_ITERATIONS):
+        for start in range(0, len(features), BLOCK_ROWS):
+            assignment[start:start + BLOCK_ROWS] = np.argmax(features[start:start + BLOCK_ROWS] @ centroids.T, axis=1)
+        for i in range(n_lists):
+            members = features[assignment == i]
+            if len(members): centroids[i] = members.sum(axis=0)
+        centroids /= np.maximum(np.linalg.norm(centroids, axis=1, keepdims=True), 1e-12)
+    return centroids.astype('float32'), assignment
+
+
+def _replace_file(path: str, write):
+    # Readers memory-map features.npy, so a rebuild writes each file beside it and swaps it in rather than truncating the mapped one.
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "wb") as f: write(f)
+    os.replace(tmp_path, path)
+
+
+def build_similarity_index(master_path: str, index_dir: Optional[str] = None, approximate: Optional[bool] = None, force: bool = False) -> bool:
+    """Writes the standardised feature matrix of a player master (float32, row-major .npy that queries
+    memory-map), the row metadata used for filters, and with `approximate` an inverted-file index
+    (about sqrt(rows) k-means lists). Skips the work when the index matches the master (by size and
+    mtime) and has the requested parts; `approximate=None` keeps the lists if the old index had them.
+    Returns True if built."""
+    index_dir = index_dir or similarity_dir(master_path)
+    meta_path = os.path.join(index_dir, META_FILENAME)
+    meta = {}
+    if os.path.isfile(meta_path):
+        with open(meta_path, encoding="utf-8") as f: meta = json.load(f)
+    if approximate is None: approximate = bool(meta.get("ivf_lists"))
+    if not force and meta.get("master_signature") == _master_signature(master_path) and (meta.get("ivf_lists") or not approximate): return False
+
+    master_df, _ = read_master_csv(master_path, "player")
+    features, columns, means, deviations = standardised_features(master_df)
+    rows = master_df[[col for col in ROW_COLUMNS if col in master_df.columns]].copy()
+    rows["Position_Group"] = position_group(master_df, "player")
+    rows["Minutes"] = (nineties_played(master_df) * 90).round()
+    n_lists = int(np.sqrt(len(features))) if approximate and len(features) else 0
+
+    os.makedirs(index_dir, exist_ok=True)
+    _replace_file(os.path.join(index_dir, FEATURES_FILENAME), lambda f: np.save(f, features))
+    _replace_file(os.path.join(index_dir, ROWS_FILENAME), lambda f: rows.to_csv(f, index=False))
+    if n_lists:
+        centroids, assignment = _kmeans(features, n_lists)
+        _replace_file(os.path.join(index_dir, IVF_CENTROIDS_FILENAME), lambda f: np.save(f, centroids))
+        _replace_file(os.path.join(index_dir, IVF_LISTS_FILENAME), lambda f: np.save(f, assignment))
+    meta = {"master_path": os.path.abspath(master_path), "master_signature": _master_signature(master_path), "rows": len(features),
+            "columns": columns, "means": means.tolist(), "deviations": deviations.tolist(), "ivf_lists": n_lists}
+    _replace_file(meta_path, lambda f: f.write(json.dumps(meta).encode("utf-8")))
+    print(f"Indexed {features.shape[0]} player rows x {features.shape[1]} per-90 features in {index_dir}"
+          + (f" with {n_lists} approximate lists" if n_lists else ""))
+    return True
+
+
+class SimilarityIndex:
+    """Nearest-neighbour search over a similarity index built by `build_similarity_index`. The feature
+    matrix is memory-mapped, so opening the index costs only the row metadata; an exact search scores
+    the filtered rows block by block (one matrix-vector product per BLOCK_ROWS rows) and keeps a running
+    top k. With the inverted-file lists, an approximate search only scores the `nprobe` lists whose
+    centroids are closest to the query. Read-only, so safe to share between threads."""
+
+    def __init__(self, index_dir: str):
+        with open(os.path.join(index_dir, META_FILENAME), encoding="utf-8") as f: self.meta = json.load(f)
+        self.features = np.load(os.path.join(index_dir, FEATURES_FILENAME), mmap_mode='r')
+        self.rows = pd.read_csv(os.path.join(index_dir, ROWS_FILENAME), dtype={"Player_Key": str, "Season": str, "Competition": str}, low_memory=False)
+        self.keys = self.rows['Player_Key'].to_numpy(dtype=object)
+        self.minutes = self.rows['Minutes'].fillna(0).to_numpy(dtype='float32')
+        self.key_rows = pd.Series(np.arange(len(self.rows))).groupby(self.keys, sort=False).indices
+        self.name_rows = pd.Series(np.arange(len(self.rows))).groupby(self.rows['Player'].map(normalise_player_name).to_numpy(), sort=False).indices
+        # Filter columns as category codes, so a filter is one integer comparison per row.
+        self.filter_codes = {}
+        for column in ("Season", "Competition", "Position_Group"):
+            values = pd.Categorical(self.rows[column].astype(str))
+            self.filter_codes[column] = (values.codes, {value: code for code, value in enumerate(values.categories)})
+        self.centroids, self.lists = None, None
+        if self.meta.get("ivf_lists"):
+            self.centroids = np.load(os.path.join(index_dir, IVF_CENTROIDS_FILENAME))
+            self.lists = np.load(os.path.join(index_dir, IVF_LISTS_FILENAME))
+
+    def is_current(self, master_path: Optional[str] = None) -> bool:
+        master_path = master_path or self.meta['master_path']
+        return os.path.isfile(master_path) and self.meta.get('master_signature') == _master_signature(master_path)
+
+    def player_rows(self, player: str, season: Optional[str] = None) -> np.ndarray:
+        """Row positions of a player (Player_Key, else name), optionally in one season."""
+        rows = self.key_rows.get(player)
+        if rows is None:
+            rows = self.name_rows.get(normalise_player_name(player), np.empty(0, dtype='int64'))
+            keys = pd.unique(self.keys[rows])
+            if len(keys) > 1: raise ValueError(f"'{player}' matches {len(keys)} players ({', '.join(keys)}); pass a Player_Key.")
+        if season is not None: rows = rows[self.rows['Season'].to_numpy()[rows] == season]
+        return rows
+
+    def _candidates(self, seasons=None, competitions=None, positions=None, min_minutes: float = 0) -> np.ndarray:
+        mask = np.ones(len(self.rows), dtype=bool)
+        for column, wanted in (("Season", seasons), ("Competition", competitions), ("Position_Group", positions)):
+            if not wanted: continue
+            codes, code_of = self.filter_codes[column]
+            mask &= np.isin(codes, [code_of[value] for value in ([wanted] if isinstance(wanted, str) else wanted) if value in code_of])
+        if min_minutes: mask &= self.minutes >= min_minutes
+        return mask
+
+    def _top_k(self, query: np.ndarray, mask: np.ndarray, k: int) -> tuple[np.ndarray, np.ndarray]:
+        # Mostly-selected rows are scored in contiguous blocks of the mapped matrix; a narrow filter gathers only its rows.
+        candidates = np.flatnonzero(mask)
+        dense = len(candidates) * 4 > len(mask)
+        best_rows = np.empty(0, dtype='int64'); best_scores = np.empty(0, dtype='float32')
+        for start in range(0, len(mask) if dense else len(candidates), BLOCK_ROWS):
+            if dense:
+                block_mask = mask[start:start + BLOCK_ROWS]
+                block = np.flatnonzero(block_mask) + start
+                scores = (self.features[start:start + BLOCK_ROWS] @ query)[block_mask]
+            else:
+                block = candidates[start:start + BLOCK_ROWS]
+                scores = self.features[block] @ query
+            rows = np.concatenate([best_rows, block]); scores = np.concatenate([best_scores, scores])
+            keep = np.argpartition(-scores, k - 1)[:k] if len(scores) > k else np.arange(len(scores))
+            best_rows, best_scores = rows[keep], scores[keep]
+        order = np.argsort(-best_scores, kind='stable')
+        return best_rows[order], best_scores[order]
+
+    def similar(self, player: str, season: Optional[str] = None, k: int = DEFAULT_TOP_K, seasons=None, competitions=None,
+                positions=None, min_minutes: float = 0, approximate: bool = False, nprobe: int = DEFAULT_NPROBE) -> pd.DataFrame:
+        """The `k` player rows most similar (cosine of standardised per-90 profiles) to `player` in
+        `season` (default: the player's row with most minutes), among rows matching the filters (a value
+        or a list each; positions are GK, DF, MF, FW). The player's own rows are left out."""
+        query_rows = self.player_rows(player, season)
+        if not len(query_rows): raise KeyError(f"No rows for player '{player}'" + (f" in {season}" if season else "") + ".")
+        query_row = query_rows[np.argmax(self.minutes[query_rows])]
+        query = np.asarray(self.features[query_row])
+        mask = self._candidates(seasons, competitions, positions, min_minutes)
+        mask[self.key_rows[self.keys[query_row]]] = False
+        if approximate:
+            if self.lists is None: raise ValueError("The index has no approximate lists; rebuild it with --approximate.")
+            mask &= np.isin(self.lists, np.argsort(-(self.centroids @ query))[:max(1, nprobe)])
+        rows, scores = self._top_k(query, mask, k) if mask.any() and k > 0 else (np.empty(0, dtype='int64'), np.empty(0, dtype='float32'))
+        return self.rows.iloc[rows].assign(Similarity=scores).reset_index(drop=True)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Build or query the nearest-neighbour similarity index of the player master.")
+    parser.add_argument("--master", type=str, default=DEFAULT_PLAYER_MASTER, help=f"Player master CSV (default: {DEFAULT_PLAYER_MASTER}).")
+    parser.add_argument("--index_dir", type=str, default=None, help=f"Index directory (default: {SIMILARITY_DIRNAME}/ next to the master).")
+    parser.add_argument("--approximate", action="store_true", default=None, help="Build (or search) the inverted-file lists for approximate search.")
+    parser.add_argument("--force", action="store_true", help="Rebuild the index even if it matches the master.")
+    parser.add_argument("--player", type=str, default=None, help="Player_Key or name to find similar players for, instead of only building.")
+    parser.add_argument("--season", type=str, default=None, help="Season of the query player (default: the season with most minutes).")
+    parser.add_argument("--k", type=int, default=DEFAULT_TOP_K)
+    parser.add_argument("--seasons", nargs='+', default=None, help="Only return rows from these seasons.")
+    parser.add_argument("--competitions", nargs='+', default=None, help="Only return rows from these competitions.")
+    parser.add_argument("--positions", nargs='+', choices=["GK", "DF", "MF", "FW"], default=None, help="Only return rows of these position groups.")
+    parser.add_argument("--min_minutes", type=float, default=FIT_MIN_MINUTES, help=f"Only return rows with at least these minutes (default: {FIT_MIN_MINUTES}).")
+    parser.add_argument("--nprobe", type=int, default=DEFAULT_NPROBE, help=f"Lists searched with --approximate (default: {DEFAULT_NPROBE}).")
+    args = parser.parse_args()
+
+    index_dir = args.index_dir or similarity_dir(args.master)
+    if not build_similarity_index(args.master, index_dir, args.approximate, args.force) and not args.player:
+        print(f"{index_dir} is up to date.")
+    if args.player:
+        index = SimilarityIndex(index_dir)
+        started_at = time.perf_counter()
+        result = index.similar(args.player, args.season, args.k, args.seasons, args.competitions, args.positions, args.min_minutes,
+                               bool(args.approximate), args.nprobe)
+        print(result.to_string(index=False))
+        print(f"\n{len(result)} similar row(s) in {(time.perf_counter() - started_at) * 1000:.1f} ms.")
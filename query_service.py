@@ -0,0 +1,186 @@
+import os
+import json
+import argparse
+import threading
+import pandas as pd
+from collections import OrderedDict
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from typing import Dict, List, Optional
+from urllib.parse import urlparse, parse_qs
+
+from stat_schemas import COLUMN_CATEGORIES_SUFFIX
+
+MASTER_DATASETS = {"player": "MASTER_PLAYER_STATS.csv", "squad": "MASTER_SQUAD_STATS.csv", "fixtures": "MASTER_MATCH_FIXTURES.csv"}
+DEFAULT_CACHE_MB = 256
+DEFAULT_CACHE_ENTRIES = 512
+DEFAULT_QUERY_PORT = 8766
+# Filter name -> master columns it matches (any of them).
+FILTER_COLUMNS = {"competition": ["Competition"], "season": ["Season"], "squad": ["Squad", "Home", "Away"], "player": ["Player", "Player_Key"]}
+ALWAYS_KEPT_COLUMNS = ["Competition", "Season", "Squad", "Player", "Player_Key", "Comp"]
+
+
+def _as_list(value) -> Optional[List[str]]:
+    if value is None: return None
+    return sorted(str(v) for v in value) if isinstance(value, (list, tuple, set)) else [str(value)]
+
+
+class QueryService:
+    """Answers filtered, projected queries over the MASTER_* outputs of one data directory.
+
+    Each master is loaded once and reloaded when the combiner rewrites it (its size or mtime changes);
+    results are kept in an LRU cache bounded by entry count and memory, and entries of a reloaded
+    master are dropped. Safe to share between threads."""
+
+    def __init__(self, data_dir: str = "output_data", cache_mb: float = DEFAULT_CACHE_MB, cache_entries: int = DEFAULT_CACHE_ENTRIES):
+        self.data_dir = data_dir
+        self.cache_bytes_limit = int(cache_mb * 1024 * 1024)
+        self.cache_entries_limit = max(1, cache_entries)
+        self.lock = threading.Lock()
+        self.frames: Dict[str, tuple] = {}  # dataset -> (signature, frame, column categories)
+        self.cache: "OrderedDict[tuple, tuple]" = OrderedDict()  # key -> (frame, bytes)
+        self.cache_bytes = 0
+        self.stats = {"hits": 0, "misses": 0, "evictions": 0, "reloads": 0}
+
+    def _master_path(self, dataset: str) -> str:
+        if dataset not in MASTER_DATASETS: raise KeyError(f"Unknown dataset '{dataset}'; expected one of {', '.join(MASTER_DATASETS)}.")
+        return os.path.join(self.data_dir, MASTER_DATASETS[dataset])
+
+    def _frame(self, dataset: str) -> tuple:
+        """(signature, frame, categories) of a master, (re)loading it if the file changed."""
+        master_path = self._master_path(dataset)
+        stat = os.stat(master_path)
+        signature = (stat.st_size, stat.st_mtime_ns)
+        loaded = self.frames.get(dataset)
+        if loaded is not None and loaded[0] == signature: return loaded
+        frame = pd.read_csv(master_path, low_memory=False)
+        categories_path = f"{os.path.splitext(master_path)[0]}{COLUMN_CATEGORIES_SUFFIX}"
+        categories = {}
+        if os.path.isfile(categories_path):
+            with open(categories_path, encoding="utf-8") as f: categories = json.load(f)
+        if loaded is not None:
+            self.stats["reloads"] += 1
+            for key in [key for key in self.cache if key[0] == dataset]: self._evict(key)
+        self.frames[dataset] = (signature, frame, categories)
+        return self.frames[dataset]
+
+    def _evict(self, key: tuple):
+        _, size = self.cache.pop(key)
+        self.cache_bytes -= size
+
+    def _remember(self, key: tuple, result: pd.DataFrame):
+        size = int(result.memory_usage(index=True, deep=True).sum())
+        if size > self.cache_bytes_limit: return
+        self.cache[key] = (result, size); self.cache_bytes += size
+        while len(self.cache) > self.cache_entries_limit or self.cache_bytes > self.cache_bytes_limit:
+            self._evict(next(iter(self.cache))); self.stats["evictions"] += 1
+
+    def categories(self, dataset: str) -> List[str]:
+        with self.lock:
+            return list(self._frame(dataset)[2])
+
+    def query(self, dataset: str, competition=None, season=None, squad=None, player=None,
+              category=None, columns: Optional[List[str]] = None) -> pd.DataFrame:
+        """Rows of `dataset` ('player', 'squad' or 'fixtures') matching every given filter (a value or a
+        list of values; squad also matches fixture Home/Away, player also matches Player_Key), restricted
+        to `columns` and/or the columns of stat `category` (plus identifying columns)."""
+        filters = {"competition": _as_list(competition), "season": _as_list(season), "squad": _as_list(squad), "player": _as_list(player)}
+        with self.lock:
+            signature, frame, categories = self._frame(dataset)
+            key = (dataset, signature, tuple((name, tuple(values)) for name, values in filters.items() if values),
+                   tuple(_as_list(category) or ()), tuple(columns or ()))
+            cached = self.cache.get(key)
+            if cached is not None:
+                self.cache.move_to_end(key); self.stats["hits"] += 1
+                return cached[0].copy()
+            self.stats["misses"] += 1
+
+        mask = pd.Series(True, index=frame.index)
+        for name, values in filters.items():
+            if not values: continue
+            matched_columns = [col for col in FILTER_COLUMNS[name] if col in frame.columns]
+            if not matched_columns: raise KeyError(f"Dataset '{dataset}' cannot be filtered by {name}.")
+            mask &= frame[matched_columns].astype(str).isin(values).any(axis=1)
+        selected_columns = list(columns or [])
+        for name in _as_list(category) or []:
+            if name not in categories: raise KeyError(f"Unknown category '{name}' for '{dataset}'; known: {', '.join(categories) or 'none (re-run the combiner)'}.")
+            selected_columns += categories[name]
+        if selected_columns:
+            missing = [col for col in selected_columns if col not in frame.columns]
+            if missing: raise KeyError(f"Unknown column(s) for '{dataset}': {', '.join(missing)}")
+            selected_columns = list(dict.fromkeys([col for col in ALWAYS_KEPT_COLUMNS if col in frame.columns] + selected_columns))
+        result = frame.loc[mask, selected_columns] if selected_columns else frame.loc[mask]
+        result = result.reset_index(drop=True)
+
+        with self.lock:
+            if self.frames.get(dataset, (None,))[0] == signature: self._remember(key, result)
+        return result.copy()
+
+    def cache_info(self) -> Dict[str, float]:
+        with self.lock:
+            return {**self.stats, "entries": len(self.cache), "cache_mb": self.cache_bytes / 1024 / 1024}
+
+
+class QueryRequestHandler(BaseHTTPRequestHandler):
+    """GET /query/<dataset>?competition=..&season=..&squad=..&player=..&category=..&columns=a,b[&format=csv],
+    GET /categories/<dataset> and GET /cache. Repeat a parameter (or separate values with commas) to match several values."""
+    service: QueryService = None
+    protocol_version = "HTTP/1.1"
+
+    def _send(self, status: int, body: str, content_type: str = "application/json"):
+        payload = body.encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", f"{content_type}; charset=utf-8")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        params = {name: [v for value in values for v in value.split(',') if v] for name, values in parse_qs(url.query).items()}
+        parts = [part for part in url.path.split('/') if part]
+        try:
+            if parts == ["cache"]:
+                self._send(200, json.dumps(self.service.cache_info())); return
+            if len(parts) == 2 and parts[0] == "categories":
+                self._send(200, json.dumps(self.service.categories(parts[1]))); return
+            if len(parts) != 2 or parts[0] != "query":
+                self._send(404, json.dumps({"error": f"Unknown path {url.path}"})); return
+            result = self.service.query(parts[1], competition=params.get("competition"), season=params.get("season"), squad=params.get("squad"),
+                                        player=params.get("player"), category=params.get("category"), columns=params.get("columns"))
+            if params.get("format") == ["csv"]: self._send(200, result.to_csv(index=False), "text/csv")
+            else: self._send(200, result.to_json(orient="records", force_ascii=False))
+        except (KeyError, FileNotFoundError) as e:
+            self._send(400, json.dumps({"error": str(e).strip('"')}))
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_query_server(service: QueryService, host: str = "127.0.0.1", port: int = DEFAULT_QUERY_PORT) -> ThreadingHTTPServer:
+    """Serves `service` over HTTP on a background thread (localhost only by default; port 0 picks a free port)."""
+    handler = type("BoundQueryRequestHandler", (QueryRequestHandler,), {"service": service})
+    server = ThreadingHTTPServer((host, port), handler)
+    threading.Thread(target=server.serve_forever, name="query-service", daemon=True).start()
+    return server
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Query the combined FBRef master outputs, or serve them on localhost.")
+    parser.add_argument("--data_dir", type=str, default="output_data", help="Directory with the MASTER_* files (default: output_data).")
+    parser.add_argument("--cache_mb", type=float, default=DEFAULT_CACHE_MB, help=f"Memory bound of the result cache (default: {DEFAULT_CACHE_MB}).")
+    parser.add_argument("--serve", action="store_true", help="Serve the query API over HTTP instead of running one query.")
+    parser.add_argument("--port", type=int, default=DEFAULT_QUERY_PORT, help=f"Port for --serve (default: {DEFAULT_QUERY_PORT}).")
+    parser.add_argument("--dataset", choices=list(MASTER_DATASETS), default="squad")
+    for name in ("competition", "season", "squad", "player", "category", "columns"):
+        parser.add_argument(f"--{name}", nargs='+', default=None)
+    args = parser.parse_args()
+
+    service = QueryService(args.data_dir, cache_mb=args.cache_mb)
+    if args.serve:
+        server = start_query_server(service, port=args.port)
+        print(f"Serving {args.data_dir} on http://127.0.0.1:{server.server_port}/query/<dataset> (Ctrl+C to stop)")
+        try: threading.Event().wait()
+        except KeyboardInterrupt: server.shutdown()
+    else:
+        print(service.query(args.dataset, competition=args.competition, season=args.season, squad=args.squad, player=args.player,
+                            category=args.category, columns=args.columns).to_string(index=False))
@@ -0,0 +1,182 @@
+import os
+import re
+import json
+import shutil
+import hashlib
+import argparse
+import threading
+import pandas as pd
+from typing import Dict, List, Optional
+from urllib.parse import quote
+
+from stat_schemas import read_master_csv
+from columnar_store import read_columnar_master, PARTITION_COLUMNS
+
+CUBES_DIRNAME = "cubes"
+CUBE_STATE_FILENAME = "_cube_state.json"
+CUBE_MASTERS = {"player": "MASTER_PLAYER_STATS.csv", "squad": "MASTER_SQUAD_STATS.csv"}
+# Columns identifying a cube row, as far as the master has them.
+CUBE_ID_COLUMNS = {"player": ["Player", "Player_Key", "Nation", "Pos", "Squad", "Comp", "Born"], "squad": ["Squad", "Comp"]}
+LOOKUP_KEY_COLUMNS = {"player": "Player_Key", "squad": "Squad"}
+# Players below this many minutes in a (competition, season) get per-90 values but no percentiles.
+DEFAULT_MIN_MINUTES = {"player": 450, "squad": 0}
+POSITION_GROUPS = ["GK", "DF", "MF", "FW"]
+# Columns that are not counts (identifiers, playing time, FBRef's own rates, percentages, averages and
+# ratios); they are not normalised per 90.
+NON_COUNT_COLUMNS = {"Rk", "Age", "Born", "Pl", "#_Pl", "Poss", "90s", "Standard_Dist", "Performance_Save", "Penalty_Kicks_Save", "Team_Success_PPM"}
+NON_COUNT_PATTERN = re.compile(r"^(Playing_Time|Starts|Subs|Per_90_Minutes)_|90$|_2$|%|Avg|GSh$|GSoT$|OnOff$")
+PER90_SUFFIX, PERCENTILE_SUFFIX = "_p90", "_pct"
+
+
+def cube_path(data_dir: str, data_type: str) -> str:
+    return os.path.join(data_dir, CUBES_DIRNAME, f"{data_type.upper()}_ROLLUPS.parquet")
+
+
+def per90_columns(df: pd.DataFrame) -> List[str]:
+    """Count columns of a master that get a per-90 rate."""
+    return [col for col in df.columns if pd.api.types.is_numeric_dtype(df[col]) and col not in NON_COUNT_COLUMNS
+            and not NON_COUNT_PATTERN.search(col)]
+
+
+def nineties_played(df: pd.DataFrame) -> pd.Series:
+    """Full matches played per row: the 90s column of the standard table, else of any other table, else minutes / 90."""
+    nineties = pd.Series(float('nan'), index=df.index, dtype='float32')
+    for col in ("Playing_Time_90s", "90s"):
+        if col in df.columns: nineties = nineties.fillna(df[col].astype('float32'))
+    if "Playing_Time_Min" in df.columns: nineties = nineties.fillna(df["Playing_Time_Min"].astype('float32') / 90)
+    return nineties
+
+
+def position_group(df: pd.DataFrame, data_type: str) -> pd.Series:
+    """GK, DF, MF or FW from a player's first listed position ('DF,MF' is a defender); 'Squad' for squads."""
+    if data_type != "player" or "Pos" not in df.columns: return pd.Series("Squad", index=df.index, dtype="category")
+    first = df["Pos"].astype("string").str.split(",").str[0].str.strip()
+    return first.where(first.isin(POSITION_GROUPS), "Unknown").astype("category")
+
+
+def build_cube(master_df: pd.DataFrame, data_type: str, min_minutes: float) -> pd.DataFrame:
+    """Per-90 rate of every count column and its percentile (0-100) among the rows of the same
+    competition, season and position group with at least `min_minutes`, in one grouped rank."""
+    id_columns = [col for col in PARTITION_COLUMNS + CUBE_ID_COLUMNS[data_type] if col in master_df.columns]
+    counts = per90_columns(master_df)
+    nineties = nineties_played(master_df)
+    per90 = master_df[counts].astype('float32').div(nineties.where(nineties > 0), axis=0)
+    cube = master_df[id_columns].copy()
+    cube["Position_Group"] = position_group(master_df, data_type)
+    cube["Minutes"] = (nineties * 90).round().astype('float32')
+    eligible = cube["Minutes"] >= min_minutes
+    groups = [cube[col].astype(str) for col in PARTITION_COLUMNS if col in cube.columns] + [cube["Position_Group"].astype(str)]
+    percentiles = per90.where(eligible, axis=0).groupby(groups, sort=False).rank(pct=True) * 100
+    return pd.concat([cube, per90.add_suffix(PER90_SUFFIX), percentiles.astype('float32').add_suffix(PERCENTILE_SUFFIX)], axis=1)
+
+
+def group_fingerprints(master_df: pd.DataFrame) -> Dict[str, str]:
+    """Content hash of the rows of every (competition, season) group of a master, keyed 'competition|season'."""
+    row_hashes = pd.util.hash_pandas_object(master_df, index=False)
+    header = json.dumps(list(master_df.columns)).encode("utf-8")
+    fingerprints = {}
+    for (competition, season), positions in master_df.groupby([master_df[col].astype(str) for col in PARTITION_COLUMNS], sort=False).indices.items():
+        fingerprints[f"{competition}|{season}"] = hashlib.sha1(header + row_hashes.to_numpy()[positions].tobytes()).hexdigest()
+    return fingerprints
+
+
+def _partition_dir(path: str, competition: str, season: str) -> str:
+    return os.path.join(path, f"{PARTITION_COLUMNS[0]}={quote(competition, safe='')}", f"{PARTITION_COLUMNS[1]}={quote(season, safe='')}")
+
+
+def build_rollup_cube(data_dir: str, data_type: str, min_minutes: Optional[float] = None, full_rebuild: bool = False) -> bool:
+    """Builds or refreshes the rollup cube of one master under `data_dir`/cubes, a Parquet dataset
+    partitioned by Competition/Season. Only the (competition, season) groups whose master rows changed
+    since the last build (by content hash) are recomputed and their partitions replaced; a change of
+    settings or columns rebuilds everything. Returns False when there is nothing to build or pyarrow is
+    unavailable."""
+    try:
+        import pyarrow as pa
+        import pyarrow.dataset as ds
+    except ImportError:
+        print(f"-> pyarrow is not installed; skipping the {data_type} rollup cube.")
+        return False
+    master_path = os.path.join(data_dir, CUBE_MASTERS[data_type])
+    if not os.path.isfile(master_path): print(f"No {os.path.basename(master_path)} to build a rollup cube from."); return False
+    min_minutes = DEFAULT_MIN_MINUTES[data_type] if min_minutes is None else min_minutes
+    output_path = cube_path(data_dir, data_type)
+    state_path = os.path.join(output_path, CUBE_STATE_FILENAME)
+
+    master_df, _ = read_master_csv(master_path, data_type)
+    fingerprints = group_fingerprints(master_df)
+    settings = {"min_minutes": min_minutes, "columns": per90_columns(master_df)}
+    previous = {}
+    if not full_rebuild and os.path.isfile(state_path):
+        with open(state_path, encoding="utf-8") as f: previous = json.load(f)
+    if previous.get("settings") != settings:
+        if previous: print(f"Rollup settings or {data_type} master columns changed; rebuilding the whole cube.")
+        previous = {}; shutil.rmtree(output_path, ignore_errors=True)
+    old_fingerprints = previous.get("groups", {})
+    changed = [group for group, fingerprint in fingerprints.items() if old_fingerprints.get(group) != fingerprint]
+    removed = [group for group in old_fingerprints if group not in fingerprints]
+    if not changed and not removed:
+        print(f"{os.path.basename(output_path)} is up to date; no (competition, season) group changed."); return True
+
+    for group in removed: shutil.rmtree(_partition_dir(output_path, *group.split("|", 1)), ignore_errors=True)
+    if changed:
+        group_keys = master_df[PARTITION_COLUMNS[0]].astype(str) + "|" + master_df[PARTITION_COLUMNS[1]].astype(str)
+        cube = build_cube(master_df[group_keys.isin(changed).to_numpy()], data_type, min_minutes)
+        for col in PARTITION_COLUMNS: cube[col] = cube[col].astype("string").fillna("Unknown")
+        table = pa.Table.from_pandas(cube, preserve_index=False)
+        partitioning = ds.partitioning(pa.schema([table.schema.field(col) for col in PARTITION_COLUMNS]), flavor="hive")
+        ds.write_dataset(table, output_path, format="parquet", partitioning=partitioning,
+                         existing_data_behavior="delete_matching", basename_template="part-{i}.parquet")
+    with open(state_path, "w", encoding="utf-8") as f:
+        json.dump({"settings": settings, "groups": fingerprints}, f, indent=1)
+    print(f"Rollup cube {os.path.basename(output_path)}: {len(changed)} group(s) rebuilt, {len(removed)} removed, "
+          f"{len(fingerprints) - len(changed)} unchanged ({len(settings['columns'])} per-90 metrics).")
+    return True
+
+
+class RollupCube:
+    """Constant-time lookups in a rollup cube: row positions are hashed once by (competition, season,
+    key) — Player_Key for players, Squad for squads — and reloaded when the cube is rebuilt. Safe to
+    share between threads."""
+
+    def __init__(self, data_dir: str = "output_data", data_type: str = "player"):
+        self.path = cube_path(data_dir, data_type)
+        self.key_column = LOOKUP_KEY_COLUMNS[data_type]
+        self.lock = threading.Lock()
+        self.signature = None
+        self.frame: Optional[pd.DataFrame] = None
+        self.positions: Dict[tuple, object] = {}
+
+    def _loaded(self) -> tuple:
+        signature = os.stat(os.path.join(self.path, CUBE_STATE_FILENAME)).st_mtime_ns
+        with self.lock:
+            if self.frame is None or signature != self.signature:
+                self.frame = read_columnar_master(self.path)
+                keys = [self.frame[col].astype(str) for col in PARTITION_COLUMNS + [self.key_column]]
+                self.positions = self.frame.groupby(keys, sort=False).indices
+                self.signature = signature
+            return self.frame, self.positions
+
+    def lookup(self, competition: str, season: str, key: str) -> pd.DataFrame:
+        """Cube rows of one player (one per squad played for) or squad in a competition and season."""
+        frame, positions = self._loaded()
+        return frame.iloc[positions.get((competition, season, key), [])].reset_index(drop=True)
+
+    def percentiles(self, competition: str, season: str, key: str, metrics: List[str]) -> pd.DataFrame:
+        """Per-90 values and percentiles of `metrics` (master column names) for one player or squad."""
+        rows = self.lookup(competition, season, key)
+        columns = [f"{metric}{suffix}" for metric in metrics for suffix in (PER90_SUFFIX, PERCENTILE_SUFFIX)]
+        missing = [col for col in columns if col not in rows.columns]
+        if missing: raise KeyError(f"Unknown cube column(s): {', '.join(missing)}")
+        return rows[[col for col in ["Squad", "Position_Group", "Minutes"] if col in rows.columns] + columns]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Build per-90 and percentile rollup cubes from the player and squad masters.")
+    parser.add_argument("--data_dir", type=str, default="output_data", help="Directory holding the MASTER_*_STATS.csv files; cubes go to its cubes/ subdirectory.")
+    parser.add_argument("--types", nargs='+', choices=list(CUBE_MASTERS), default=list(CUBE_MASTERS))
+    parser.add_argument("--min_minutes", type=float, default=None, help=f"Minutes needed for a percentile (default: {DEFAULT_MIN_MINUTES['player']} for players, {DEFAULT_MIN_MINUTES['squad']} for squads).")
+    parser.add_argument("--full_rebuild", action="store_true", help="Recompute every (competition, season) group instead of only the changed ones.")
+    args = parser.parse_args()
+
+    for data_type in args.types:
+        build_rollup_cube(args.data_dir, data_type, args.min_minutes, args.full_rebuild)
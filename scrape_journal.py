@@ -0,0 +1,98 @@
+import time
+import sqlite3
+import threading
+from typing import Dict, List, Optional
+from urllib.parse import urlparse
+
+DEFAULT_JOURNAL_FILENAME = "scrape_journal.sqlite"
+DEFAULT_MAX_ATTEMPTS = 3
+DEFAULT_BACKOFF_SECONDS = 30.0
+# Failed tasks coming due within this many seconds of each other are retried in one round.
+RETRY_BATCH_SECONDS = 1.0
+
+STATE_PENDING, STATE_DONE, STATE_RETRYING, STATE_FAILED = "pending", "done", "retrying", "failed"
+
+
+def journal_task_key(task: Dict) -> str:
+    """(host, target, season, category) of a task, so a run against another --base_url (e.g. the local
+    stand-in) keeps its own state and never marks the real site's tasks done."""
+    return f"{urlparse(task['url']).netloc.lower()}|{task['target_key']}|{task['season']}|{task['category']}"
+
+
+class ScrapeJournal:
+    """Persistent state of every (host, target, season, category) task, so an interrupted run can resume.
+
+    A failed task moves to 'retrying' with an exponentially growing delay (backoff_seconds * 2**(attempts-1))
+    until it has used max_attempts, after which it is 'failed' and only rerun with --retry-failed."""
+
+    def __init__(self, journal_path: str, max_attempts: int = DEFAULT_MAX_ATTEMPTS, backoff_seconds: float = DEFAULT_BACKOFF_SECONDS):
+        self.max_attempts = max(1, max_attempts)
+        self.backoff_seconds = backoff_seconds
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(journal_path, check_same_thread=False)
+        self.conn.execute("""CREATE TABLE IF NOT EXISTS tasks (
+            task_key TEXT PRIMARY KEY, url TEXT NOT NULL, state TEXT NOT NULL, attempts INTEGER NOT NULL DEFAULT 0,
+            last_outcome TEXT, next_attempt_at REAL, updated_at REAL NOT NULL)""")
+        # Keys written before they included the host get it from the task's URL.
+        legacy = [(key, url) for key, url in self.conn.execute("SELECT task_key, url FROM tasks") if key.count("|") == 2]
+        self.conn.executemany("UPDATE OR IGNORE tasks SET task_key = ? WHERE task_key = ?", [(f"{urlparse(url).netloc.lower()}|{key}", key) for key, url in legacy])
+        self.conn.commit()
+
+    def _execute(self, sql: str, params: tuple = ()) -> List[tuple]:
+        with self.lock:
+            rows = self.conn.execute(sql, params).fetchall()
+            self.conn.commit()
+        return rows
+
+    def state(self, task: Dict) -> Optional[str]:
+        rows = self._execute("SELECT state FROM tasks WHERE task_key = ?", (journal_task_key(task),))
+        return rows[0][0] if rows else None
+
+    def plan(self, tasks: List[Dict], resume: bool = False, retry_failed: bool = False) -> List[Dict]:
+        """Registers `tasks` and returns the ones to run. Without `resume` every task starts over as pending;
+        with it, done tasks are skipped and failed ones are skipped unless `retry_failed`."""
+        now = time.time(); to_run = []
+        for task in tasks:
+            key = journal_task_key(task)
+            self._execute("INSERT OR IGNORE INTO tasks (task_key, url, state, updated_at) VALUES (?, ?, ?, ?)", (key, task['url'], STATE_PENDING, now))
+            state = self.state(task)
+            if resume and state == STATE_DONE: continue
+            if resume and state == STATE_FAILED and not retry_failed: continue
+            if not resume or state == STATE_FAILED:
+                self._execute("UPDATE tasks SET state = ?, attempts = 0, next_attempt_at = NULL, updated_at = ? WHERE task_key = ?", (STATE_PENDING, now, key))
+            to_run.append(task)
+        return to_run
+
+    def record_outcome(self, task: Dict, outcome: str, failed: bool) -> str:
+        key = journal_task_key(task); now = time.time()
+        if not failed:
+            self._execute("UPDATE tasks SET state = ?, last_outcome = ?, next_attempt_at = NULL, updated_at = ? WHERE task_key = ?", (STATE_DONE, outcome, now, key))
+            return STATE_DONE
+        attempts = (self._execute("SELECT attempts FROM tasks WHERE task_key = ?", (key,)) or [(0,)])[0][0] + 1
+        state = STATE_RETRYING if attempts < self.max_attempts else STATE_FAILED
+        next_attempt_at = now + self.backoff_seconds * 2 ** (attempts - 1) if state == STATE_RETRYING else None
+        self._execute("UPDATE tasks SET state = ?, attempts = ?, last_outcome = ?, next_attempt_at = ?, updated_at = ? WHERE task_key = ?",
+                      (state, attempts, outcome, next_attempt_at, now, key))
+        return state
+
+    def tasks_to_retry(self, tasks: List[Dict]) -> List[Dict]:
+        return [task for task in tasks if self.state(task) == STATE_RETRYING]
+
+    def tasks_due(self, tasks: List[Dict], within_seconds: float = 0.0) -> List[Dict]:
+        """The retrying tasks among `tasks` whose backoff is over (or ends within `within_seconds`)."""
+        due_at = time.time() + within_seconds
+        due_keys = {key for key, next_attempt_at in self._execute("SELECT task_key, next_attempt_at FROM tasks WHERE state = ?", (STATE_RETRYING,))
+                    if (next_attempt_at or 0.0) <= due_at}
+        return [task for task in tasks if journal_task_key(task) in due_keys]
+
+    def seconds_until_due(self, tasks: List[Dict]) -> float:
+        keys = [journal_task_key(task) for task in tasks]
+        if not keys: return 0.0
+        rows = self._execute(f"SELECT MIN(next_attempt_at) FROM tasks WHERE task_key IN ({','.join('?' * len(keys))})", tuple(keys))
+        return max(0.0, (rows[0][0] or 0.0) - time.time())
+
+    def summary(self) -> Dict[str, int]:
+        return dict(self._execute("SELECT state, COUNT(*) FROM tasks GROUP BY state"))
+
+    def close(self):
+        with self.lock: self.conn.close()
@@ -0,0 +1,170 @@
+import json
+import time
+import argparse
+import threading
+import contextvars
+from contextlib import contextmanager
+from typing import Dict, List, Optional
+
+DEFAULT_METRICS_FILENAME = "scrape_metrics.jsonl"
+# Phases in pipeline order; anything else recorded with `phase()` is reported after these.
+SCRAPE_PHASES = ["driver_start", "rate_limit", "navigate", "wait", "sleep", "http", "cache", "extract", "clean", "save"]
+
+_current_task: contextvars.ContextVar[Optional[Dict]] = contextvars.ContextVar("scrape_metrics_task", default=None)
+
+
+@contextmanager
+def phase(name: str):
+    """Adds the time spent in the block to phase `name` of the task being measured on this thread.
+    A no-op outside `ScrapeMetrics.task`, so fetchers and scrape functions can be timed unconditionally."""
+    record = _current_task.get()
+    if record is None:
+        yield; return
+    started_at = time.perf_counter()
+    try:
+        yield
+    finally:
+        record['phases'][name] = record['phases'].get(name, 0.0) + time.perf_counter() - started_at
+
+
+def count(name: str, amount: int = 1):
+    """Adds `amount` to counter `name` (e.g. bytes_fetched, rows_extracted) of the task being measured."""
+    record = _current_task.get()
+    if record is not None: record['counters'][name] = record['counters'].get(name, 0) + amount
+
+
+def run_in_task(record: Optional[Dict], fn, *args):
+    """Calls fn(*args) with its phases and counters attributed to task `record` (from
+    `ScrapeMetrics.start_task`), for work on a task that hops between threads."""
+    if record is None: return fn(*args)
+    token = _current_task.set(record)
+    try:
+        return fn(*args)
+    finally:
+        _current_task.reset(token)
+
+
+def percentile(values: List[float], q: float) -> float:
+    """Linear-interpolated percentile (q in 0..100) of a non-empty list."""
+    ordered = sorted(values)
+    position = (len(ordered) - 1) * q / 100.0
+    lower = int(position); upper = min(lower + 1, len(ordered) - 1)
+    return ordered[lower] + (ordered[upper] - ordered[lower]) * (position - lower)
+
+
+def summarise_records(records: List[Dict], run_id: str, elapsed_minutes: float) -> Dict:
+    """p50/p95 of every phase and of the task total, outcomes, counters, retries and pages per minute."""
+    elapsed_minutes = max(elapsed_minutes, 1e-9)
+    phase_names = SCRAPE_PHASES + sorted({name for r in records for name in r['phases']} - set(SCRAPE_PHASES))
+    phases = {}
+    for name in phase_names + ["total"]:
+        values = [r['total_seconds'] if name == "total" else r['phases'][name] for r in records if name == "total" or name in r['phases']]
+        if values: phases[name] = {"count": len(values), "p50": round(percentile(values, 50), 4), "p95": round(percentile(values, 95), 4), "sum": round(sum(values), 4)}
+    outcomes, counters, failing_targets = {}, {}, {}
+    for r in records:
+        outcomes[r['outcome']] = outcomes.get(r['outcome'], 0) + 1
+        for name, amount in r['counters'].items(): counters[name] = counters.get(name, 0) + amount
+        if r['outcome'] not in ("saved", "skipped"): failing_targets[r['target']] = failing_targets.get(r['target'], 0) + 1
+    pages = sum(1 for r in records if r['outcome'] not in ("skipped", None))
+    return {"run_id": run_id, "summary": True, "tasks": len(records), "pages": pages, "retries": sum(r['retries'] for r in records),
+            "elapsed_minutes": round(elapsed_minutes, 3), "pages_per_minute": round(pages / elapsed_minutes, 2), "outcomes": outcomes,
+            "counters": counters, "not_saved_by_target": failing_targets, "phases": phases}
+
+
+class ScrapeMetrics:
+    """Per-task timings and counters of a scrape run, appended as one JSON line per task attempt to
+    `metrics_path`, plus a run summary line when the run ends. Safe to share between worker threads;
+    each worker's phases are attributed to the task it is running through a context variable."""
+
+    def __init__(self, metrics_path: str, run_id: Optional[str] = None):
+        self.metrics_path = metrics_path
+        self.run_id = run_id or time.strftime("%Y%m%dT%H%M%S")
+        self.lock = threading.Lock()
+        self.records: List[Dict] = []
+        self.attempts: Dict[str, int] = {}
+        self.started_at = time.monotonic()
+        self.file = open(metrics_path, "a", encoding="utf-8")
+
+    def _write(self, record: Dict):
+        with self.lock:
+            self.file.write(json.dumps(record) + "\n"); self.file.flush()
+
+    def start_task(self, task: Dict, worker: Optional[str] = None) -> Dict:
+        """Starts measuring one attempt of a scrape task and returns its record. Pair with `finish_task`;
+        `task()` does both for work that stays on one thread."""
+        task_key = f"{task['target_key']}|{task['season']}|{task['category']}"
+        with self.lock:
+            self.attempts[task_key] = self.attempts.get(task_key, 0) + 1
+            attempt = self.attempts[task_key]
+        return {"run_id": self.run_id, "task": task_key, "url": task['url'], "target": task['target_key'], "season": task['season'],
+                "category": task['category'], "attempt": attempt, "retries": attempt - 1, "worker": worker or threading.current_thread().name,
+                "outcome": None, "phases": {}, "counters": {}, "_started_at": time.perf_counter()}
+
+    def finish_task(self, record: Dict):
+        record['total_seconds'] = round(time.perf_counter() - record.pop('_started_at'), 4)
+        record['phases'] = {name: round(seconds, 4) for name, seconds in record['phases'].items()}
+        record['finished_at'] = time.time()
+        with self.lock: self.records.append(record)
+        self._write(record)
+
+    @contextmanager
+    def task(self, task: Dict):
+        """Measures one attempt of a scrape task. Yields the record; set record['outcome'] before leaving."""
+        record = self.start_task(task)
+        token = _current_task.set(record)
+        try:
+            yield record
+        except BaseException as e:
+            record['outcome'] = record['outcome'] or "error"; record['error'] = f"{type(e).__name__} {e}"
+            raise
+        finally:
+            _current_task.reset(token)
+            self.finish_task(record)
+
+    def summary(self) -> Dict:
+        with self.lock: records = list(self.records)
+        return summarise_records(records, self.run_id, (time.monotonic() - self.started_at) / 60)
+
+    def close(self) -> Dict:
+        """Appends the run summary to the metrics file and closes it. Returns the summary."""
+        summary = self.summary()
+        self._write(summary)
+        with self.lock: self.file.close()
+        return summary
+
+
+def format_summary(summary: Dict) -> str:
+    lines = [f"Run {summary['run_id']}: {summary['pages']} page(s) in {summary['elapsed_minutes']:.1f} min ({summary['pages_per_minute']:.2f} pages/min), "
+             f"{summary['retries']} retr{'y' if summary['retries'] == 1 else 'ies'}; outcomes {summary['outcomes']}"]
+    if summary['counters']: lines.append(f"  Counters: {summary['counters']}")
+    lines.append(f"  {'phase':<12}{'count':>7}{'p50 s':>10}{'p95 s':>10}{'total s':>11}")
+    for name, stats in summary['phases'].items():
+        lines.append(f"  {name:<12}{stats['count']:>7}{stats['p50']:>10.3f}{stats['p95']:>10.3f}{stats['sum']:>11.1f}")
+    if summary['not_saved_by_target']: lines.append(f"  Attempts not saved, by target: {summary['not_saved_by_target']}")
+    return "\n".join(lines)
+
+
+def load_metrics(metrics_path: str, run_id: Optional[str] = None) -> List[Dict]:
+    """Task records of `run_id` (default: the last run) from a metrics file."""
+    with open(metrics_path, encoding="utf-8") as f:
+        records = [json.loads(line) for line in f if line.strip()]
+    run_id = run_id or (records[-1]['run_id'] if records else None)
+    return [r for r in records if r['run_id'] == run_id and not r.get('summary')]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Summarise a scrape run from its metrics file.")
+    parser.add_argument("--metrics_file", type=str, default=f"output_data/{DEFAULT_METRICS_FILENAME}", help="JSON-lines file written by advanced_scraper_selenium.py.")
+    parser.add_argument("--run_id", type=str, default=None, help="Run to summarise (default: the last one in the file).")
+    args = parser.parse_args()
+
+    records = load_metrics(args.metrics_file, args.run_id)
+    if not records: print(f"No task records in {args.metrics_file}."); raise SystemExit(1)
+    with open(args.metrics_file, encoding="utf-8") as f:
+        summaries = [json.loads(line) for line in f if line.strip()]
+    summaries = [s for s in summaries if s.get('summary') and s['run_id'] == records[0]['run_id']]
+    if summaries: print(format_summary(summaries[-1]))
+    else:
+        # Interrupted run without a summary line: rebuild it from the task records.
+        elapsed_seconds = max(r['finished_at'] for r in records) - min(r['finished_at'] - r['total_seconds'] for r in records)
+        print(format_summary(summarise_records(records, records[0]['run_id'], elapsed_seconds / 60)))
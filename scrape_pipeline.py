@@ -0,0 +1,164 @@
+from __future__ import annotations
+import os
+import asyncio
+import contextvars
+from concurrent.futures import ThreadPoolExecutor
+from typing import TYPE_CHECKING, Callable, Dict, List, Optional
+
+from page_fetchers import PrefetchedFetcher
+from scrape_metrics import phase, run_in_task
+from dataset_manifest import record_saved_output
+from delta_store import record_table_delta
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+PIPELINE_MODES = ["threads", "async"]
+DEFAULT_PARSE_WORKERS = 2
+# Pages (and parsed tables) allowed to wait between two stages before the stage in front of them pauses.
+DEFAULT_QUEUE_SIZE = 4
+
+_pending_writes: contextvars.ContextVar[Optional[List[tuple]]] = contextvars.ContextVar("scrape_pending_writes", default=None)
+
+
+def save_csv(df: pd.DataFrame, path: str, entry: Optional[Dict] = None, record: bool = True):
+    """Writes a scraped table to `path` (deferred to the write stage inside the async pipeline).
+
+    With `entry` and `record`, the table is also added to the active manifest and delta store; pass `record=False` to write only the CSV."""
+    if not record: entry = None
+    pending = _pending_writes.get()
+    if pending is not None: pending.append((df, path, entry)); return
+    _write_table(df, path, entry)
+
+
+def _write_table(df: pd.DataFrame, path: str, entry: Optional[Dict]):
+    def write_csv(delta: Optional[Dict] = None):
+        if delta is not None:
+            print(f"-> Version {delta['version']}: {delta['inserted']} inserted, {delta['updated']} updated, {delta['removed']} removed row(s)")
+        with phase("save"): df.to_csv(path, index=False)
+
+    # A changed table is written before its new version is stored, so a failed write leaves the delta store behind, not ahead.
+    delta = record_table_delta(df, entry, before_commit=write_csv) if entry is not None else None
+    if delta is None: write_csv()
+    elif not delta['changed']:
+        if os.path.isfile(path): print(f"-> No rows changed since version {delta['version']}; kept {path}")
+        else: write_csv()
+    if entry is not None: record_saved_output(path, df, entry)
+
+
+def _run_deferring_writes(fn: Callable, *args) -> tuple:
+    """(fn(*args), the (frame, path, entry) it saved with `save_csv`) without writing them."""
+    pending: List[tuple] = []
+    token = _pending_writes.set(pending)
+    try:
+        return fn(*args), pending
+    finally:
+        _pending_writes.reset(token)
+
+
+def _fetch_page(session, task: Dict, fetch_options: Callable[[Dict], Dict]) -> PrefetchedFetcher:
+    # Errors are handed on to the scrape function, which turns them into its usual outcome and debug file.
+    try:
+        return PrefetchedFetcher(task['url'], session.fetch(task['url'], **fetch_options(task)))
+    except Exception as e:
+        return PrefetchedFetcher(task['url'], error=e)
+
+
+def _write_tables(pending: List[tuple]):
+    for df, path, entry in pending: _write_table(df, path, entry)
+
+
+async def _run_pipeline(tasks: List[Dict], scrape_task: Callable, session_factory: Callable[[], object], fetch_options: Callable[[Dict], Dict],
+                        needs_page: Callable[[Dict], bool], page_fetched: Optional[Callable[[Dict, str], None]], finish_task: Callable, metrics,
+                        worker_count: int, parse_workers: int, queue_size: int, close_session: Optional[Callable[[object], None]]) -> List[object]:
+    loop = asyncio.get_running_loop()
+    results: List[object] = [None] * len(tasks)
+    task_queue: asyncio.Queue = asyncio.Queue()
+    for index, task in enumerate(tasks): task_queue.put_nowait((index, task))
+    fetched: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+    parsed: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+    parse_executor = ThreadPoolExecutor(parse_workers, thread_name_prefix="scrape-parse")
+    write_executor = ThreadPoolExecutor(1, thread_name_prefix="scrape-write")
+
+    async def fetch_worker(worker_id: int):
+        # One thread per fetch worker, so each session (HTTP pool or WebDriver) stays on its own thread.
+        executor = ThreadPoolExecutor(1, thread_name_prefix=f"scrape-fetch-{worker_id}")
+        session = None
+        try:
+            while not task_queue.empty():
+                index, task = task_queue.get_nowait()
+                record = metrics.start_task(task, worker=f"fetch-{worker_id}") if metrics is not None else None
+                try:
+                    if session is None: session = await loop.run_in_executor(executor, session_factory)
+                    page = await loop.run_in_executor(executor, run_in_task, record, _fetch_page, session, task, fetch_options) if needs_page(task) else PrefetchedFetcher(task['url'])
+                except Exception as e:
+                    page = PrefetchedFetcher(task['url'], error=e)
+                if page_fetched is not None and page.page_source is not None: page_fetched(task, page.page_source)
+                await fetched.put((index, task, record, page))
+        finally:
+            if session is not None and close_session is not None:
+                try: await loop.run_in_executor(executor, close_session, session)
+                except Exception as e: print(f"-> Fetch worker {worker_id} could not close its session: {e}")
+            executor.shutdown(wait=False)
+
+    async def parse_worker():
+        while (item := await fetched.get()) is not None:
+            index, task, record, page = item
+            try:
+                outcome, pending = await loop.run_in_executor(parse_executor, run_in_task, record, _run_deferring_writes, scrape_task, page, task)
+            except Exception as e:
+                print(f"!! Parsing failed on task {task.get('url', index)}: {type(e).__name__} {e}")
+                outcome, pending = "error", []
+            await parsed.put((index, task, record, outcome, pending))
+
+    async def write_worker():
+        while (item := await parsed.get()) is not None:
+            index, task, record, outcome, pending = item
+            try:
+                if pending: await loop.run_in_executor(write_executor, run_in_task, record, _write_tables, pending)
+            except Exception as e:
+                print(f"!! Writing failed on task {task.get('url', index)}: {type(e).__name__} {e}")
+                outcome = "error"
+            results[index] = outcome
+            if record is not None:
+                record['outcome'] = outcome or "error"; metrics.finish_task(record)
+            finish_task(task, outcome)
+
+    parsers = [asyncio.create_task(parse_worker()) for _ in range(parse_workers)]
+    writer = asyncio.create_task(write_worker())
+    try:
+        await asyncio.gather(*(fetch_worker(i) for i in range(max(1, min(worker_count, len(tasks) or 1)))))
+        for _ in parsers: await fetched.put(None)
+        await asyncio.gather(*parsers)
+        await parsed.put(None)
+        await writer
+    finally:
+        parse_executor.shutdown(); write_executor.shutdown()
+    return results
+
+
+def run_tasks_async_pipeline(tasks: List[Dict],
+                             scrape_task: Callable[[object, Dict], object],
+                             session_factory: Callable[[], object],
+                             fetch_options: Callable[[Dict], Dict],
+                             finish_task: Callable[[Dict, object], None],
+                             needs_page: Callable[[Dict], bool] = lambda task: True,
+                             page_fetched: Optional[Callable[[Dict, str], None]] = None,
+                             metrics=None,
+                             worker_count: int = 1,
+                             parse_workers: int = DEFAULT_PARSE_WORKERS,
+                             queue_size: int = DEFAULT_QUEUE_SIZE,
+                             close_session: Optional[Callable[[object], None]] = None) -> List[object]:
+    """Runs every task through a staged asyncio pipeline instead of one thread doing fetch, parse and
+    write in turn: `worker_count` fetch workers (each owning one session, drawing from its rate limiter)
+    feed a bounded queue of pages, `parse_workers` executor threads run `scrape_task` on the prefetched
+    pages, and a single write stage saves the tables they produced with `save_csv`. A full queue pauses
+    the stage in front of it, so at most about 2 * `queue_size` pages and parsed tables are held in memory.
+
+    `fetch_options(task)` gives the fetch arguments `scrape_task` would have used; tasks for which
+    `needs_page(task)` is false go to `scrape_task` without a page load. `page_fetched(task, page_source)`
+    is called in the fetch stage as soon as a page is loaded, before later tasks are checked with
+    `needs_page`, since their parse stage may still be pages behind. `finish_task(task, outcome)` is
+    called once a task's tables are written. Returns the per-task outcomes in the same order as `tasks`."""
+    return asyncio.run(_run_pipeline(tasks, scrape_task, session_factory, fetch_options, needs_page, page_fetched, finish_task, metrics,
+                                     worker_count, max(1, parse_workers), max(1, queue_size), close_session))
@@ -0,0 +1,91 @@
+import threading
+import time
+import queue
+from typing import Callable, Dict, List, Optional
+from urllib.parse import urlparse
+
+
+class TokenBucket:
+    """Blocking token bucket: `rate` tokens per second, at most `burst` saved up."""
+
+    def __init__(self, rate: float, burst: int = 1):
+        if rate <= 0: raise ValueError(f"Token bucket rate must be positive, got {rate}")
+        self.rate = rate
+        self.burst = max(1, burst)
+        self.tokens = float(self.burst)
+        self.last_refill = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self) -> float:
+        # Reserve a token under the lock (tokens may go negative), then sleep outside it,
+        # so concurrent callers queue up in order instead of all waking at once.
+        with self.lock:
+            now = time.monotonic()
+            self.tokens = min(self.burst, self.tokens + (now - self.last_refill) * self.rate)
+            self.last_refill = now
+            self.tokens -= 1
+            wait_seconds = max(0.0, -self.tokens / self.rate)
+        if wait_seconds > 0: time.sleep(wait_seconds)
+        return wait_seconds
+
+
+class HostRateLimiter:
+    """One shared token bucket per host, so every worker draws from the same politeness budget."""
+
+    def __init__(self, max_rps: float, burst: int = 1):
+        self.max_rps = max_rps
+        self.burst = burst
+        self.buckets: Dict[str, TokenBucket] = {}
+        self.lock = threading.Lock()
+
+    def acquire(self, url: str) -> float:
+        host = urlparse(url).netloc.lower()
+        with self.lock:
+            bucket = self.buckets.get(host)
+            if bucket is None:
+                bucket = self.buckets[host] = TokenBucket(self.max_rps, self.burst)
+        return bucket.acquire()
+
+
+def run_tasks_with_worker_pool(tasks: List[Dict],
+                               run_task: Callable[[object, Dict], object],
+                               session_factory: Callable[[], object],
+                               worker_count: int = 1,
+                               close_session: Optional[Callable[[object], None]] = None,
+                               session_failed: Optional[Callable[[Dict, Exception], object]] = None) -> List[object]:
+    """Runs every task on a pool of `worker_count` threads, each owning one session (e.g. a WebDriver).
+
+    Sessions are created lazily on a worker's first task, so idle workers never start a browser; rate
+    limiting is left to the sessions. A task whose worker cannot start its session gets the result of
+    `session_failed(task, error)` ("error" without it), so the caller can record it like a failed task.
+    Returns the per-task results in the same order as `tasks`."""
+    task_queue: "queue.Queue[tuple[int, Dict]]" = queue.Queue()
+    for index, task in enumerate(tasks): task_queue.put((index, task))
+    results: List[object] = [None] * len(tasks)
+    worker_count = max(1, min(worker_count, len(tasks) or 1))
+
+    def worker(worker_id: int):
+        session = None
+        try:
+            while True:
+                try: index, task = task_queue.get_nowait()
+                except queue.Empty: return
+                if session is None:
+                    try: session = session_factory()
+                    except Exception as e:
+                        print(f"!! Worker {worker_id} could not start its session for {task.get('url', index)}: {type(e).__name__} {e}")
+                        results[index] = session_failed(task, e) if session_failed is not None else "error"
+                        continue
+                try: results[index] = run_task(session, task)
+                except Exception as e:
+                    print(f"!! Worker {worker_id} failed on task {task.get('url', index)}: {type(e).__name__} {e}")
+                    results[index] = "error"
+        finally:
+            if session is not None and close_session is not None:
+                try: close_session(session)
+                except Exception as e: print(f"-> Worker {worker_id} could not close its session: {e}")
+
+    threads = [threading.Thread(target=worker, args=(i,), name=f"scrape-worker-{i}", daemon=True) for i in range(worker_count)]
+    for t in threads: t.start()
+    for t in threads: t.join()
+    return results
@@ -0,0 +1,174 @@
+import os
+import json
+import numpy as np
+import pandas as pd
+from functools import lru_cache
+from typing import Dict, List, Optional, Tuple
+
+from columnar_store import CATEGORICAL_COLUMNS
+
+# Only these strings are missing values; anything else in a text column is kept as written.
+READ_NA_VALUES = ['', 'NA', 'N/A', '#N/A', 'NaN', 'nan', 'null', 'None']
+# Columns FBRef writes in more than one format: Age is '32-240' (years-days) in current-season player
+# tables and a plain number elsewhere. They are read as text so neither format is lost.
+MIXED_FORMAT_COLUMNS = {"Age"}
+TEXT_COLUMNS = {"Player", "Player_ID", "Player_Key", "Matches", "Date", "Time", "Score", "Match_Report", "Notes"} | MIXED_FORMAT_COLUMNS
+# Counts and identifiers that are always whole numbers; every other stat column is float32.
+INTEGER_COLUMNS = {"Rk", "Born", "Wk", "Attendance", "#_Pl", "Playing_Time_MP", "Playing_Time_Starts", "Playing_Time_Min"}
+MASTER_DTYPES_SUFFIX = ".dtypes.json"
+COLUMN_CATEGORIES_SUFFIX = ".categories.json"
+
+
+def column_dtype(column: str) -> str:
+    if column in CATEGORICAL_COLUMNS: return "category"
+    if column in TEXT_COLUMNS: return "string"
+    if column in INTEGER_COLUMNS: return "Int32"
+    return "float32"
+
+
+@lru_cache(maxsize=None)
+def table_schema(data_type: str, category: str, columns: Tuple[str, ...]) -> Dict[str, str]:
+    """dtype of every column of one stat category's files (or of fixture files, category
+    'scores_fixtures'): categoricals for identifiers, strings for free text, Int32 for counts and
+    float32 for every other stat. Cached per category and header."""
+    return {col: column_dtype(col) for col in columns}
+
+
+def _parse_dtypes(schema: Dict[str, str]) -> Dict[str, str]:
+    # Whole-number columns are parsed as floats (files written by pandas may hold 1990.0) and cast after.
+    return {col: "float32" if dtype == "Int32" else "float64" if dtype.startswith("Int") else dtype for col, dtype in schema.items()}
+
+
+def _header_row_mask(df: pd.DataFrame) -> pd.Series:
+    """Rows that repeat the table header (FBRef repeats it inside long tables): at least two cells
+    holding their own column's name (or its last part, e.g. 'MP' under Playing_Time_MP)."""
+    matches = pd.Series(0, index=df.index)
+    for col in df.columns:
+        names = {col, col.split('_')[-1], col.rstrip('0123456789')}
+        matches += df[col].isin(names).astype(int)
+    return matches >= 2
+
+
+def coerce_to_schema(df: pd.DataFrame, schema: Dict[str, str], issues: Dict[str, int]) -> pd.DataFrame:
+    """Applies `schema` to a frame read as text, dropping repeated header rows. Values that are not numbers
+    in a numeric column become NA; how many per column, and how many rows had any, are added to `issues`."""
+    header_rows = _header_row_mask(df)
+    if header_rows.any():
+        issues["repeated header rows dropped"] = issues.get("repeated header rows dropped", 0) + int(header_rows.sum())
+        df = df[~header_rows]
+    typed = {}
+    failed_rows = pd.Series(False, index=df.index)
+    for col in df.columns:
+        dtype = schema.get(col, "float32")
+        if dtype in ("category", "string"):
+            typed[col] = df[col].astype(dtype); continue
+        numeric = pd.to_numeric(df[col], errors='coerce')
+        bad = numeric.isna() & df[col].notna()
+        if bad.any():
+            issues[f"{col}: not numeric, set to NA"] = issues.get(f"{col}: not numeric, set to NA", 0) + int(bad.sum())
+            failed_rows |= bad
+        typed[col] = numeric.astype(_parse_dtypes({col: dtype})[col])
+    if failed_rows.any(): issues["rows failing validation"] = issues.get("rows failing validation", 0) + int(failed_rows.sum())
+    return finish_integer_columns(pd.DataFrame(typed, index=df.index), schema, issues)
+
+
+def finish_integer_columns(df: pd.DataFrame, schema: Dict[str, str], issues: Dict[str, int]) -> pd.DataFrame:
+    """Casts the whole-number columns of `schema`, parsed as floats, to their integer dtype; one holding
+    a fractional value stays float."""
+    for col, dtype in schema.items():
+        if not dtype.startswith("Int") or col not in df.columns or not pd.api.types.is_float_dtype(df[col].dtype): continue
+        if (df[col].dropna() % 1 != 0).any():
+            issues[f"{col}: not whole numbers, kept as float"] = 1; continue
+        df[col] = df[col].astype(dtype)
+    return df
+
+
+def read_typed_csv(f_path: str, data_type: str, category: str, chunk_rows: Optional[int] = None, as_text: bool = False):
+    """Reads a stats or fixtures CSV straight into its category schema. Clean files are parsed with the
+    schema dtypes (no type inference); a file that does not parse (a stray header row, a text value in a
+    numeric column) is read as text and validated by `coerce_to_schema` instead, or directly so when
+    `as_text`. Returns (frame, issues), or (iterator of frames, issues) with `chunk_rows`; with chunks
+    `issues` fills up while iterating."""
+    columns = tuple(pd.read_csv(f_path, nrows=0).columns)
+    schema = table_schema(data_type, category, columns)
+    issues: Dict[str, int] = {}
+    read_options = {"keep_default_na": False, "na_values": READ_NA_VALUES}
+    if chunk_rows:
+        reader = pd.read_csv(f_path, chunksize=chunk_rows, dtype=str if as_text else _parse_dtypes(schema), **read_options)
+        frames = (coerce_to_schema(chunk, schema, issues) if as_text else finish_integer_columns(chunk, schema, issues) for chunk in reader)
+        return frames, issues
+    if not as_text:
+        try:
+            return finish_integer_columns(pd.read_csv(f_path, dtype=_parse_dtypes(schema), **read_options), schema, issues), issues
+        except (ValueError, TypeError):
+            pass
+    return coerce_to_schema(pd.read_csv(f_path, dtype=str, **read_options), schema, issues), issues
+
+
+def format_issues(issues: Dict[str, int]) -> str:
+    return "; ".join(name if name.endswith("kept as float") else f"{name}: {count}" for name, count in issues.items())
+
+
+def master_dtypes_path(master_path: str) -> str:
+    return f"{os.path.splitext(master_path)[0]}{MASTER_DTYPES_SUFFIX}"
+
+
+def write_master_dtypes(master_path: str, df: pd.DataFrame):
+    """Records the dtype of every column of a master frame next to its CSV (MASTER_*.dtypes.json), as
+    a schema `read_master_csv` can read it back with."""
+    dtypes = {}
+    for col, dtype in df.dtypes.items():
+        if isinstance(dtype, pd.CategoricalDtype): dtypes[col] = "category"
+        elif pd.api.types.is_integer_dtype(dtype): dtypes[col] = "Int32" if dtype.itemsize <= 4 else "Int64"
+        elif pd.api.types.is_float_dtype(dtype): dtypes[col] = "float32" if dtype.itemsize <= 4 else "float64"
+        else: dtypes[col] = "string"
+    with open(master_dtypes_path(master_path), "w", encoding="utf-8") as f: json.dump(dtypes, f, indent=1)
+
+
+def read_master_csv(master_path: str, data_type: str):
+    """Reads a MASTER_*.csv with the dtypes it was written with (see `write_master_dtypes`), so every
+    value round-trips unchanged; columns without a recorded dtype (or a master without the record) get
+    the column schema. Returns (frame, issues) like `read_typed_csv`."""
+    recorded = {}
+    if os.path.isfile(master_dtypes_path(master_path)):
+        with open(master_dtypes_path(master_path), encoding="utf-8") as f: recorded = json.load(f)
+    if not recorded: return read_typed_csv(master_path, data_type, "master")
+    schema = {col: recorded.get(col) or column_dtype(col) for col in pd.read_csv(master_path, nrows=0).columns}
+    issues: Dict[str, int] = {}
+    read_options = {"keep_default_na": False, "na_values": READ_NA_VALUES}
+    try:
+        return finish_integer_columns(pd.read_csv(master_path, dtype=_parse_dtypes(schema), **read_options), schema, issues), issues
+    except (ValueError, TypeError):
+        return coerce_to_schema(pd.read_csv(master_path, dtype=str, **read_options), schema, issues), issues
+
+
+def categorise_columns(df: pd.DataFrame) -> pd.DataFrame:
+    """Turns identifier columns back into categoricals after a concat of frames whose categories
+    differ (pd.concat falls back to strings then)."""
+    for col in df.columns:
+        if col in CATEGORICAL_COLUMNS and not isinstance(df[col].dtype, pd.CategoricalDtype):
+            df[col] = df[col].astype("string").astype("category")
+    return df
+
+
+def align_categories(series: pd.Series, values: pd.Series) -> Tuple[pd.Series, pd.Series]:
+    """`series` and `values` with the same categories (the union of both), so one can be filled from
+    the other. Non-categorical series are returned as they are."""
+    if not isinstance(series.dtype, pd.CategoricalDtype): return series, values
+    new_categories = pd.Index(values.dropna().unique()).difference(series.cat.categories)
+    if len(new_categories): series = series.cat.add_categories(new_categories)
+    return series, values.astype(object).astype(series.dtype)
+
+
+def normalise_join_key(df: pd.DataFrame, key_cols: list) -> pd.Index:
+    """Join key of every row: key columns as trimmed strings (Born as a whole number, so 1990 and 1990.0
+    match, missing values as ''), plus an occurrence number so repeated keys pair up in file order."""
+    parts = []
+    for col in key_cols:
+        values = pd.to_numeric(df[col], errors='coerce').astype('Int64') if col == 'Born' else df[col]
+        parts.append([str(v).strip() for v in values.to_numpy(dtype=object, na_value='')])
+    seen = {}; keys = []
+    for key in zip(*parts):
+        occurrence = seen.get(key, 0); seen[key] = occurrence + 1
+        keys.append(key + (occurrence,))
+    return pd.Index(keys, dtype=object, tupleize_cols=False, name='join_key')
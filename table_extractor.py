@@ -0,0 +1,123 @@
+import re
+import pandas as pd
+from typing import Dict, List, Optional
+
+import lxml.html
+from lxml import etree
+
+# Same strings pd.read_html treats as missing, so extracted frames match the read_html path.
+NA_STRINGS = {'', '#N/A', '#N/A N/A', '#NA', '-1.#IND', '-1.#QNAN', '-NaN', '-nan', '1.#IND', '1.#QNAN',
+              '<NA>', 'N/A', 'NA', 'NULL', 'NaN', 'None', 'n/a', 'nan', 'null'}
+THOUSANDS_PATTERN = re.compile(r'^[+-]?\d{1,3}(,\d{3})+(\.\d+)?$')
+PLAYER_HREF_PATTERN = re.compile(r'/players/([0-9a-f]{8})/')
+
+
+def _expanded_row_cells(row) -> List:
+    cells = []
+    for cell in row:
+        if not isinstance(cell.tag, str) or cell.tag not in ('th', 'td'): continue
+        try: colspan = max(1, int(cell.get('colspan', 1)))
+        except ValueError: colspan = 1
+        cells.extend([cell] * colspan)
+    return cells
+
+
+def _cell_text(cell) -> str:
+    return ' '.join(cell.text_content().split())
+
+
+def _infer_column(values: List[Optional[str]]) -> pd.Series:
+    series = pd.Series(values, dtype=object)
+    if series.isna().all(): return series.astype(float)
+    without_thousands = series.str.replace(THOUSANDS_PATTERN, lambda m: m.group(0).replace(',', ''), regex=True)
+    try:
+        return pd.to_numeric(without_thousands, errors='raise')
+    except (ValueError, TypeError):
+        return pd.Series(without_thousands.tolist())
+
+
+def _player_id(cell) -> Optional[str]:
+    # FBRef puts the player's id on the player cell (data-append-csv) and in its /players/<id>/ link.
+    player_id = cell.get('data-append-csv')
+    if player_id: return player_id
+    for href in cell.xpath('.//a/@href'):
+        match = PLAYER_HREF_PATTERN.search(href)
+        if match: return match.group(1)
+    return None
+
+
+def _dedupe_column_names(names: List[str]) -> List[str]:
+    # read_html mangles repeated single-level headers as name, name.1, name.2, ...
+    counts: Dict[str, int] = {}; deduped = []
+    for name in names:
+        count = counts.get(name, 0)
+        deduped.append(f"{name}.{count}" if count else name)
+        counts[name] = count + 1
+    return deduped
+
+
+def table_element_to_dataframe(table_element) -> Optional[pd.DataFrame]:
+    """Builds a DataFrame straight from the cells of an lxml <table>, with the same column naming
+    (including 'Unnamed: i_level_0' for blank over-headers) and type inference as pd.read_html.
+    The FBRef `data-stat` of every column is kept in df.attrs['data_stat'] and, for player tables, the
+    FBRef player id of every row in df.attrs['player_ids']."""
+    header_rows = [_expanded_row_cells(tr) for tr in table_element.xpath('./thead/tr')]
+    body_rows = [_expanded_row_cells(tr) for tbody in table_element.xpath('./tbody') for tr in tbody.xpath('./tr')]
+    if not table_element.xpath('./tbody'): body_rows = [_expanded_row_cells(tr) for tr in table_element.xpath('./tr')]
+    if not header_rows and body_rows: header_rows, body_rows = body_rows[:1], body_rows[1:]
+    if not header_rows: return None
+    header_rows = header_rows[:2] if len(header_rows) > 1 else header_rows
+    n_cols = max(len(r) for r in header_rows + body_rows)
+
+    header_texts = [[_cell_text(c) for c in r] + [''] * (n_cols - len(r)) for r in header_rows]
+    if len(header_texts) == 1:
+        columns = pd.Index(_dedupe_column_names([text or f"Unnamed: {i}" for i, text in enumerate(header_texts[0])]))
+    else:
+        columns = pd.MultiIndex.from_tuples([tuple(header_texts[level][i] or f"Unnamed: {i}_level_{level}" for level in range(len(header_texts)))
+                                             for i in range(n_cols)])
+
+    data_stat = [c.get('data-stat') for c in header_rows[-1]] + [None] * (n_cols - len(header_rows[-1]))
+    column_values = [[] for _ in range(n_cols)]; player_ids = []
+    for row in body_rows:
+        if not row: continue
+        for i in range(n_cols):
+            text = _cell_text(row[i]) if i < len(row) else ''
+            column_values[i].append(None if text in NA_STRINGS else text)
+            if data_stat[i] is None and i < len(row): data_stat[i] = row[i].get('data-stat')
+        player_ids.append(next((_player_id(cell) for cell in row if cell.get('data-stat') == 'player'), None))
+
+    df = pd.DataFrame({i: _infer_column(values) for i, values in enumerate(column_values)})
+    df.columns = columns
+    df.attrs['data_stat'] = data_stat
+    if any(player_ids): df.attrs['player_ids'] = player_ids
+    return df
+
+
+def find_page_table_elements(page_source: str) -> Dict[str, tuple]:
+    """One lxml pass over the page: every <table id=...>, whether in the DOM or inside an HTML comment
+    (FBRef comments out most secondary tables). Returns {table_id: (table_element, 'direct'|'comment')}.
+    A direct table wins over a commented table with the same id."""
+    doc = lxml.html.fromstring(page_source)
+    found: Dict[str, tuple] = {}
+    for node in doc.iter('table', etree.Comment):
+        if node.tag == 'table':
+            table_id = node.get('id')
+            if table_id and (table_id not in found or found[table_id][1] == 'comment'): found[table_id] = (node, 'direct')
+        elif node.text and '<table' in node.text:
+            for table in lxml.html.fromstring(f"<div>{node.text}</div>").iter('table'):
+                table_id = table.get('id')
+                if table_id and table_id not in found: found[table_id] = (table, 'comment')
+    return found
+
+
+def extract_page_tables(page_source: str, table_ids: Optional[List[str]] = None) -> Dict[str, pd.DataFrame]:
+    """DataFrames for every FBRef table on the page (or only `table_ids`), keyed by table id.
+    df.attrs['source'] records whether the table was found directly or in a comment."""
+    tables = {}
+    for table_id, (element, source) in find_page_table_elements(page_source).items():
+        if table_ids is not None and table_id not in table_ids: continue
+        df = table_element_to_dataframe(element)
+        if df is None: continue
+        df.attrs['source'] = source
+        tables[table_id] = df
+    return tables
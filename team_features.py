@@ -0,0 +1,185 @@
+import math
+import time
+import json
+import hashlib
+import argparse
+import numpy as np
+import pandas as pd
+from typing import Dict, List, Optional, Tuple
+
+from match_store import MatchStore, DEFAULT_MATCH_DB
+
+DEFAULT_FORM_WINDOWS = [5]
+ELO_INITIAL_RATING = 1500.0
+ELO_K_FACTOR = 20.0
+ELO_HOME_ADVANTAGE = 60.0
+FORM_STATS = {"gf": "goals_for", "ga": "goals_against", "xgf": "xg_for", "xga": "xg_against", "ppg": "points"}
+
+
+def rolling_team_form(team_matches: pd.DataFrame, windows: List[int] = DEFAULT_FORM_WINDOWS) -> pd.DataFrame:
+    """Form of every team after each of its played matches: the mean of goals, xG and points over its
+    last `n` played matches (including that one) for each window n, plus the number of matches used.
+    Computed per team with grouped rolling windows over team_matches sorted by kickoff."""
+    played = team_matches[team_matches['goals_for'].notna()].sort_values(['team_id', 'kickoff', 'match_id'], kind='stable')
+    values = played[list(FORM_STATS.values())].astype('float64')
+    form = played[['team_id', 'kickoff']].copy()
+    grouped = values.groupby(played['team_id'].to_numpy(), sort=False)
+    for n in windows:
+        rolled = grouped.rolling(n, min_periods=1).mean().reset_index(level=0, drop=True)
+        for short_name, col in FORM_STATS.items(): form[f"{short_name}_avg_{n}"] = rolled[col]
+        form[f"matches_{n}"] = values['goals_for'].notna().groupby(played['team_id'].to_numpy(), sort=False).rolling(n, min_periods=1).sum().reset_index(level=0, drop=True).astype('int64')
+    return form
+
+
+def pre_match_form(team_matches: pd.DataFrame, targets: pd.DataFrame, windows: List[int] = DEFAULT_FORM_WINDOWS) -> pd.DataFrame:
+    """Form of the team in every `targets` row (team_id, match_id, kickoff) from its played matches
+    strictly before kickoff: an as-of join on the form after the team's latest earlier match, so the
+    match itself (or anything later) can never leak into its own features."""
+    form = rolling_team_form(team_matches, windows).sort_values('kickoff', kind='stable')
+    targets = targets[['team_id', 'match_id', 'kickoff']].sort_values('kickoff', kind='stable')
+    return pd.merge_asof(targets, form, on='kickoff', by='team_id', allow_exact_matches=False)
+
+
+def elo_expected_home(home_rating: float, away_rating: float, home_advantage: float = ELO_HOME_ADVANTAGE) -> float:
+    return 1.0 / (1.0 + 10 ** ((away_rating - home_rating - home_advantage) / 400.0))
+
+
+def run_elo(matches: pd.DataFrame, ratings: Optional[Dict[str, float]] = None, k_factor: float = ELO_K_FACTOR,
+            home_advantage: float = ELO_HOME_ADVANTAGE) -> Tuple[pd.DataFrame, Dict[str, float]]:
+    """Pre-match Elo ratings of both sides of every match (in kickoff order) and the ratings after the
+    last played one. Ratings only move on played matches, scaled by goal difference, and only once every
+    match with the same kickoff has been rated, so matches at the same time never see each other; unplayed
+    fixtures get the current ratings. Starts from `ratings` (team_id -> rating) when given, so newly played
+    matches can be appended to an earlier run."""
+    ratings = dict(ratings or {})
+    ordered = matches.sort_values(['kickoff', 'match_id'], kind='stable')
+    kickoffs = ordered['kickoff'].to_numpy()
+    home_ids = ordered['home_team_id'].to_numpy(); away_ids = ordered['away_team_id'].to_numpy()
+    home_goals = ordered['home_goals'].to_numpy(dtype='float64', na_value=np.nan)
+    away_goals = ordered['away_goals'].to_numpy(dtype='float64', na_value=np.nan)
+    home_pre = np.empty(len(ordered)); away_pre = np.empty(len(ordered)); expected = np.empty(len(ordered))
+    changes: Dict[str, float] = {}
+    for i in range(len(ordered)):
+        home_rating = ratings.get(home_ids[i], ELO_INITIAL_RATING); away_rating = ratings.get(away_ids[i], ELO_INITIAL_RATING)
+        home_pre[i], away_pre[i] = home_rating, away_rating
+        expected[i] = elo_expected_home(home_rating, away_rating, home_advantage)
+        if not (math.isnan(home_goals[i]) or math.isnan(away_goals[i])):
+            goal_difference = home_goals[i] - away_goals[i]
+            actual = 1.0 if goal_difference > 0 else 0.5 if goal_difference == 0 else 0.0
+            change = k_factor * math.log(abs(goal_difference) + 1.0 + (goal_difference == 0)) * (actual - expected[i])
+            changes[home_ids[i]] = changes.get(home_ids[i], 0.0) + change; changes[away_ids[i]] = changes.get(away_ids[i], 0.0) - change
+        if i + 1 == len(ordered) or kickoffs[i + 1] != kickoffs[i]:
+            for team_id, change in changes.items(): ratings[team_id] = ratings.get(team_id, ELO_INITIAL_RATING) + change
+            changes = {}
+    elo = pd.DataFrame({"match_id": ordered['match_id'].to_numpy(), "home_elo": home_pre, "away_elo": away_pre, "home_elo_expected": expected})
+    return elo, ratings
+
+
+def build_match_features(matches: pd.DataFrame, team_matches: pd.DataFrame, elo: pd.DataFrame,
+                         windows: List[int] = DEFAULT_FORM_WINDOWS) -> pd.DataFrame:
+    """One row per match with the pre-match Elo ratings and the home_/away_ form of both sides."""
+    target_sides = team_matches[team_matches['match_id'].isin(matches['match_id'])]
+    form = pre_match_form(team_matches, target_sides, windows).drop(columns=['kickoff'])
+    features = matches[['match_id', 'competition', 'season', 'kickoff', 'home_team_id', 'away_team_id']].merge(elo, on='match_id', how='left')
+    for side in ("home", "away"):
+        side_form = form.rename(columns={col: f"{side}_{col}" for col in form.columns if col not in ('team_id', 'match_id')})
+        features = features.merge(side_form, left_on=['match_id', f"{side}_team_id"], right_on=['match_id', 'team_id'], how='left').drop(columns=['team_id'])
+    return features.sort_values(['kickoff', 'match_id'], kind='stable').reset_index(drop=True)
+
+
+class TeamFeatureBuilder:
+    """Pre-match team features (rolling form and Elo) for every match in a MatchStore, kept in its
+    `match_features` table. A full rebuild recomputes the whole history; `update` only computes the
+    matches after the last played one of the previous run, continuing the stored Elo ratings, and falls
+    back to a rebuild when matches up to that point were added or changed."""
+
+    def __init__(self, store: MatchStore, windows: List[int] = DEFAULT_FORM_WINDOWS, k_factor: float = ELO_K_FACTOR,
+                 home_advantage: float = ELO_HOME_ADVANTAGE):
+        self.store = store
+        self.windows = sorted(set(windows))
+        self.k_factor = k_factor
+        self.home_advantage = home_advantage
+        with store.lock:
+            with store.conn:
+                store.conn.execute("CREATE TABLE IF NOT EXISTS elo_ratings (team_id TEXT PRIMARY KEY, rating REAL NOT NULL)")
+                store.conn.execute("CREATE TABLE IF NOT EXISTS feature_state (key TEXT PRIMARY KEY, value TEXT NOT NULL)")
+
+    def _settings(self) -> str:
+        return json.dumps({"windows": self.windows, "k_factor": self.k_factor, "home_advantage": self.home_advantage})
+
+    def _state(self) -> Dict[str, str]:
+        return dict(self.store.query("SELECT key, value FROM feature_state").itertuples(index=False, name=None))
+
+    def _played_signature(self, up_to_kickoff: str) -> str:
+        # Changes whenever a played match up to the watermark is added, removed or gets a different score.
+        played = self.store.query("""SELECT match_id || ':' || home_goals || ':' || away_goals AS result FROM matches
+                                     WHERE home_goals IS NOT NULL AND kickoff <= ? ORDER BY match_id""", (up_to_kickoff,))
+        return hashlib.sha1(",".join(played['result']).encode("utf-8")).hexdigest()
+
+    def _save(self, features: pd.DataFrame, ratings: Dict[str, float], replace: bool):
+        watermark = self.store.query("SELECT MAX(kickoff) AS kickoff FROM matches WHERE home_goals IS NOT NULL").iloc[0]['kickoff']
+        watermark = '' if watermark is None or pd.isna(watermark) else pd.Timestamp(watermark).strftime('%Y-%m-%d %H:%M:%S')
+        signature = self._played_signature(watermark) if watermark else ''
+        rows = features.assign(kickoff=features['kickoff'].dt.strftime('%Y-%m-%d %H:%M:%S'))
+        with self.store.lock:
+            with self.store.conn:
+                if replace: self.store.conn.execute("DROP TABLE IF EXISTS match_features")
+                else:
+                    self.store.conn.executemany("DELETE FROM match_features WHERE match_id = ?", [(m,) for m in rows['match_id']])
+                rows.to_sql("match_features", self.store.conn, if_exists='append', index=False)
+                self.store.conn.execute("CREATE INDEX IF NOT EXISTS match_features_match ON match_features (match_id)")
+                self.store.conn.execute("DELETE FROM elo_ratings")
+                self.store.conn.executemany("INSERT INTO elo_ratings VALUES (?, ?)", list(ratings.items()))
+                self.store.conn.executemany("INSERT OR REPLACE INTO feature_state VALUES (?, ?)",
+                                            [("settings", self._settings()), ("watermark", watermark), ("played_signature", signature)])
+
+    def rebuild(self) -> pd.DataFrame:
+        matches = self.store.query("SELECT * FROM matches")
+        team_matches = self.store.query("SELECT * FROM team_matches")
+        elo, ratings = run_elo(matches, k_factor=self.k_factor, home_advantage=self.home_advantage)
+        features = build_match_features(matches, team_matches, elo, self.windows)
+        self._save(features, ratings, replace=True)
+        return features
+
+    def update(self) -> pd.DataFrame:
+        """Computes features for the matches after the stored watermark (the last played kickoff), played or not."""
+        state = self._state()
+        watermark = state.get("watermark")
+        if state.get("settings") != self._settings() or not watermark or state.get("played_signature") != self._played_signature(watermark):
+            print("Feature settings changed or matches up to the last run were added or changed; rebuilding all features.")
+            return self.rebuild()
+        new_matches = self.store.query("SELECT * FROM matches WHERE kickoff > ?", (watermark,))
+        if new_matches.empty: return new_matches
+        teams = sorted(set(new_matches['home_team_id']) | set(new_matches['away_team_id']))
+        team_matches = self.store.query(f"SELECT * FROM team_matches WHERE team_id IN ({','.join('?' * len(teams))})", tuple(teams))
+        ratings = dict(self.store.query("SELECT team_id, rating FROM elo_ratings").itertuples(index=False, name=None))
+        elo, ratings = run_elo(new_matches, ratings, self.k_factor, self.home_advantage)
+        features = build_match_features(new_matches, team_matches, elo, self.windows)
+        self._save(features, ratings, replace=False)
+        return features
+
+    def features(self) -> pd.DataFrame:
+        return self.store.query("SELECT * FROM match_features ORDER BY kickoff, match_id")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Pre-match rolling form and Elo features for every match in the match store.")
+    parser.add_argument("--db", type=str, default=DEFAULT_MATCH_DB, help=f"SQLite match store built by match_store.py (default: {DEFAULT_MATCH_DB}).")
+    parser.add_argument("--windows", type=int, nargs='+', default=DEFAULT_FORM_WINDOWS, help="Rolling form windows in matches (default: 5).")
+    parser.add_argument("--k_factor", type=float, default=ELO_K_FACTOR)
+    parser.add_argument("--home_advantage", type=float, default=ELO_HOME_ADVANTAGE, help="Elo points added to the home side's rating when computing expectations.")
+    parser.add_argument("--incremental", action="store_true", help="Only compute matches after the last played match of the previous run.")
+    parser.add_argument("--export", type=str, default=None, help="Also write all match features to this CSV.")
+    args = parser.parse_args()
+
+    store = MatchStore(args.db)
+    try:
+        builder = TeamFeatureBuilder(store, args.windows, args.k_factor, args.home_advantage)
+        started_at = time.perf_counter()
+        computed = builder.update() if args.incremental else builder.rebuild()
+        print(f"Computed features for {len(computed)} matches in {time.perf_counter() - started_at:.2f}s ({'incremental' if args.incremental else 'full rebuild'}).")
+        if args.export:
+            builder.features().to_csv(args.export, index=False)
+            print(f"Wrote match features to {args.export}")
+    finally:
+        store.close()
@@ -0,0 +1,87 @@
+import os
+import sys
+import time
+import threading
+
+import pytest
+
+# The modules live at the repository root, not in a package.
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fbref_stand_in_server import SavedPageHandler, start_stand_in_server
+from page_cache import save_page_for_stand_in
+from header_registry import use_header_registry
+from dataset_manifest import use_dataset_manifest
+from delta_store import use_delta_store
+
+@pytest.fixture(autouse=True)
+def fresh_active_stores():
+    """The scraper and the combiner close the active header registry, manifest and delta store when they
+    finish; give the next test fresh ones."""
+    yield
+    use_header_registry(None); use_dataset_manifest(None); use_delta_store(None)
+
+
+PLAYERS = [("1a2b3c4d", "Alisson", "Liverpool"), ("5e6f7a8b", "Justin Bijlow", "Feyenoord"), ("9c0d1e2f", "Marco Bizot", "Brest")]
+SQUADS = ["Liverpool", "Feyenoord", "Brest"]
+
+
+def _table(table_id: str, header: list, rows: list) -> str:
+    head = "".join(f'<th data-stat="{stat}">{label}</th>' for stat, label in header)
+    body = "".join("<tr>" + "".join(cells) + "</tr>" for cells in rows)
+    return f'<table id="{table_id}"><thead><tr>{head}</tr></thead><tbody>{body}</tbody></table>'
+
+
+def player_table(category: str, seed: int) -> str:
+    header = [("ranker", "Rk"), ("player", "Player"), ("team", "Squad"), ("goals", "Gls"), ("xg", "xG")]
+    rows = [[f'<th data-stat="ranker">{i + 1}</th>', f'<td data-stat="player" data-append-csv="{player_id}"><a href="/en/players/{player_id}/">{name}</a></td>',
+             f'<td data-stat="team">{squad}</td>', f'<td data-stat="goals">{(seed + i) % 7}</td>', f'<td data-stat="xg">{(seed + i) % 5 + 0.25}</td>']
+            for i, (player_id, name, squad) in enumerate(PLAYERS)]
+    return _table(f"stats_{category}", header, rows)
+
+
+def squad_table(table_id: str, seed: int) -> str:
+    header = [("ranker", "Rk"), ("team", "Squad"), ("players_used", "# Pl"), ("goals", "Gls")]
+    rows = [[f'<th data-stat="ranker">{i + 1}</th>', f'<td data-stat="team">{squad}</td>', f'<td data-stat="players_used">{20 + i}</td>',
+             f'<td data-stat="goals">{(seed + 3 * i) % 40}</td>'] for i, squad in enumerate(SQUADS)]
+    return _table(table_id, header, rows)
+
+
+def stat_page(task: dict) -> str:
+    """A saved FBRef stats page for `task`. Like FBRef, secondary tables sit inside HTML comments; a
+    player page also carries the squad 'for' and 'against' tables of its category."""
+    category, seed = task['category'], len(task['url'])
+    squad_tables = f"<!-- {squad_table(f'stats_teams_{category}_for', seed)} {squad_table(f'stats_teams_{category}_against', seed + 1)} -->"
+    main_table = player_table(category, seed) if task['data_type'] == "player" else ""
+    return f"<html><body><div id=\"div_main\">{main_table}</div><div>{squad_tables}</div></body></html>"
+
+
+class StandInSite:
+    """Saved pages served by the stand-in server, with the arrival time and path of every request."""
+
+    def __init__(self, pages_dir: str):
+        self.pages_dir = pages_dir
+        self.requests = []
+        self.server = start_stand_in_server(pages_dir)
+        self.base_url = f"http://127.0.0.1:{self.server.server_port}"
+
+    def save_pages(self, tasks: list):
+        for task in tasks: save_page_for_stand_in(self.pages_dir, task['url'], stat_page(task))
+
+    def requested_paths(self) -> list:
+        return [path for _, path in self.requests]
+
+
+@pytest.fixture
+def stand_in_site(tmp_path, monkeypatch):
+    site = StandInSite(str(tmp_path / "pages"))
+    lock = threading.Lock()
+    serve_page = SavedPageHandler.do_GET
+
+    def recording_do_get(handler):
+        with lock: site.requests.append((time.monotonic(), handler.path))
+        serve_page(handler)
+
+    monkeypatch.setattr(SavedPageHandler, "do_GET", recording_do_get)
+    yield site
+    site.server.shutdown(); site.server.server_close()
@@ -0,0 +1,46 @@
+import os
+import sys
+import subprocess
+
+import pandas as pd
+import pytest
+
+from delta_store import use_delta_store
+from scrape_pipeline import save_csv
+
+ENTRY = {"data_type": "player", "competition": "Big 5 European Leagues", "season": "2099-2100", "category": "standard"}
+DATASET = "player|Big 5 European Leagues|2099-2100|standard"
+
+
+def test_scraper_does_not_import_the_combiner():
+    repo_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    check = "import sys, advanced_scraper_selenium, delta_store; print('combine_fbref_data' in sys.modules, 'pandas' in sys.modules)"
+    assert subprocess.run([sys.executable, "-c", check], cwd=repo_dir, capture_output=True, text=True, check=True).stdout.split() == ["False", "False"]
+
+
+def test_failed_write_is_not_recorded_as_a_version(tmp_path):
+    store = use_delta_store(str(tmp_path / "delta_store.sqlite"))
+    path = str(tmp_path / "table.csv")
+    df = pd.DataFrame({"Player": ["Alisson", "Marco Bizot"], "Squad": ["Liverpool", "Brest"], "Born": [1992, 1991], "Gls": [0, 1]})
+    save_csv(df, path, ENTRY)
+    changed = df.assign(Gls=[0, 2])
+
+    with pytest.raises(OSError):
+        save_csv(changed, str(tmp_path / "missing_dir" / "table.csv"), ENTRY)
+    assert store.current_version(DATASET) == 1
+
+    save_csv(changed, path, ENTRY)
+    assert store.current_version(DATASET) == 2
+    assert pd.read_csv(path)['Gls'].tolist() == [0, 2]
+    modified_at = os.stat(path).st_mtime_ns
+    save_csv(changed, path, ENTRY)
+    assert os.stat(path).st_mtime_ns == modified_at and store.current_version(DATASET) == 2
+
+
+def test_unrecorded_save_writes_only_the_csv(tmp_path):
+    store = use_delta_store(str(tmp_path / "delta_store.sqlite"))
+    path = str(tmp_path / "table.csv")
+    df = pd.DataFrame({"Player": ["Alisson"], "Squad": ["Liverpool"], "Born": [1992], "Gls": [0]})
+    save_csv(df, path, ENTRY, record=False)
+    assert pd.read_csv(path)['Player'].tolist() == ["Alisson"]
+    assert store.current_version(DATASET) == 0
@@ -0,0 +1,38 @@
+import json
+import os
+
+from advanced_scraper_selenium import (build_scrape_tasks, recognise_harvest_table, page_harvest_outputs, harvest_aggregate_stats_page,
+                                       task_primary_output_path, TASK_SAVED, TASK_SKIPPED)
+from page_fetchers import PrefetchedFetcher
+from conftest import stat_page
+
+
+def test_recognised_table_ids():
+    assert recognise_harvest_table("stats_standard") == ("player", "standard")
+    assert recognise_harvest_table("stats_teams_shooting_for") == ("squad", "shooting")
+    assert recognise_harvest_table("stats_squads_keeper_adv_against") == ("squad_against", "keeper_adv")
+    assert recognise_harvest_table("stats_teams_unknown_for") is None
+    assert recognise_harvest_table("sched_2023-2024_9_1") is None
+
+
+def test_one_page_fetch_saves_player_and_squad_tables(tmp_path):
+    base_output_directory = str(tmp_path / "output_data")
+    tasks = build_scrape_tasks(["Big5_Agg_Player", "Big5_Agg_Squad"], 2024, 1, base_output_directory)
+    player_task = next(t for t in tasks if t['data_type'] == "player" and t['category'] == "shooting")
+    squad_task = next(t for t in tasks if t['data_type'] == "squad" and t['category'] == "shooting")
+    page_source = stat_page(player_task)
+    harvested, manifest_path = set(), os.path.join(base_output_directory, "harvest_manifest.jsonl")
+
+    result = harvest_aggregate_stats_page(PrefetchedFetcher(player_task['url'], page_source), player_task, base_output_directory, harvested, manifest_path)
+    assert result == TASK_SAVED
+    assert harvested == page_harvest_outputs(player_task, page_source, base_output_directory)
+    assert {os.path.basename(path) for path in harvested} == {f"Big-5-European-Leagues_2023-2024_shooting_{data_type}_stats.csv"
+                                                              for data_type in ("player", "squad", "squad_against")}
+    assert all(os.path.isfile(path) for path in harvested)
+    assert task_primary_output_path(squad_task) in harvested
+    with open(manifest_path, encoding="utf-8") as f: records = [json.loads(line) for line in f]
+    assert {(r['table_id'], r['found_in']) for r in records} == {("stats_shooting", "direct"), ("stats_teams_shooting_for", "comment"),
+                                                                  ("stats_teams_shooting_against", "comment")}
+
+    # The squad task's table came with the player page, so it is skipped without a page load.
+    assert harvest_aggregate_stats_page(PrefetchedFetcher("not fetched"), squad_task, base_output_directory, harvested, manifest_path) == TASK_SKIPPED
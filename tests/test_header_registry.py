@@ -0,0 +1,66 @@
+from header_registry import HeaderRegistry, master_schema_key
+
+TWO_LEVEL_HEADER = [("Unnamed: 0_level_0", "Rk"), ("Unnamed: 1_level_0", "Player"), ("Expected", "xG"), ("Expected", "npxG")]
+
+
+class CountingCleaner:
+    def __init__(self):
+        self.calls = 0
+
+    def __call__(self, columns: list) -> list:
+        self.calls += 1
+        return ["_".join(part for part in col if not part.startswith("Unnamed")) for col in columns]
+
+
+def test_header_layouts_are_cleaned_once_and_persisted(tmp_path):
+    path = str(tmp_path / "header_registry.sqlite")
+    cleaner = CountingCleaner()
+    registry = HeaderRegistry(path)
+    assert registry.cleaned_names("table", TWO_LEVEL_HEADER, cleaner) == ["Rk", "Player", "Expected_xG", "Expected_npxG"]
+    registry.cleaned_names("table", TWO_LEVEL_HEADER, cleaner)
+    registry.cleaned_names("table", TWO_LEVEL_HEADER[:3], cleaner)
+    assert cleaner.calls == 2
+    registry.close()
+
+    reopened = HeaderRegistry(path)
+    assert reopened.cleaned_names("table", TWO_LEVEL_HEADER, cleaner) == ["Rk", "Player", "Expected_xG", "Expected_npxG"]
+    assert cleaner.calls == 2
+    reopened.close()
+
+
+def test_pinned_names_survive_header_drift(tmp_path):
+    path = str(tmp_path / "header_registry.sqlite")
+    registry = HeaderRegistry(path)
+    assert registry.pin_names("player:shooting", ["player", "xg", "npxg"], ["Player", "Expected_xG", "Expected_npxG"]) == ["Player", "Expected_xG", "Expected_npxG"]
+    registry.close()
+
+    registry = HeaderRegistry(path)
+    # FBRef renamed the over-header; the data-stats still identify the columns.
+    assert registry.pin_names("player:shooting", ["player", "xg", "npxg", "xg_net"], ["Player", "xG", "npxG", "xG+/-"]) == ["Player", "Expected_xG", "Expected_npxG", "xG+/-"]
+    # Other categories pin separately, and repeated data-stats are never renamed.
+    assert registry.pin_names("player:passing", ["xg", "xg"], ["xG", "xG1"]) == ["xG", "xG1"]
+    registry.close()
+
+
+def test_pinning_that_would_repeat_a_name_keeps_the_tables_names():
+    registry = HeaderRegistry()
+    registry.pin_names("squad:standard", ["goals", "assists"], ["Gls", "Ast"])
+    assert registry.pin_names("squad:standard", ["goals", "goals_pens"], ["Ast", "G-PK"]) == ["Gls", "G-PK"]
+    assert registry.pin_names("squad:standard", ["assists", "other"], ["Gls", "Ast"]) == ["Gls", "Ast"]
+
+
+def test_conform_keeps_earlier_order_and_appends_new_columns(tmp_path):
+    path = str(tmp_path / "header_registry.sqlite")
+    schema = master_schema_key("player")
+    registry = HeaderRegistry(path)
+    assert registry.conform(schema, ["Player", "Squad", "Gls"]) == ["Player", "Squad", "Gls"]
+    registry.close()
+
+    registry = HeaderRegistry(path)
+    assert registry.conform(schema, ["Gls", "xG", "Player"]) == ["Player", "Squad", "Gls", "xG"]
+    assert registry.conform(schema, ["npxG", "Player"]) == ["Player", "Squad", "Gls", "xG", "npxG"]
+    registry.forget(schema)
+    assert registry.conform(schema, ["Gls", "Player"]) == ["Gls", "Player"]
+    registry.close()
+
+    assert HeaderRegistry(path).conform(schema, []) == ["Gls", "Player"]
@@ -0,0 +1,117 @@
+import os
+
+import pandas as pd
+
+from combine_fbref_data import main_combiner_logic
+from stat_schemas import coerce_to_schema, read_master_csv, table_schema
+
+MASTERS = ["MASTER_PLAYER_STATS.csv", "MASTER_SQUAD_STATS.csv"]
+STANDARD_HEADER = ["Rk", "Player", "Nation", "Pos", "Squad", "Comp", "Age", "Born", "Playing_Time_MP", "Playing_Time_Min", "Playing_Time_90s", "Performance_Gls"]
+SHOOTING_HEADER = ["Rk", "Player", "Nation", "Pos", "Squad", "Comp", "Age", "Born", "90s", "Standard_Gls", "Standard_Sh", "Expected_xG", "Expected_npxG/Sh"]
+SQUAD_HEADER = ["Rk", "Squad", "Comp", "#_Pl", "Age", "Poss", "Playing_Time_MP", "Performance_Gls"]
+
+
+def _ages(season: str) -> list:
+    # FBRef writes current-season ages as years-days and finished seasons' as plain years.
+    return ["32-240", "27-128", "30-151"] if season == "2024-2025" else ["31", "26", "29"]
+
+
+def _write_csv(path: str, header: list, rows: list):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    pd.DataFrame(rows, columns=header).to_csv(path, index=False)
+
+
+def write_scraped_tree(data_dir: str, seasons=("2022-2023", "2023-2024", "2024-2025")):
+    """A small scraper output tree: two player categories and the squad standard table per season."""
+    for season in seasons:
+        ages = _ages(season)
+        players = [("Alisson", "br BRA", "GK", "Liverpool", "eng Premier League", ages[0], 1992),
+                   ("Justin Bijlow", "nl NED", "GK", "Feyenoord", "nl Eredivisie", ages[1], 1998),
+                   ("David von Ballmoos", "ch SUI", "GK", "Bern", "ch Super League", ages[2], 1994)]
+        player_dir = os.path.join(data_dir, "aggregate_stats", season, "player_aggregate_stats")
+        squad_dir = os.path.join(data_dir, "aggregate_stats", season, "squad_aggregate_stats")
+        _write_csv(os.path.join(player_dir, f"Big-5-European-Leagues_{season}_standard_player_stats.csv"), STANDARD_HEADER,
+                   [(i + 1, *p, 30 - i, 2700 - 90 * i, round((2700 - 90 * i) / 90, 1), i) for i, p in enumerate(players)])
+        _write_csv(os.path.join(player_dir, f"Big-5-European-Leagues_{season}_shooting_player_stats.csv"), SHOOTING_HEADER,
+                   [(i + 1, *p, round((2700 - 90 * i) / 90, 1), i, 10 + i, round(0.12 * (i + 1), 2), 0.09) for i, p in enumerate(players)])
+        _write_csv(os.path.join(squad_dir, f"Big-5-European-Leagues_{season}_standard_squad_stats.csv"), SQUAD_HEADER,
+                   [(1, "Liverpool", "eng Premier League", 25, 27.3, 61.2, 38, 86), (2, "Feyenoord", "nl Eredivisie", 27, 25.1, 58.4, 34, 92)])
+
+
+def _combine(data_dir: str, incremental: bool = False):
+    main_combiner_logic(data_dir, incremental=incremental, columnar="none")
+
+
+def _edit_cell(path: str, column: str, value: str):
+    df = pd.read_csv(path, dtype=str, keep_default_na=False)
+    df.loc[0, column] = value
+    df.to_csv(path, index=False)
+
+
+def _assert_same_masters(left: str, right: str):
+    for name in MASTERS:
+        with open(os.path.join(left, name), "rb") as a, open(os.path.join(right, name), "rb") as b:
+            assert a.read() == b.read(), f"{name} differs between incremental and full rebuild"
+
+
+def test_incremental_splice_equals_full_rebuild(tmp_path):
+    incremental_dir, full_dir = str(tmp_path / "incremental"), str(tmp_path / "full")
+    write_scraped_tree(incremental_dir)
+    _combine(incremental_dir)
+
+    # An older season changes; the current season's years-days ages (a minority of the master) are only read back.
+    shooting = os.path.join("aggregate_stats", "2023-2024", "player_aggregate_stats", "Big-5-European-Leagues_2023-2024_shooting_player_stats.csv")
+    _edit_cell(os.path.join(incremental_dir, shooting), "Standard_Gls", "7")
+    _combine(incremental_dir, incremental=True)
+
+    write_scraped_tree(full_dir)
+    _edit_cell(os.path.join(full_dir, shooting), "Standard_Gls", "7")
+    _combine(full_dir)
+    _assert_same_masters(incremental_dir, full_dir)
+
+
+def test_master_keeps_ages_and_written_values(tmp_path):
+    data_dir = str(tmp_path)
+    write_scraped_tree(data_dir)
+    _combine(data_dir)
+    master = pd.read_csv(os.path.join(data_dir, "MASTER_PLAYER_STATS.csv"), dtype=str, keep_default_na=False)
+    assert master["Age"].tolist() == _ages("2022-2023") + _ages("2023-2024") + _ages("2024-2025")
+    assert master["Expected_xG"].tolist()[:3] == ["0.12", "0.24", "0.36"]
+    assert master["Expected_npxGSh"].iloc[0] == "0.09"
+    recorded = read_master_csv(os.path.join(data_dir, "MASTER_PLAYER_STATS.csv"), "player")[0].dtypes
+    assert str(recorded["Expected_xG"]) == "float32" and str(recorded["Born"]) == "Int32" and str(recorded["Age"]) == "string"
+
+
+def test_coerce_keeps_ages_and_counts_failing_rows():
+    df = pd.DataFrame({"Player": ["A", "B", "C"], "Age": ["31", "26", "32-240"], "Standard_Gls": ["1", "x", "n/a"],
+                       "Standard_Sh": ["4", "5", "?"]}, dtype=str)
+    issues = {}
+    typed = coerce_to_schema(df, table_schema("player", "shooting", tuple(df.columns)), issues)
+    assert typed["Age"].tolist() == ["31", "26", "32-240"]
+    assert str(typed["Standard_Gls"].dtype) == "float32" and typed["Standard_Gls"].isna().tolist() == [False, True, True]
+    assert issues == {"Standard_Gls: not numeric, set to NA": 2, "Standard_Sh: not numeric, set to NA": 1, "rows failing validation": 2}
+
+
+def test_incremental_handles_added_and_removed_files(tmp_path):
+    incremental_dir, full_dir = str(tmp_path / "incremental"), str(tmp_path / "full")
+    write_scraped_tree(incremental_dir, seasons=("2022-2023", "2024-2025"))
+    _combine(incremental_dir)
+
+    write_scraped_tree(incremental_dir, seasons=("2023-2024",))
+    squad_file = os.path.join("aggregate_stats", "2022-2023", "squad_aggregate_stats", "Big-5-European-Leagues_2022-2023_standard_squad_stats.csv")
+    os.remove(os.path.join(incremental_dir, squad_file))
+    main_combiner_logic(incremental_dir, incremental=True, columnar="none", reindex=True)
+
+    write_scraped_tree(full_dir, seasons=("2022-2023", "2023-2024", "2024-2025"))
+    os.remove(os.path.join(full_dir, squad_file))
+    _combine(full_dir)
+    _assert_same_masters(incremental_dir, full_dir)
+
+
+def test_incremental_without_changes_leaves_masters_alone(tmp_path):
+    data_dir = str(tmp_path)
+    write_scraped_tree(data_dir)
+    _combine(data_dir)
+    modified = {name: os.stat(os.path.join(data_dir, name)).st_mtime_ns for name in MASTERS}
+    _combine(data_dir, incremental=True)
+    assert {name: os.stat(os.path.join(data_dir, name)).st_mtime_ns for name in MASTERS} == modified
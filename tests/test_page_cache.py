@@ -0,0 +1,79 @@
+import datetime
+import os
+
+import pytest
+
+from page_cache import PageCache, save_page_for_stand_in, season_is_finished
+from page_fetchers import CachedFetcher, HttpFetcher, ReplayFetcher, PageNotCachedError
+
+FINISHED_SEASON_URL = "https://fbref.com/en/comps/9/2014-2015/schedule/2014-2015-Premier-League-Scores-and-Fixtures"
+CURRENT_SEASON_PATH = "/en/comps/9/2026-2027/schedule/2026-2027-Premier-League-Scores-and-Fixtures"
+
+
+def test_seasons_finish_on_the_first_of_august():
+    assert not season_is_finished("2024-2025", now=datetime.datetime(2025, 7, 31, 23, 59))
+    assert season_is_finished("2024-2025", now=datetime.datetime(2025, 8, 1))
+    assert not season_is_finished(None)
+
+
+def test_current_season_pages_go_stale_and_finished_ones_never_do(tmp_path):
+    cache = PageCache(str(tmp_path / "cache"), current_season_ttl_hours=0)
+    current_url = f"https://fbref.com{CURRENT_SEASON_PATH}"
+    cache.put(FINISHED_SEASON_URL, "<html>2014-2015</html>")
+    cache.put(current_url, "<html>2026-2027</html>")
+
+    assert cache.is_fresh(FINISHED_SEASON_URL) and cache.get(FINISHED_SEASON_URL) == "<html>2014-2015</html>"
+    assert not cache.is_fresh(current_url) and cache.get(current_url) is None
+    assert cache.get(current_url, allow_stale=True) == "<html>2026-2027</html>"
+    cache.close()
+
+
+def test_identical_pages_are_stored_once(tmp_path):
+    cache = PageCache(str(tmp_path / "cache"))
+    cache.put(FINISHED_SEASON_URL, "<html>same</html>")
+    cache.put(FINISHED_SEASON_URL.replace("/9/", "/12/"), "<html>same</html>")
+    objects = [name for _, _, names in os.walk(tmp_path / "cache" / "objects") for name in names]
+    assert len(objects) == 1
+    cache.close()
+
+
+def test_expired_pages_are_refetched_conditionally(stand_in_site, tmp_path, monkeypatch):
+    url = f"{stand_in_site.base_url}{CURRENT_SEASON_PATH}"
+    save_page_for_stand_in(stand_in_site.pages_dir, url, "<html>first</html>")
+    cache = PageCache(str(tmp_path / "cache"), current_season_ttl_hours=0)
+    http_fetcher = HttpFetcher()
+    fetcher = CachedFetcher(http_fetcher, cache)
+    responses = []
+    fetch_if_modified = http_fetcher.fetch_if_modified
+    monkeypatch.setattr(http_fetcher, "fetch_if_modified", lambda *args: responses.append(fetch_if_modified(*args)) or responses[-1])
+
+    assert fetcher.fetch(url) == "<html>first</html>"
+    assert fetcher.fetch(url) == "<html>first</html>"
+    assert responses[1][0] is None and responses[1][1]['etag'] == cache.validators(url)['etag']  # 304 Not Modified
+
+    save_page_for_stand_in(stand_in_site.pages_dir, url, "<html>second version</html>")
+    assert fetcher.fetch(url) == "<html>second version</html>"
+    assert cache.get(url, allow_stale=True) == "<html>second version</html>"
+    assert len(stand_in_site.requests) == 3
+    fetcher.close(); cache.close()
+
+
+def test_fresh_pages_are_served_without_a_request(stand_in_site, tmp_path):
+    url = f"{stand_in_site.base_url}/en/comps/9/2014-2015/stats/2014-2015-Premier-League-Stats"
+    save_page_for_stand_in(stand_in_site.pages_dir, url, "<html>finished season</html>")
+    cache = PageCache(str(tmp_path / "cache"))
+    fetcher = CachedFetcher(HttpFetcher(), cache)
+    assert [fetcher.fetch(url) for _ in range(3)] == ["<html>finished season</html>"] * 3
+    assert len(stand_in_site.requests) == 1
+    fetcher.close(); cache.close()
+
+
+def test_replay_serves_stale_pages_and_refuses_missing_ones(tmp_path):
+    cache = PageCache(str(tmp_path / "cache"), current_season_ttl_hours=0)
+    current_url = f"https://fbref.com{CURRENT_SEASON_PATH}"
+    cache.put(current_url, "<html>stale</html>")
+    replay = ReplayFetcher(cache)
+    assert replay.fetch(current_url) == "<html>stale</html>"
+    with pytest.raises(PageNotCachedError):
+        replay.fetch(FINISHED_SEASON_URL)
+    cache.close()
@@ -0,0 +1,65 @@
+import pytest
+import requests
+
+from fbref_stand_in_server import SavedPageHandler
+from page_cache import save_page_for_stand_in
+from page_fetchers import AutoFetcher, HttpFetcher
+
+STATS_PATH = "/en/comps/Big5/2023-2024/stats/players/2023-2024-Big-5-European-Leagues-Stats"
+EXPECT_STATS_TABLE = r'id="(div_)?stats_standard"'
+
+
+class BrowserStandIn:
+    """Takes the place of SeleniumFetcher and records the URLs it was asked to load."""
+
+    def __init__(self):
+        self.urls = []
+
+    def fetch(self, url, wait_css=None, expect_pattern=None, post_load_delay=None):
+        self.urls.append(url)
+        return '<html><table id="stats_standard"></table></html>'
+
+    def close(self):
+        pass
+
+
+@pytest.fixture
+def auto_fetcher():
+    browser = BrowserStandIn()
+    fetcher = AutoFetcher(HttpFetcher(), browser)
+    yield fetcher, browser
+    fetcher.close()
+
+
+def test_static_html_with_the_table_needs_no_browser(stand_in_site, auto_fetcher):
+    fetcher, browser = auto_fetcher
+    url = f"{stand_in_site.base_url}{STATS_PATH}"
+    save_page_for_stand_in(stand_in_site.pages_dir, url, '<html><!-- <table id="stats_standard"></table> --></html>')
+    assert "stats_standard" in fetcher.fetch(url, expect_pattern=EXPECT_STATS_TABLE)
+    assert browser.urls == []
+
+
+def test_missing_table_falls_back_to_the_browser(stand_in_site, auto_fetcher):
+    fetcher, browser = auto_fetcher
+    url = f"{stand_in_site.base_url}{STATS_PATH}"
+    save_page_for_stand_in(stand_in_site.pages_dir, url, "<html><div id=\"placeholder\"></div></html>")
+    assert fetcher.fetch(url, expect_pattern=EXPECT_STATS_TABLE) == '<html><table id="stats_standard"></table></html>'
+    assert browser.urls == [url] and stand_in_site.requested_paths() == [STATS_PATH]
+
+
+def test_forbidden_falls_back_but_other_errors_raise(stand_in_site, auto_fetcher, monkeypatch):
+    fetcher, browser = auto_fetcher
+    serve_page = SavedPageHandler.do_GET
+
+    def forbid_stats_pages(handler):
+        if "/stats/" in handler.path: handler.send_error(403, "Forbidden"); return
+        serve_page(handler)
+
+    monkeypatch.setattr(SavedPageHandler, "do_GET", forbid_stats_pages)
+    forbidden_url = f"{stand_in_site.base_url}{STATS_PATH}"
+    assert "stats_standard" in fetcher.fetch(forbidden_url, expect_pattern=EXPECT_STATS_TABLE)
+    assert browser.urls == [forbidden_url]
+
+    with pytest.raises(requests.HTTPError):
+        fetcher.fetch(f"{stand_in_site.base_url}/en/comps/9/2023-2024/schedule/missing-page", expect_pattern=EXPECT_STATS_TABLE)
+    assert browser.urls == [forbidden_url]
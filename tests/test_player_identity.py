@@ -0,0 +1,44 @@
+import os
+
+import pandas as pd
+
+from player_identity import PlayerIndex, assign_player_keys, build_player_index
+
+
+def write_master(path: str) -> pd.DataFrame:
+    master = assign_player_keys(pd.DataFrame({
+        "Player": ["Alisson", "Justin Bijlow", "Alisson", "Martin Ødegaard", "Martin Odegaard"],
+        "Player_ID": ["1d14e9f4", None, "1d14e9f4", "79300479", None],
+        "Born": [1992, 1998, 1992, 1998, 1998],
+        "Season": ["2023-2024", "2023-2024", "2024-2025", "2023-2024", "2024-2025"],
+        "Competition": ["Premier League", "Eredivisie", "Premier League", "Premier League", "Premier League"],
+        # A quoted line break inside a field must not split the record.
+        "Squad": ["Liverpool", "Feyenoord\n(loan)", "Liverpool", "Arsenal", "Arsenal"],
+        "Performance_Gls": [0, 0, 0, 8, 6]}))
+    master.to_csv(path, index=False)
+    return master
+
+
+def test_rows_without_fbref_ids_share_the_key_of_their_identity(tmp_path):
+    master = write_master(str(tmp_path / "MASTER_PLAYER_STATS.csv"))
+    assert master["Player_Key"].tolist()[2:] == ["1d14e9f4", "79300479", "79300479"]
+    assert master["Player_Key"].iloc[1].startswith("k-")
+
+
+def test_index_reads_back_records_with_quoted_line_breaks(tmp_path):
+    master_path, index_path = str(tmp_path / "MASTER_PLAYER_STATS.csv"), str(tmp_path / "player_index.sqlite")
+    master = write_master(master_path)
+    assert build_player_index(master_path, index_path)
+    assert not build_player_index(master_path, index_path)
+
+    index = PlayerIndex(index_path)
+    try:
+        bijlow = index.find("justin bijlow")
+        assert bijlow["rows"].tolist() == [1]
+        assert index.rows(bijlow["player_key"].iloc[0])["Squad"].tolist() == ["Feyenoord\n(loan)"]
+        odegaard = index.rows("79300479")
+        assert odegaard["Season"].tolist() == ["2023-2024", "2024-2025"] and odegaard["Performance_Gls"].tolist() == [8, 6]
+        assert index.career("79300479")["Performance_Gls"].tolist() == [8, 6]
+    finally:
+        index.close()
+    assert os.path.getsize(master_path) > 0 and len(master) == 5
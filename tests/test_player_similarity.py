@@ -0,0 +1,29 @@
+import os
+
+import numpy as np
+import pandas as pd
+
+from player_similarity import SimilarityIndex, build_similarity_index, FEATURES_FILENAME, META_FILENAME
+
+
+def write_master(path: str, goals: list):
+    pd.DataFrame({"Player": ["Mohamed Salah", "Cody Gakpo", "Alisson", "Marco Bizot"], "Player_Key": ["e342ad68", "1971591f", "1d14e9f4", "8b9f0f1e"],
+                  "Squad": ["Liverpool", "Liverpool", "Liverpool", "Brest"], "Competition": ["Premier League", "Premier League", "Premier League", "Ligue 1"],
+                  "Season": ["2024-2025"] * 4, "Pos": ["FW", "FW,MF", "GK", "GK"], "Playing_Time_90s": [37.0, 25.0, 28.0, 34.0],
+                  "Performance_Gls": goals, "Performance_Ast": [18, 4, 0, 0], "Performance_Saves": [0, 0, 71, 95]}).to_csv(path, index=False)
+
+
+def test_rebuild_swaps_in_new_files_under_an_open_index(tmp_path):
+    master_path, index_dir = str(tmp_path / "MASTER_PLAYER_STATS.csv"), str(tmp_path / "similarity")
+    write_master(master_path, [29, 10, 0, 0])
+    assert build_similarity_index(master_path, index_dir)
+    index = SimilarityIndex(index_dir)
+    before = np.array(index.features)
+    assert index.similar("Alisson", k=1)["Player"].tolist() == ["Marco Bizot"]
+
+    write_master(master_path, [3, 10, 0, 0])
+    assert build_similarity_index(master_path, index_dir, force=True)
+    # The open index still maps the features it was built with, and no temporary files are left behind.
+    assert np.array_equal(index.features, before)
+    assert not np.array_equal(SimilarityIndex(index_dir).features, before)
+    assert sorted(os.listdir(index_dir)) == sorted([FEATURES_FILENAME, META_FILENAME, "rows.csv"])
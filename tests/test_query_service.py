@@ -0,0 +1,79 @@
+import json
+import os
+import urllib.request
+
+import pandas as pd
+import pytest
+
+from query_service import QueryService, start_query_server
+from stat_schemas import COLUMN_CATEGORIES_SUFFIX
+
+SQUADS = pd.DataFrame({"Squad": ["Liverpool", "Feyenoord", "Brest"], "Competition": ["Premier League", "Eredivisie", "Ligue 1"],
+                       "Season": ["2024-2025"] * 3, "Standard_Gls": [86, 92, 52], "Standard_Sh": [650, 610, 420], "Poss": [61.2, 58.4, 49.0]})
+FIXTURES = pd.DataFrame({"Competition": ["Premier League"] * 2, "Season": ["2024-2025"] * 2, "Home": ["Liverpool", "Arsenal"],
+                         "Away": ["Chelsea", "Liverpool"], "Score": ["2–0", "1–1"]})
+
+
+def write_masters(data_dir: str, squads: pd.DataFrame = SQUADS):
+    os.makedirs(data_dir, exist_ok=True)
+    squads.to_csv(os.path.join(data_dir, "MASTER_SQUAD_STATS.csv"), index=False)
+    with open(os.path.join(data_dir, f"MASTER_SQUAD_STATS{COLUMN_CATEGORIES_SUFFIX}"), "w", encoding="utf-8") as f:
+        json.dump({"shooting": ["Standard_Gls", "Standard_Sh"], "possession": ["Poss"]}, f)
+    FIXTURES.to_csv(os.path.join(data_dir, "MASTER_MATCH_FIXTURES.csv"), index=False)
+
+
+@pytest.fixture
+def service(tmp_path):
+    write_masters(str(tmp_path))
+    return QueryService(str(tmp_path), cache_entries=2)
+
+
+def test_filters_and_category_projection(service):
+    result = service.query("squad", competition=["Premier League", "Ligue 1"], category="possession")
+    assert result.to_dict("list") == {"Competition": ["Premier League", "Ligue 1"], "Season": ["2024-2025"] * 2, "Squad": ["Liverpool", "Brest"], "Poss": [61.2, 49.0]}
+    assert service.query("fixtures", squad="Liverpool")["Score"].tolist() == ["2–0", "1–1"]
+    with pytest.raises(KeyError, match="Unknown category"):
+        service.query("squad", category="passing")
+
+
+def test_repeated_queries_are_cache_hits_on_independent_copies(service):
+    first = service.query("squad", squad="Brest")
+    first.loc[0, "Standard_Gls"] = -1
+    again = service.query("squad", squad=["Brest"])
+    assert again.loc[0, "Standard_Gls"] == 52
+    assert service.cache_info()["hits"] == 1 and service.cache_info()["misses"] == 1
+
+
+def test_least_recently_used_result_is_evicted_first(service):
+    service.query("squad", squad="Liverpool"); service.query("squad", squad="Brest")
+    service.query("squad", squad="Liverpool")  # Brest is now the least recently used entry
+    service.query("squad", squad="Feyenoord")
+    assert service.cache_info()["evictions"] == 1
+    service.query("squad", squad="Liverpool")
+    assert service.cache_info()["hits"] == 2
+    service.query("squad", squad="Brest")
+    assert service.cache_info()["misses"] == 4
+
+
+def test_rewritten_master_is_reloaded_and_its_results_dropped(service, tmp_path):
+    assert service.query("squad", squad="Brest")["Standard_Gls"].tolist() == [52]
+    write_masters(str(tmp_path), SQUADS.assign(Standard_Gls=[86, 92, 1052]))
+    assert service.query("squad", squad="Brest")["Standard_Gls"].tolist() == [1052]
+    info = service.cache_info()
+    assert info["reloads"] == 1 and info["hits"] == 0 and info["entries"] == 1
+
+
+def test_http_queries(service):
+    server = start_query_server(service, port=0)
+    try:
+        base_url = f"http://127.0.0.1:{server.server_port}"
+        with urllib.request.urlopen(f"{base_url}/query/squad?squad=Liverpool,Brest&columns=Poss") as response:
+            assert json.loads(response.read()) == [{"Competition": "Premier League", "Season": "2024-2025", "Squad": "Liverpool", "Poss": 61.2},
+                                                   {"Competition": "Ligue 1", "Season": "2024-2025", "Squad": "Brest", "Poss": 49.0}]
+        with urllib.request.urlopen(f"{base_url}/categories/squad") as response:
+            assert json.loads(response.read()) == ["shooting", "possession"]
+        with pytest.raises(urllib.error.HTTPError) as error:
+            urllib.request.urlopen(f"{base_url}/query/teams")
+        assert error.value.code == 400
+    finally:
+        server.shutdown(); server.server_close()
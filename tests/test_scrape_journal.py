@@ -0,0 +1,45 @@
+import sqlite3
+import time
+
+from scrape_journal import ScrapeJournal, journal_task_key, STATE_DONE, STATE_PENDING
+
+
+def make_task(base_url: str, category: str = "standard") -> dict:
+    return {"target_key": "Big5_Agg_Player", "season": "2023-2024", "category": category,
+            "url": f"{base_url}/en/comps/Big5/2023-2024/{category}/players/2023-2024-Big-5-European-Leagues-Stats"}
+
+
+def test_stand_in_runs_do_not_mark_real_tasks_done(tmp_path):
+    journal = ScrapeJournal(str(tmp_path / "journal.sqlite"))
+    stand_in_task, real_task = make_task("http://127.0.0.1:8765"), make_task("https://fbref.com")
+    journal.plan([stand_in_task])
+    journal.record_outcome(stand_in_task, "saved", failed=False)
+
+    assert journal_task_key(stand_in_task) != journal_task_key(real_task)
+    assert journal.plan([real_task], resume=True) == [real_task]
+    assert journal.state(stand_in_task) == STATE_DONE and journal.state(real_task) == STATE_PENDING
+
+
+def test_keys_without_host_are_migrated(tmp_path):
+    path = str(tmp_path / "journal.sqlite")
+    task = make_task("https://fbref.com")
+    ScrapeJournal(path).close()
+    conn = sqlite3.connect(path)
+    conn.execute("INSERT INTO tasks (task_key, url, state, updated_at) VALUES (?, ?, ?, ?)", ("Big5_Agg_Player|2023-2024|standard", task['url'], STATE_DONE, time.time()))
+    conn.commit(); conn.close()
+
+    assert ScrapeJournal(path).plan([task], resume=True) == []
+
+
+def test_only_tasks_past_their_backoff_are_due(tmp_path):
+    journal = ScrapeJournal(str(tmp_path / "journal.sqlite"), max_attempts=5, backoff_seconds=0.2)
+    soon, later = make_task("https://fbref.com", "standard"), make_task("https://fbref.com", "shooting")
+    journal.plan([soon, later])
+    journal.record_outcome(soon, "error", failed=True)
+    journal.record_outcome(later, "error", failed=True)
+    journal.record_outcome(later, "error", failed=True)  # second failure: backoff doubled
+
+    time.sleep(journal.seconds_until_due([soon, later]))
+    assert journal.tasks_due([soon, later]) == [soon]
+    time.sleep(journal.seconds_until_due([later]))
+    assert journal.tasks_due([soon, later]) == [soon, later]
@@ -0,0 +1,56 @@
+import os
+import sys
+
+import pytest
+
+import advanced_scraper_selenium
+from advanced_scraper_selenium import build_scrape_tasks
+
+TARGETS = ["Big5_Agg_Player", "Big5_Agg_Squad"]
+
+
+def run_scraper(monkeypatch, work_dir: str, base_url: str, *options: str):
+    """Runs the scraper's command line in `work_dir` (it writes to ./output_data) against the stand-in."""
+    os.makedirs(work_dir, exist_ok=True)
+    monkeypatch.chdir(work_dir)
+    monkeypatch.setattr(sys, "argv", ["advanced_scraper_selenium.py", "--targets", *TARGETS, "--seasons", "1", "--latest_year", "2024",
+                                      "--base_url", base_url, "--fetcher", "http", "--max-rps", "200", "--no_cache", "--metrics_file", "",
+                                      "--header_registry", "", "--delta_store", "", "--max_attempts", "1", *options])
+    advanced_scraper_selenium.main()
+
+
+def output_tables(work_dir: str) -> dict:
+    tables = {}
+    for dir_path, _, file_names in os.walk(os.path.join(work_dir, "output_data")):
+        for file_name in file_names:
+            if not file_name.endswith(".csv"): continue
+            with open(os.path.join(dir_path, file_name), "rb") as f: tables[os.path.relpath(os.path.join(dir_path, file_name), work_dir)] = f.read()
+    return tables
+
+
+@pytest.fixture
+def saved_pages(stand_in_site, tmp_path):
+    tasks = build_scrape_tasks(TARGETS, 2024, 1, str(tmp_path / "unused"), stand_in_site.base_url)
+    stand_in_site.save_pages(tasks)
+    return tasks
+
+
+def test_async_pipeline_matches_threads(stand_in_site, saved_pages, tmp_path, monkeypatch):
+    run_scraper(monkeypatch, str(tmp_path / "threads"), stand_in_site.base_url, "--pipeline", "threads", "--workers", "2")
+    run_scraper(monkeypatch, str(tmp_path / "async"), stand_in_site.base_url, "--pipeline", "async", "--workers", "2", "--queue_size", "2")
+
+    threads_tables, async_tables = output_tables(str(tmp_path / "threads")), output_tables(str(tmp_path / "async"))
+    assert len(threads_tables) == len(saved_pages)
+    assert async_tables == threads_tables
+    assert len(stand_in_site.requests) == 2 * len(saved_pages)
+
+
+def test_async_harvest_skips_pages_whose_tables_were_fetched(stand_in_site, saved_pages, tmp_path, monkeypatch):
+    run_scraper(monkeypatch, str(tmp_path / "harvest"), stand_in_site.base_url, "--pipeline", "async", "--harvest", "--workers", "1")
+
+    requested = stand_in_site.requested_paths()
+    assert requested and all("/players/" in path for path in requested), "squad pages were fetched although player pages carried their tables"
+    tables = output_tables(str(tmp_path / "harvest"))
+    n_categories = len(saved_pages) // len(TARGETS)
+    for data_type in ("player", "squad", "squad_against"):
+        assert sum(name.endswith(f"_{data_type}_stats.csv") for name in tables) == n_categories
@@ -0,0 +1,53 @@
+import os
+
+import pandas as pd
+
+from advanced_scraper_selenium import build_scrape_tasks, run_scrape_task, task_primary_output_path, TASK_SAVED
+from page_fetchers import HttpFetcher
+from scrape_scheduler import HostRateLimiter, run_tasks_with_worker_pool
+
+MAX_RPS = 20.0
+
+
+def test_worker_pool_scrapes_stand_in_within_rate_limit(stand_in_site, tmp_path):
+    tasks = build_scrape_tasks(["Big5_Agg_Player"], 2024, 1, str(tmp_path / "output"), stand_in_site.base_url)
+    stand_in_site.save_pages(tasks)
+    rate_limiter = HostRateLimiter(MAX_RPS)
+
+    results = run_tasks_with_worker_pool(tasks, lambda fetcher, task: run_scrape_task(fetcher, task), lambda: HttpFetcher(rate_limiter),
+                                         worker_count=3, close_session=lambda fetcher: fetcher.close())
+
+    assert results == [TASK_SAVED] * len(tasks)
+    for task in tasks:
+        df = pd.read_csv(task_primary_output_path(task))
+        assert df['Player'].tolist() == ["Alisson", "Justin Bijlow", "Marco Bizot"]
+        assert df['Player_ID'].tolist() == ["1a2b3c4d", "5e6f7a8b", "9c0d1e2f"]
+    assert sorted(stand_in_site.requested_paths()) == sorted(task['url'][len(stand_in_site.base_url):] for task in tasks)
+    # One shared bucket across all workers: the i-th request may not arrive before i / MAX_RPS seconds.
+    arrivals = sorted(at for at, _ in stand_in_site.requests)
+    for i, at in enumerate(arrivals):
+        assert at - arrivals[0] >= i / MAX_RPS - 0.02, f"request {i} arrived after {at - arrivals[0]:.3f} s"
+
+
+def test_worker_pool_reports_missing_pages(stand_in_site, tmp_path):
+    tasks = build_scrape_tasks(["Big5_Agg_Squad"], 2024, 1, str(tmp_path / "output"), stand_in_site.base_url)[:2]
+    stand_in_site.save_pages(tasks[:1])
+
+    results = run_tasks_with_worker_pool(tasks, lambda fetcher, task: run_scrape_task(fetcher, task), lambda: HttpFetcher(HostRateLimiter(MAX_RPS)),
+                                         worker_count=2, close_session=lambda fetcher: fetcher.close())
+
+    assert results[0] == TASK_SAVED and results[1] != TASK_SAVED
+    assert os.path.isfile(task_primary_output_path(tasks[0])) and not os.path.isfile(task_primary_output_path(tasks[1]))
+
+
+def test_tasks_whose_session_fails_to_start_are_reported(tmp_path):
+    tasks = build_scrape_tasks(["Big5_Agg_Player"], 2024, 1, str(tmp_path / "output"))
+    failed = []
+
+    def start_browser():
+        raise RuntimeError("chromedriver did not start")
+
+    results = run_tasks_with_worker_pool(tasks, lambda fetcher, task: TASK_SAVED, start_browser, worker_count=2,
+                                         session_failed=lambda task, error: failed.append((task['url'], str(error))) or "failed")
+    assert results == ["failed"] * len(tasks)
+    assert sorted(failed) == sorted((task['url'], "chromedriver did not start") for task in tasks)
@@ -0,0 +1,49 @@
+import contextlib
+import io
+import os
+
+import bs4
+import pandas as pd
+import pytest
+
+from advanced_scraper_selenium import find_table_directly_or_in_comment, clean_stat_table, clean_fixtures_table
+from table_extractor import extract_page_tables
+
+PAGES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "pages")
+
+
+def _saved_page(name: str) -> str:
+    with open(os.path.join(PAGES_DIR, name), encoding="utf-8") as f: return f.read()
+
+
+def _read_html_table(page_source: str, table_id: str) -> pd.DataFrame:
+    with contextlib.redirect_stdout(io.StringIO()):
+        df, _ = find_table_directly_or_in_comment(bs4.BeautifulSoup(page_source, 'lxml'), direct_table_id_exact=table_id, comment_marker_string=f'id="{table_id}"')
+    return df
+
+
+@pytest.mark.parametrize("page, table_id, data_type, source", [
+    ("big5_standard_stats.html", "stats_standard", "player", "direct"),
+    ("big5_standard_stats.html", "stats_teams_standard_for", "squad", "comment"),
+    ("premier_league_scores_fixtures.html", "sched_2024-2025_9_1", "fixtures", "direct"),
+])
+def test_extractor_matches_read_html_after_cleaning(page, table_id, data_type, source):
+    page_source = _saved_page(page)
+    extracted = extract_page_tables(page_source)[table_id]
+    assert extracted.attrs['source'] == source
+    clean = clean_fixtures_table if data_type == "fixtures" else lambda df: clean_stat_table(df, data_type)
+    expected = clean(_read_html_table(page_source, table_id))
+    assert len(expected) > 0
+    # Player_ID only comes from the extractor; every other column must match the read_html path exactly.
+    pd.testing.assert_frame_equal(clean(extracted).drop(columns=['Player_ID'], errors='ignore'), expected)
+
+
+def test_extractor_adds_player_ids_and_drops_repeated_headers():
+    cleaned = clean_stat_table(extract_page_tables(_saved_page("big5_standard_stats.html"))["stats_standard"], "player")
+    assert cleaned["Player"].tolist() == ["Alisson", "Mohamed Salah", "Justin Bijlow"]
+    assert cleaned["Player_ID"].tolist() == ["1d14e9f4", "e342ad68", "4b1c7b1f"]
+    assert cleaned["Playing_Time_Min"].tolist() == ["2520", "3371", "585"]
+
+
+def test_extractor_only_returns_requested_tables():
+    assert list(extract_page_tables(_saved_page("big5_standard_stats.html"), table_ids=["stats_teams_standard_for"])) == ["stats_teams_standard_for"]
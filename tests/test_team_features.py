@@ -0,0 +1,84 @@
+import pandas as pd
+
+from match_store import MatchStore, team_id_for
+from team_features import TeamFeatureBuilder, ELO_INITIAL_RATING
+
+FIXTURE_COLUMNS = ["Competition", "Season", "Wk", "Date", "Time", "Home", "xG", "Score", "xG1", "Away"]
+# (Wk, Date, Time, Home, home xG, Score, away xG, Away); the 2024-08-24 matches have no kickoff time, so both start at 00:00.
+FIXTURES = [
+    (1, "2024-08-17", "15:00", "Arsenal", 1.9, "2–0", 0.6, "Chelsea"),
+    (1, "2024-08-17", "15:00", "Everton", 1.1, "1–1", 1.3, "Fulham"),
+    (2, "2024-08-24", None, "Arsenal", 1.4, "1–0", 0.2, "Everton"),
+    (2, "2024-08-24", None, "Fulham", 2.2, "3–0", 0.7, "Arsenal"),
+    (3, "2024-08-31", "17:30", "Chelsea", 1.0, "2–2", 1.8, "Arsenal"),
+    (4, "2024-09-14", "15:00", "Fulham", None, None, None, "Chelsea"),
+]
+
+
+def _fixtures(rows: list) -> pd.DataFrame:
+    return pd.DataFrame([("Premier League", "2024-2025", *row) for row in rows], columns=FIXTURE_COLUMNS)
+
+
+def _rebuilt_features(db_path: str, rows: list) -> pd.DataFrame:
+    store = MatchStore(db_path)
+    try:
+        store.load_fixtures(_fixtures(rows))
+        TeamFeatureBuilder(store).rebuild()
+        return TeamFeatureBuilder(store).features()
+    finally:
+        store.close()
+
+
+def _row(features: pd.DataFrame, home: str, away: str) -> pd.Series:
+    return features[(features['home_team_id'] == team_id_for(home)) & (features['away_team_id'] == team_id_for(away))].iloc[0]
+
+
+def test_first_match_of_each_team_has_default_elo_and_no_form(tmp_path):
+    features = _rebuilt_features(str(tmp_path / "matches.sqlite"), FIXTURES)
+    for home, away in (("Arsenal", "Chelsea"), ("Everton", "Fulham")):
+        first = _row(features, home, away)
+        assert first['home_elo'] == first['away_elo'] == ELO_INITIAL_RATING
+        assert pd.isna(first['home_matches_5']) and pd.isna(first['away_matches_5']) and pd.isna(first['home_gf_avg_5'])
+
+
+def test_matches_at_the_same_kickoff_do_not_see_each_other(tmp_path):
+    features = _rebuilt_features(str(tmp_path / "matches.sqlite"), FIXTURES)
+    against_everton, against_fulham = _row(features, "Arsenal", "Everton"), _row(features, "Fulham", "Arsenal")
+    # Arsenal's only earlier match is the 2-0 on 2024-08-17, whichever of its two 2024-08-24 matches is rated first.
+    assert against_everton['home_elo'] == against_fulham['away_elo'] > ELO_INITIAL_RATING
+    assert against_everton['home_matches_5'] == against_fulham['away_matches_5'] == 1
+    assert against_everton['home_gf_avg_5'] == against_fulham['away_gf_avg_5'] == 2.0
+    later = _row(features, "Chelsea", "Arsenal")
+    assert later['away_matches_5'] == 3 and later['away_gf_avg_5'] == 1.0
+
+
+def test_form_only_uses_matches_strictly_before_kickoff(tmp_path):
+    db_path = str(tmp_path / "matches.sqlite")
+    features = _rebuilt_features(db_path, FIXTURES)
+    store = MatchStore(db_path)
+    try:
+        team_matches = store.query("SELECT * FROM team_matches WHERE goals_for IS NOT NULL ORDER BY kickoff")
+    finally:
+        store.close()
+    for _, match in features.iterrows():
+        for side in ("home", "away"):
+            earlier = team_matches[(team_matches['team_id'] == match[f"{side}_team_id"]) & (team_matches['kickoff'] < match['kickoff'])].tail(5)
+            if earlier.empty: assert pd.isna(match[f"{side}_matches_5"])
+            else: assert match[f"{side}_matches_5"] == len(earlier) and match[f"{side}_xga_avg_5"] == earlier['xg_against'].mean()
+
+
+def test_incremental_update_equals_full_rebuild(tmp_path):
+    full = _rebuilt_features(str(tmp_path / "full.sqlite"), FIXTURES)
+
+    store = MatchStore(str(tmp_path / "incremental.sqlite"))
+    try:
+        # The first run sees the last two matchweeks as unplayed fixtures.
+        store.load_fixtures(_fixtures(FIXTURES[:4] + [row[:4] + (None, None, None, row[7]) for row in FIXTURES[4:]]))
+        TeamFeatureBuilder(store).rebuild()
+        store.load_fixtures(_fixtures(FIXTURES[4:]), replace=False)
+        updated = TeamFeatureBuilder(store).update()
+        incremental = TeamFeatureBuilder(store).features()
+    finally:
+        store.close()
+    assert len(updated) == 2
+    pd.testing.assert_frame_equal(incremental, full)